@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 from .typing import *
 from .projections import *
+from .proximal import *
+from .linear import *
 from .nonexpansive import *
 
 __all__ = dir()
@@ -8,19 +8,228 @@ The following items are automatically loaded when ``fpmlib`` package is imported
 
 import numpy as np
 import itertools
-from typing import Any, Optional, Iterable, Dict
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import Any, Optional, Iterable, Dict, Callable, Union
 from .typing import NonexpansiveMap
 from .contracts import check_nonexpansive_map
-__all__ = ['find']
+from .nonexpansive import _averagedness
+from .parallel import _stages, _find_partitioned
+__all__ = ['find', 'FindResult']
+
+Callback = Callable[[np.ndarray, float], None]
+
+_ADAPTIVE_GROWTH = 1.25
+_ADAPTIVE_SHRINK = 0.5
+_RESTART_RATIO = 0.5
+_ACCURACY_RATIO = 0.1
+
+
+class FindResult(dict):
+    r"""
+    The result of ``find`` with ``full_output=True``, in the manner of ``scipy.optimize.OptimizeResult``.
+    Each item can also be accessed as an attribute.
+
+    x: ndarray
+        The obtained solution.
+    success: bool
+        Whether :math:`\|x-T(x)\|<\mathtt{tol}` is attained.
+    status: str
+        The termination reason, i.e., ``'tol'`` if the tolerance is attained, ``'maxiter'`` if the iteration is exhausted, ``'steps'`` if a finite sequence given as an option (e.g., ``steps``) runs out before ``maxiter``, or ``'infeasible'`` or ``'stagnation'`` if the corresponding option of ``find`` detects it.
+    nit: int
+        Number of iterations.
+    nfev: int
+        Number of evaluations of the given mapping :math:`T`.
+    residual: float
+        The last residual :math:`\|x_k-T(x_k)\|` computed by the solver.
+    residuals: ndarray
+        The residual computed at each iteration.
+    certificate: ndarray or None
+        If the iteration is stopped by ``infeasibility`` or ``stagnation``, the last displacement :math:`x_k-T(x_k)`.
+        For ``'infeasible'``, it approximates the minimal displacement vector :math:`v\neq 0` of :math:`T`, e.g., the gap vector between two disjoint sets for the Douglas-Rachford mapping.
+    time: Dict[str, float]
+        Wall time in seconds spent in each phase: ``'setup'`` for the validation of the arguments, ``'map'`` for the evaluations of :math:`T`, and ``'update'`` for the rest of the solver.
+    """
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError as e:
+            raise AttributeError(name) from e
+
+    __setattr__ = dict.__setitem__
+    __delattr__ = dict.__delitem__
+
+
+class _Trace(object):
+    # A wrapper of the mapping given to a solver, which counts its evaluations (and times them if ``timed``)
+    # and stores the residuals through ``record``, into an array grown by doubling if ``history`` or ``stagnation`` needs them,
+    # or only the last one otherwise.
+    # ``record`` returns whether the solver must stop, i.e., whether the tolerance is attained
+    # or an enabled diagnostic detects infeasibility or stagnation.
+
+    def __init__(
+        self,
+        T: NonexpansiveMap,
+        maxiter: Optional[int] = None,
+        timed: bool = True,
+        history: bool = True,
+        infeasibility: Optional[float] = None,
+        stagnation: Optional[float] = None,
+        patience: int = 50,
+        accuracy: Optional[float] = None
+    ):
+        self.map = T
+        self.maxiter = maxiter
+        self.timed = timed
+        self.nfev = 0
+        self.history = history or stagnation is not None
+        self.residuals = np.empty((256 if maxiter is None else min(maxiter + 1, 256)) if self.history else 1)
+        self.residual = np.nan
+        self.count = 0
+        self.map_time = 0.
+        self.status = None  # type: Optional[str]
+        self.certificate = None  # type: Optional[np.ndarray]
+        self.infeasibility = infeasibility
+        self.stagnation = stagnation
+        self.patience = patience
+        self.accuracy = accuracy
+        self.diagnosed = infeasibility is not None or stagnation is not None
+        self._displacement = None  # type: Optional[np.ndarray]
+        self._previous = None  # type: Optional[np.ndarray]
+        self._streak = 0
+        self._floor = np.inf
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        if self.timed:
+            start = perf_counter()
+        y = self.map(x) if self.accuracy is None else self.map.evaluate(x, self.tolerance())
+        if self.timed:
+            self.map_time += perf_counter() - start
+        self.nfev += 1
+        return y
+
+    def tolerance(self) -> float:
+        # The summable schedule accuracy / (k + 1)^2 over the evaluations, which is also kept below a fraction of the last residual.
+        # It is indexed by evaluation rather than by iteration, since some solvers evaluate T several times per iteration.
+        eps = self.accuracy / (self.nfev + 1) ** 2
+        if self.count > 0:
+            eps = min(eps, _ACCURACY_RATIO * self.residual)
+        return eps
+
+    def record(self, residual: float, tol: float, r: Optional[np.ndarray] = None) -> bool:
+        # r is T(x) - x at the point whose residual is recorded, which the diagnostics require.
+        # The solver may overwrite r, so the displacement x - T(x) is taken here.
+        if self.diagnosed and r is not None:
+            if self._displacement is None:
+                self._displacement = np.empty(r.shape, dtype=np.result_type(r, float))
+            np.negative(r, out=self._displacement)
+        if not self.history:
+            self.residuals[0] = residual
+        else:
+            if self.count == self.residuals.shape[0]:
+                residuals = np.empty(2 * self.count)
+                residuals[:self.count] = self.residuals
+                self.residuals = residuals
+            self.residuals[self.count] = residual
+        self.residual = residual
+        self.count += 1
+        if self.infeasibility is not None and self._infeasible():
+            self.status = 'infeasible'
+        elif self.stagnation is not None and self._stagnant():
+            self.status = 'stagnation'
+        else:
+            return residual < tol
+        if self._displacement is not None:
+            self.certificate = self._displacement.copy()
+        return True
+
+    def _infeasible(self) -> bool:
+        # The displacement x_k - T(x_k) of an averaged iteration converges to the minimal displacement vector,
+        # and T has no fixed point if it is nonzero ([Baillon1978]_).
+        d = self._displacement
+        if d is None:
+            return False
+        if self._previous is None:
+            self._previous = d.copy()
+            return False
+        norm = np.linalg.norm(d)
+        if norm > 0 and np.linalg.norm(d - self._previous) <= self.infeasibility * norm:
+            self._streak += 1
+        else:
+            self._streak = 0
+        self._previous[:] = d
+        return self._streak >= self.patience
+
+    def _stagnant(self) -> bool:
+        # The best residual in the last ``patience`` iterations is compared with the best one before them.
+        k = self.count
+        if k <= self.patience:
+            return False
+        self._floor = min(self._floor, self.residuals[k - self.patience - 1])
+        return self.residuals[k - self.patience:k].min() > (1 - self.stagnation) * self._floor
+
+    def result(self, x: np.ndarray, tol: float, setup_time: float, solve_time: float) -> FindResult:
+        residuals = self.residuals[:self.count if self.history else min(self.count, 1)].copy()
+        success = self.status is None and self.count > 0 and self.residual < tol
+        stopped = success or self.status is not None
+        if success:
+            status = 'tol'
+        elif stopped:
+            status = self.status
+        elif self.maxiter is not None and self.count >= self.maxiter:
+            status = 'maxiter'
+        else:
+            # The solver returned before maxiter, i.e., a finite step size sequence is exhausted.
+            status = 'steps'
+        return FindResult(
+            x=x,
+            success=success,
+            status=status,
+            nit=self.count - int(stopped),
+            nfev=self.nfev,
+            residual=self.residual,
+            residuals=residuals,
+            certificate=self.certificate,
+            time={'setup': setup_time, 'map': self.map_time, 'update': solve_time - self.map_time},
+        )
+
+
+def _relaxation_bound(T: NonexpansiveMap) -> float:
+    # The Krasnosel'skii-Mann iteration converges for any step in (0, 1 / a) if T is a-averaged.
+    return 1 / _averagedness(T)
+
+
+def _iterations(maxiter: Optional[int]) -> Iterable[None]:
+    if maxiter is None:
+        return itertools.repeat(None)
+    return itertools.repeat(None, maxiter)
+
+
+def _policy(steps: Any, policies: Iterable[str]) -> Optional[str]:
+    # Return the name of the step size policy given as steps, or None for a sequence (which may be an ndarray).
+    if not isinstance(steps, str):
+        return None
+    if steps not in policies:
+        raise ValueError('Unknown step size policy %s is specified.' % steps)
+    return steps
 
 
 def _find_krasnoselskii_mann(
-    T: NonexpansiveMap,
+    T: _Trace,
     x0: np.ndarray,
     tol: float,
     maxiter: Optional[int] = None,
-    steps: Optional[Iterable[float]] = None
+    steps: Optional[Union[str, Iterable[float]]] = None,
+    callback: Optional[Callback] = None,
+    processes: Optional[int] = None
 ) -> np.ndarray:
+    if processes is not None:
+        if callback is not None or isinstance(steps, str):
+            raise ValueError('Option `processes` cannot be used with `callback` or a step size policy.')
+        return _find_krasnoselskii_mann_partitioned(T, x0, tol, processes, maxiter, steps)
+    if _policy(steps, ('adaptive',)) == 'adaptive':
+        return _find_krasnoselskii_mann_adaptive(T, x0, tol, maxiter, callback)
     if steps is None:
         steps = itertools.repeat(0.5)
     if maxiter is not None:
@@ -29,23 +238,82 @@ def _find_krasnoselskii_mann(
     x = x0.copy()
     for step in steps:
         Tx = T(x)
-        if np.linalg.norm(Tx - x) < tol:
+        r = Tx - x
+        if T.record(np.linalg.norm(r), tol, r):
             break
         Tx *= step
         x *= 1. - step
         x += Tx
+        if callback is not None:
+            callback(x, step)
+
+    return x
+
+
+def _find_krasnoselskii_mann_partitioned(
+    T: _Trace,
+    x0: np.ndarray,
+    tol: float,
+    processes: int,
+    maxiter: Optional[int] = None,
+    steps: Optional[Iterable[float]] = None
+) -> np.ndarray:
+    if T.infeasibility is not None or T.stagnation is not None or T.accuracy is not None:
+        raise ValueError('Option `processes` cannot be used with `infeasibility`, `stagnation` or `accuracy`.')
+    x, _, residuals = _find_partitioned(T.map, x0, tol, processes, maxiter, steps)
+    for residual in residuals:
+        T.record(residual, tol)
+    T.nfev += residuals.shape[0]
+    return x
+
+
+def _find_krasnoselskii_mann_adaptive(
+    T: _Trace,
+    x0: np.ndarray,
+    tol: float,
+    maxiter: Optional[int] = None,
+    callback: Optional[Callback] = None
+) -> np.ndarray:
+    # Every step stays in [bound / 2, 0.95 * bound], where the iteration is known to converge,
+    # so no evaluation of T is ever thrown away; the residual decrease ratio only steers the step.
+    bound = _relaxation_bound(T.map)
+    lower, upper = bound / 2, 0.95 * bound
+
+    x = x0.copy()
+    step, last, rate = lower, np.inf, np.inf
+    for _ in _iterations(maxiter):
+        r = T(x)
+        r -= x
+        rnorm = np.linalg.norm(r)
+        if T.record(rnorm, tol, r):
+            break
+        if last < np.inf:
+            ratio = rnorm / last
+            if ratio <= rate:
+                step = min(step * _ADAPTIVE_GROWTH, upper)
+            else:
+                step = max(step * _ADAPTIVE_SHRINK, lower)
+            rate = ratio
+        last = rnorm
+        # x = x + step * (Tx - x)
+        r *= step
+        x += r
+        if callback is not None:
+            callback(x, step)
 
     return x
 
 
 def _find_hishinuma2015(
-    T: NonexpansiveMap,
+    T: _Trace,
     x0: np.ndarray,
     tol: float,
     maxiter: Optional[int] = None,
     steps: Optional[Iterable[float]] = None,
-    beta: Optional[Iterable[float]] = None
+    beta: Optional[Iterable[float]] = None,
+    callback: Optional[Callback] = None
 ) -> np.ndarray:
+    _policy(steps, ())
     if steps is None:
         steps = itertools.repeat(0.5)
     if maxiter is not None:
@@ -56,7 +324,8 @@ def _find_hishinuma2015(
     Tx = T(x0)
     x, d = x0.copy(), Tx - x0
     for step, b in zip(steps, beta):
-        if np.linalg.norm(Tx - x) < tol:
+        r = Tx - x
+        if T.record(np.linalg.norm(r), tol, r):
             break
         # d = (Tx - x) + b * d
         d *= b
@@ -65,44 +334,335 @@ def _find_hishinuma2015(
         # y = x + d
         # x = x + step * (y - x)
         x += step * d
+        if callback is not None:
+            callback(x, step)
         #
         Tx = T(x)
 
     return x
 
 
+def _find_mainge2008(
+    T: _Trace,
+    x0: np.ndarray,
+    tol: float,
+    maxiter: Optional[int] = None,
+    steps: Optional[Iterable[float]] = None,
+    inertia: Optional[Iterable[float]] = None,
+    restart: bool = True,
+    callback: Optional[Callback] = None
+) -> np.ndarray:
+    _policy(steps, ())
+    if steps is None:
+        steps = itertools.repeat(0.5)
+    if maxiter is not None:
+        steps = itertools.islice(steps, maxiter)
+    if inertia is None:
+        inertia = itertools.repeat(0.2)
+
+    x = x0.astype(np.result_type(x0.dtype, float))
+    y, d = np.empty_like(x), np.zeros_like(x)
+    last = np.inf
+    for step, theta in zip(steps, inertia):
+        # y = x + theta * (x - x_prev)
+        np.multiply(d, theta, out=y)
+        y += x
+        r = T(y)
+        r -= y
+        rnorm = np.linalg.norm(r)
+        if T.record(rnorm, tol, r):
+            x[:] = y
+            break
+        # x_next = y + step * (Ty - y)
+        r *= step
+        r += y
+        np.subtract(r, x, out=d)
+        x[:] = r
+        if restart and rnorm > last:
+            d[:] = 0
+        last = rnorm
+        if callback is not None:
+            callback(x, step)
+
+    return x
+
+
+def _find_bot2023(
+    T: _Trace,
+    x0: np.ndarray,
+    tol: float,
+    maxiter: Optional[int] = None,
+    alpha: float = 10.,
+    step: float = 1.,
+    restart: bool = True,
+    callback: Optional[Callback] = None
+) -> np.ndarray:
+    if alpha <= 2:
+        raise ValueError('Option `alpha` must be greater than 2.')
+
+    x = x0.astype(np.result_type(x0.dtype, float))
+    d, tmp = np.zeros_like(x), np.empty_like(x)
+    prev, last, k = None, np.inf, 0
+    for _ in _iterations(maxiter):
+        g = T(x)
+        g -= x
+        rnorm = np.linalg.norm(g)
+        if T.record(rnorm, tol, g):
+            break
+        if restart and rnorm > last:
+            k = 0
+        # With g = T(x) - x,
+        # d = k / (k + alpha) * (d + step * (g - g_prev)) + step * alpha / (2 * (k + alpha)) * g
+        c = k / (k + alpha)
+        d *= c
+        if k > 0:
+            np.subtract(g, prev, out=tmp)
+            tmp *= step * c
+            d += tmp
+        np.multiply(g, step * alpha / (2 * (k + alpha)), out=tmp)
+        d += tmp
+        x += d
+        prev, last, k = g, rnorm, k + 1
+        if callback is not None:
+            callback(x, step)
+
+    return x
+
+
+def _find_supermann(
+    T: _Trace,
+    x0: np.ndarray,
+    tol: float,
+    maxiter: Optional[int] = None,
+    memory: int = 10,
+    step: float = 1.,
+    c0: float = 0.99,
+    c1: float = 0.99,
+    q: float = 0.99,
+    sigma: float = 0.1,
+    backtracks: int = 20,
+    callback: Optional[Callback] = None
+) -> np.ndarray:
+    # R = Id - T is 1 / (2a)-cocoercive if T is a-averaged, which gives the half-space
+    # {z : <Rw, w - z> >= |Rw|^2 / (2a)} containing Fix(T) used by the safeguard step.
+    a = _averagedness(T.map)
+    x = x0.astype(np.result_type(x0.dtype, float))
+    U, V = np.empty((memory, x.shape[0])), np.empty((memory, x.shape[0]))
+    n = 0
+
+    def apply(z: np.ndarray) -> np.ndarray:
+        # H z = z + U^T (V z)
+        return z + U[:n].T.dot(V[:n].dot(z))
+
+    Rx = x - T(x)
+    eta = safe = base = np.linalg.norm(Rx)
+    for k, _ in enumerate(_iterations(maxiter)):
+        rnorm = np.linalg.norm(Rx)
+        if T.record(rnorm, tol, -Rx if T.diagnosed else None):
+            break
+        d = -apply(Rx)
+
+        tau, x_next, Rx_next = 1., None, None
+        for _ in range(backtracks + 1):
+            w = x + tau * d
+            Rw = w - T(w)
+            wnorm = np.linalg.norm(Rw)
+            if rnorm <= c0 * eta:
+                eta = rnorm
+                x_next, Rx_next = w, Rw
+            elif rnorm <= safe and wnorm <= c1 * rnorm:
+                safe = wnorm + q ** k * base
+                x_next, Rx_next = w, Rw
+            else:
+                rho = wnorm ** 2 - 2 * a * np.inner(Rw, w - x)
+                if wnorm > 0 and rho >= sigma * wnorm * rnorm:
+                    x_next = x - (step * rho / (2 * a * wnorm ** 2)) * Rw
+            # Broyden's update of H with the modification by Powell,
+            # restarted from the identity whenever the memory is exhausted.
+            s, y = w - x, Rw - Rx
+            ss = np.inner(s, s)
+            if ss > 0:
+                if n == memory:
+                    n = 0
+                Hy = apply(y)
+                gamma = np.inner(s, Hy) / ss
+                if abs(gamma) < 0.2:
+                    theta = (1 - 0.2 * (1. if gamma >= 0 else -1.)) / (1 - gamma)
+                    Hy *= theta
+                    Hy += (1 - theta) * s
+                V[n] = s + V[:n].T.dot(U[:n].dot(s))
+                U[n] = (s - Hy) / np.inner(s, Hy)
+                n += 1
+            if x_next is not None:
+                break
+            tau /= 2
+        else:
+            # The plain Krasnosel'skii-Mann step, i.e., tau = 0 in the safeguard step.
+            x_next = x - (step / (2 * a)) * Rx
+
+        x = x_next
+        Rx = Rx_next if Rx_next is not None else x - T(x)
+        if callback is not None:
+            callback(x, tau)
+
+    return x
+
+
+def _find_arock(
+    T: _Trace,
+    x0: np.ndarray,
+    tol: float,
+    maxiter: Optional[int] = None,
+    blocks: int = 16,
+    step: float = 0.5,
+    threads: Optional[int] = None,
+    seed: Optional[int] = None
+) -> np.ndarray:
+    stages = _stages(T.map)
+    if len(stages) != 1:
+        raise ValueError('Method ARock requires a SeparableMap or an Intersection of them.')
+    S = stages[0]
+    x = x0.astype(np.result_type(x0.dtype, float))
+    bounds = np.linspace(0, x.shape[0], min(blocks, x.shape[0]) + 1).astype(int)
+    index = [slice(int(a), int(b)) for a, b in zip(bounds, bounds[1:])]
+    partials = np.zeros((len(index), S.reduce_size))
+    total = np.zeros(S.reduce_size)
+    rng = np.random.RandomState(seed)
+
+    def update(count: int, rng: np.random.RandomState) -> None:
+        # The partial sums of each block are maintained, so that a block update costs only O(block size).
+        for i in rng.randint(len(index), size=count):
+            sl = index[i]
+            y = S.block_apply(x[sl], sl, total)
+            y -= x[sl]
+            y *= step
+            x[sl] += y
+            if S.reduce_size:
+                p = S.block_reduce(x[sl], sl)
+                total[:] += p - partials[i]
+                partials[i] = p
+
+    executor = ThreadPoolExecutor(threads) if threads is not None else None
+    try:
+        for _ in _iterations(maxiter):
+            r = T(x)
+            r -= x
+            if T.record(np.linalg.norm(r), tol, r):
+                break
+            # The partial sums are recomputed once per epoch, which removes the drift
+            # caused by rounding errors and by concurrent updates.
+            for i, sl in enumerate(index):
+                partials[i] = S.block_reduce(x[sl], sl)
+            total[:] = partials.sum(axis=0)
+            if executor is None:
+                update(len(index), rng)
+            else:
+                counts = np.full(threads, len(index) // threads)
+                counts[:len(index) % threads] += 1
+                seeds = rng.randint(2 ** 31, size=threads)
+                for f in [executor.submit(update, c, np.random.RandomState(s)) for c, s in zip(counts, seeds)]:
+                    f.result()
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return x
+
+
 def _find_halpern(
-    T: NonexpansiveMap,
+    T: _Trace,
     x0: np.ndarray,
     tol: float,
     maxiter: Optional[int] = None,
-    steps: Optional[Iterable[float]] = None
-):
+    steps: Optional[Union[str, Iterable[float]]] = None,
+    callback: Optional[Callback] = None,
+    warm_start: Optional[FindResult] = None
+) -> np.ndarray:
+    policy = _policy(steps, ('optimal', 'restarted'))
+    if policy == 'restarted':
+        return _find_halpern_restarted(T, x0, tol, maxiter, callback, warm_start)
+    if policy == 'optimal':
+        steps = map(lambda k: 1 / (k + 2), itertools.count())
     if steps is None:
         steps = map(lambda n: 1 / n, itertools.count(1))
+    if warm_start is not None:
+        # The anchor is kept, and the step size sequence is continued.
+        steps = itertools.islice(steps, warm_start.nit, None)
     if maxiter is not None:
         steps = itertools.islice(steps, maxiter)
 
-    x = x0.copy()
+    x = x0.copy() if warm_start is None else warm_start.x.copy()
     for step in steps:
         Tx = T(x)
-        if np.linalg.norm(Tx - x) < tol:
+        r = Tx - x
+        if T.record(np.linalg.norm(r), tol, r):
             break
         # x = step * x0 + (1 - step) * Tx
         x = step * x0
         Tx *= 1 - step
         x += Tx
+        if callback is not None:
+            callback(x, step)
 
     return x
 
 
+def _find_halpern_restarted(
+    T: _Trace,
+    x0: np.ndarray,
+    tol: float,
+    maxiter: Optional[int] = None,
+    callback: Optional[Callback] = None,
+    warm_start: Optional[FindResult] = None
+) -> np.ndarray:
+    # The anchor is moved to the current iterate whenever the residual has been reduced
+    # by _RESTART_RATIO since the last restart, and the schedule 1 / (k + 2) starts over.
+    if warm_start is not None:
+        x0 = warm_start.x
+    anchor, x = x0, x0.copy()
+    k, base = 0, None
+    for _ in _iterations(maxiter):
+        Tx = T(x)
+        r = Tx - x
+        rnorm = np.linalg.norm(r)
+        if T.record(rnorm, tol, r):
+            break
+        if base is None:
+            base = rnorm
+        elif rnorm <= _RESTART_RATIO * base:
+            anchor = x
+            k, base = 0, rnorm
+        step = 1 / (k + 2)
+        # x = step * anchor + (1 - step) * Tx
+        x = step * anchor
+        Tx *= 1 - step
+        x += Tx
+        k += 1
+        if callback is not None:
+            callback(x, step)
+
+    return x
+
+
+_METHODS = {
+    'ARock': _find_arock,
+    'Bot2023': _find_bot2023,
+    'Halpern': _find_halpern,
+    'Hishinuma2015': _find_hishinuma2015,
+    'Krasnoselskii-Mann': _find_krasnoselskii_mann,
+    'Mainge2008': _find_mainge2008,
+    'SuperMann': _find_supermann,
+}
+
+
 def find(
     T: NonexpansiveMap,
     x0: np.ndarray,
     method: str = 'Krasnoselskii-Mann',
     tol: float = 1e-7,
-    options: Dict[str, Any] = {}
-) -> np.ndarray:
+    options: Dict[str, Any] = {},
+    full_output: bool = False
+) -> Union[np.ndarray, FindResult]:
     r"""
     Find a fixed point of given nonexpansive mapping.
 
@@ -110,6 +670,14 @@ def find(
     :param x0: An initial point.
     :param method: Name of method to be used. We can use one of the following:
 
+        ``ARock``
+            Randomized block-coordinate Krasnosel'skii-Mann algorithm ([Peng2016]_), which updates only a randomly chosen block of coordinates :math:`x_I\leftarrow x_I+\eta(T(x)_I-x_I)` at each step.
+            The mapping must be a ``SeparableMap`` (e.g., ``Box``, ``HalfSpace`` and ``Ball``) or an ``Intersection`` of them, and the partial sums of each block are maintained so that each step costs only :math:`O(|I|)`.
+            If ``threads`` is specified, that number of threads update the shared iterate asynchronously without any lock.
+            Each iteration consists of as many steps as blocks, followed by the evaluation of the residual.
+        ``Bot2023``
+            Fast Krasnosel'skii-Mann algorithm ([Bot2023]_), which attains :math:`\|x_k-T(x_k)\|=o(1/k)`.
+            With :math:`g_k:=T(x_k)-x_k`, it iterates :math:`x_{k+1}:=x_k+\frac{k}{k+\alpha}(x_k-x_{k-1})+\frac{s\alpha}{2(k+\alpha)}g_k+\frac{sk}{k+\alpha}(g_k-g_{k-1})`.
         ``Halpern``
             Halpern's algorithm ([Halpern1967]_).
             This method finds the nearest fixed point to the initial point, i.e., :math:`x^\star\in\mathrm{Fix}(T)` such that :math:`\|x^\star-x_0\|=\inf_{x\in\mathrm{Fix}(T)}\|x-x_0\|`.
@@ -117,31 +685,111 @@ def find(
             Accelerated Krasnosel'skii-Mann algorithm based on conjugate gradient method ([Hishinuma2015]_).
         ``Krasnoselskii-Mann`` (default)
             Krasnosel'skii-Mann algorithm ([Krasnoselskii1955]_, [Mann1953]_).
+        ``Mainge2008``
+            Inertial Krasnosel'skii-Mann algorithm ([Mainge2008]_), which iterates :math:`y_k:=x_k+\theta_k(x_k-x_{k-1})` and :math:`x_{k+1}:=y_k+\alpha_k(T(y_k)-y_k)`.
+        ``SuperMann``
+            SuperMann algorithm ([Themelis2019]_), which takes the quasi-Newton directions for the residual :math:`R:=\mathrm{Id}-T` given by the limited-memory Broyden's method, safeguarded by the generalized Krasnosel'skii-Mann steps.
+            It converges superlinearly under mild assumptions around the solution, and so it suits a high accuracy.
+            The pairs of vectors of the Broyden's method are stored in two preallocated arrays of shape ``[memory, N]``.
 
     :param tol: Error tolerance, i.e., for the obtained solution :math:`x^\star`, :math:`\|x^\star-T(x^\star)\|<\mathtt{tol}` will be guaranteed.
     :param options: A dictionary passed to the solver. We can give the following parameters:
         
         maxiter: int
             Maximum number of iterations.
-        steps: Iterable[float]
-            A step size sequence.
+        steps: Iterable[float] or str
+            A step size sequence, or the name of a step size policy.
             When ``method = 'Krasnoselskii-Mann'`` or its variant ``method = 'Hishinuma2015'``, it is used as the sequence :math:`\{\alpha_k\}\subset(0, 1)` for the Krasnosel'skii-Mann iteration :math:`x_{k+1}:=x_k+\alpha_k(T(x_k)-x_k)\ (k\in\mathbb{N})`.
             When ``method = 'Halpern'``, it is used as the sequence :math:`\{\lambda_k\subset(0, 1)\}` for the Halpern's iteration :math:`x_{k+1}:=\lambda_k x_0+(1-\lambda_k)T(x_k)`.
+            The following policies are available:
+
+            ``adaptive`` (``method = 'Krasnoselskii-Mann'``)
+                Residual-based step size control.
+                The step grows while the decrease ratio of :math:`\|T(x_k)-x_k\|` improves and shrinks otherwise, within :math:`[1/(2a), 0.95/a]` for an :math:`a`-averaged mapping, e.g., within :math:`[1/2, 0.95]` for nonexpansive mappings and within :math:`[1, 1.9]` (over-relaxation) for firmly nonexpansive mappings.
+            ``optimal`` (``method = 'Halpern'``)
+                The anchoring schedule :math:`\lambda_k:=1/(k+2)` attaining the optimal rate :math:`\|x_k-T(x_k)\|=O(1/k)` ([Lieder2021]_).
+            ``restarted`` (``method = 'Halpern'``)
+                The schedule ``optimal`` restarted with the current iterate as a new anchor whenever the residual is halved.
+                Note that the obtained fixed point is no longer guaranteed to be the nearest one to the initial point.
+
+        inertia: Iterable[float]
+            When ``method = 'Mainge2008'``, it is used as the sequence :math:`\{\theta_k\}\subset[0, 1)` of the inertial parameters.
+            The default value is the constant sequence :math:`\theta_k:=0.2`.
+        alpha: float
+            When ``method = 'Bot2023'``, it is used as the parameter :math:`\alpha>2`.
+            The default value is :math:`10`.
+        step: float
+            When ``method = 'ARock'``, it is used as the step size :math:`\eta\in(0, 1)`, which defaults to :math:`0.5`.
+            A smaller step size is required as the number of ``threads`` increases.
+            When ``method = 'Bot2023'``, it is used as the step size :math:`s\in(0, 1]`.
+            When ``method = 'SuperMann'``, it is used as the relaxation parameter :math:`\lambda\in(0, 2)` of the safeguard steps.
+            The default value is :math:`1`.
+        blocks: int
+            When ``method = 'ARock'``, it is used as the number of contiguous blocks of coordinates.
+            The default value is :math:`16`.
+        threads: int
+            When ``method = 'ARock'``, it is used as the number of threads updating the iterate asynchronously.
+            If ``None`` (default) is specified, the blocks are updated one by one in the calling thread.
+        seed: int
+            When ``method = 'ARock'``, it is used as the seed of the random choice of blocks.
+        memory: int
+            When ``method = 'SuperMann'``, it is used as the number of Broyden's updates kept before the memory is restarted.
+            The default value is :math:`10`.
+        restart: bool
+            When ``method = 'Mainge2008'`` or ``method = 'Bot2023'``, the momentum is discarded whenever the residual :math:`\|T(x_k)-x_k\|` increases, unless ``False`` is specified.
+        callback: Callable[[ndarray, float], None]
+            A function called after each iteration as ``callback(x, step)`` with the new iterate and the step size actually taken.
+        processes: int
+            When ``method = 'Krasnoselskii-Mann'``, the iterate is partitioned into this number of contiguous blocks of coordinates, each of which is updated by its own process in shared memory (see ``fpmlib.parallel``).
+            The mapping must be composed of ``SeparableMap`` instances (e.g., ``Box``, ``HalfSpace`` and ``Ball``) by ``Intersection`` and ``Composition``.
+            The time spent in the mapping is not measured separately in this case, and ``infeasibility``, ``stagnation`` and ``accuracy`` cannot be specified.
+        infeasibility: float
+            If specified, the iteration is stopped with the status ``'infeasible'`` when the displacement :math:`d_k:=x_k-T(x_k)` does not vanish but stays still, i.e., :math:`\|d_k-d_{k-1}\|\le\mathtt{infeasibility}\cdot\|d_k\|` for ``patience`` consecutive iterations.
+            Since :math:`d_k` of the Krasnosel'skii-Mann iteration converges to the minimal displacement vector of :math:`T` ([Baillon1978]_), this indicates :math:`\mathrm{Fix}(T)=\emptyset`, e.g., when the Douglas-Rachford mapping of two disjoint sets is given.
+            A value such as :math:`10^{-6}` is recommended; a larger one may stop a slowly converging feasible problem.
+            It costs one more vector of memory and two more vector operations per iteration.
+        stagnation: float
+            If specified, the iteration is stopped with the status ``'stagnation'`` when the best residual in the last ``patience`` iterations is not smaller than :math:`1-\mathtt{stagnation}` times the best one before them.
+        patience: int
+            The number of iterations observed by ``infeasibility`` and ``stagnation``.
+            The default value is :math:`50`.
+        accuracy: float
+            If specified, the mapping is evaluated by ``T.evaluate(x, eps)`` instead of ``T(x)``, so that mappings computed by iterative methods can stop early (see ``FixedPointMap.evaluate``).
+            The accuracy of the :math:`k`-th evaluation :math:`(k=0,1,\ldots)` is :math:`\varepsilon_k:=\min\{\mathtt{accuracy}/(k+1)^2, 0.1r\}`, where :math:`r` is the last residual computed before it; since :math:`\{\varepsilon_k\}` is summable over all the evaluations, even for methods evaluating :math:`T` several times per iteration, the Krasnosel'skii-Mann iteration still converges ([Combettes2004]_).
+            Note that the residuals are also computed by the approximate mapping.
+        warm_start: FindResult
+            A result of a previous call of ``find`` with ``full_output=True``, e.g., for a mapping before ``Intersection.add`` or ``Intersection.remove``.
+            The iteration starts from its solution instead of ``x0``.
+            When ``method = 'Halpern'``, the anchor is kept at ``x0`` and the step size sequence continues after ``nit`` iterations of the previous result, unless ``steps = 'restarted'``, where the solution is taken as a new anchor.
         beta: Iterable[float]
             A step size sequence to be used as an acceleration parameter.
             When ``method = 'Hishinuma2015'``, it is passed to Algorithm 3.1 in [Hishinuma2015]_ as the parameter :math:`\{\beta_n\}`.
         
-    :return: the obtained solution.
+    :param full_output: If ``True``, a ``FindResult`` object is returned instead of the solution itself.
+    :return: the obtained solution, or a ``FindResult`` object if ``full_output`` is ``True``.
     """
 
+    start = perf_counter()
     if len(x0.shape) != 1:
         raise ValueError('x0 must be a vector.')
     check_nonexpansive_map(T, x0.shape[0])
+    if method not in _METHODS:
+        raise ValueError('Unknown algorithm %s is specified.' % method)
+
+    warm_start = options.get('warm_start')
+    if warm_start is not None:
+        if not isinstance(warm_start, FindResult) or warm_start.x.shape != x0.shape:
+            raise ValueError('warm_start must be a FindResult whose solution has the same shape as x0.')
+        if method != 'Halpern':
+            options = {k: v for k, v in options.items() if k != 'warm_start'}
+            x0 = warm_start.x
 
-    if method == 'Halpern':
-        return _find_halpern(T, x0, tol, **options)
-    if method == 'Hishinuma2015':
-        return _find_hishinuma2015(T, x0, tol, **options)
-    if method == 'Krasnoselskii-Mann':
-        return _find_krasnoselskii_mann(T, x0, tol, **options)
-    raise ValueError('Unknown algorithm %s is specified.' % method)
+    # These options are consumed by _Trace rather than by the solver.
+    diagnostics = {k: options[k] for k in ('infeasibility', 'stagnation', 'patience', 'accuracy') if k in options}
+    options = {k: v for k, v in options.items() if k not in diagnostics}
+    trace = _Trace(T, options.get('maxiter'), full_output, full_output, **diagnostics)
+    setup = perf_counter()
+    x = _METHODS[method](trace, x0, tol, **options)
+    if not full_output:
+        return x
+    return trace.result(x, tol, setup - start, perf_counter() - setup)
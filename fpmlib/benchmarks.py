@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Benchmarks
+----------
+
+``fpmlib.benchmarks`` module measures each step of the hot loops of ``find`` in isolation, i.e., the evaluation of the mapping, the residual norm, the scaling and the accumulation of the iterates, for ``Krasnoselskii-Mann``, ``Hishinuma2015`` and ``Halpern``.
+Each step is the sequence of NumPy statements of the corresponding solver, applied to vectors of :math:`N` elements, and it is reported with the time per element, the number of bytes moved, and the achieved memory bandwidth as a fraction of the bandwidth of STREAM-like kernels measured on the same host.
+A step whose fraction is close to :math:`1` is bound by the memory bandwidth, and so it can be made faster only by moving fewer bytes, e.g., by fusing it with another step.
+
+The results are emitted as JSON by running this module, e.g., ``python -m fpmlib.benchmarks --size 4194304 --output result.json``.
+"""
+
+import os
+import sys
+import json
+import timeit
+import argparse
+import platform
+import numpy as np
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from .typing import NonexpansiveMap
+from .projections import Box
+__all__ = ['stream', 'benchmark', 'main']
+
+_ITEMSIZE = np.dtype(float).itemsize
+_METHODS = ('Krasnoselskii-Mann', 'Hishinuma2015', 'Halpern')
+
+
+def _measure(statement: Callable[[], Any], repeat: int, duration: float) -> float:
+    # Return the best time of a single run of statement, where each measurement lasts at least duration seconds.
+    timer = timeit.Timer(statement)
+    number = 1
+    while timer.timeit(number) < duration:
+        number *= 2
+    return min(timer.repeat(repeat, number)) / number
+
+
+def stream(n: int = 1 << 22, repeat: int = 5, duration: float = 0.2) -> Dict[str, float]:
+    r"""
+    Measure the memory bandwidth of the kernels of the STREAM benchmark, written as NumPy statements:
+    ``copy`` (:math:`c\leftarrow a`), ``scale`` (:math:`b\leftarrow sc`), ``add`` (:math:`c\leftarrow a+b`) and ``triad`` (:math:`a\leftarrow b+sc`).
+    Since ``triad`` takes two passes in NumPy, its bytes are counted as moved by the two passes.
+    The bytes moved include the write-allocate read of each vector written without being read, which is also counted in ``benchmark``, so that in-place steps are compared fairly.
+
+    :param n: Number of elements of each vector, which should be large enough for the vectors not to fit in the caches.
+    :param repeat: Number of measurements, the best of which is reported.
+    :param duration: The least duration of each measurement in seconds, for which a kernel is run repeatedly.
+    :return: the dictionary of the bandwidth of each kernel in bytes per second, with ``baseline``, the best of them.
+    """
+
+    a, b, c = np.ones(n), np.full(n, 2.), np.zeros(n)
+    s = 1.
+    kernels = {
+        'copy': (lambda: np.copyto(c, a), 3),
+        'scale': (lambda: np.multiply(c, s, out=b), 3),
+        'add': (lambda: np.add(a, b, out=c), 4),
+        'triad': (lambda: (np.multiply(c, s, out=a), np.add(a, b, out=a)), 6),
+    }
+    result = {k: words * _ITEMSIZE * n / _measure(f, repeat, duration) for k, (f, words) in kernels.items()}
+    result['baseline'] = max(result.values())
+    return result
+
+
+def _steps(method: str, T: NonexpansiveMap, n: int) -> List[Tuple[str, Callable[[], Any], int]]:
+    # Return (name, statement, words moved per element) of each step of the loop of given method,
+    # where a vector written without being read is counted twice for its write-allocate read.
+    # The in-place operators of the solvers are written with `out`, and their temporary vectors are allocated as in the solvers.
+    # The step sizes are 1, so that repeated steps neither underflow into subnormal numbers nor overflow.
+    rng = np.random.RandomState(0)
+    x, x0, Tx, d = rng.rand(n), rng.rand(n), rng.rand(n), rng.rand(n)
+    step, b = 1., 1.
+
+    steps = [
+        # Tx = T(x), which reads x and writes Tx at least.
+        ('map', lambda: T(x), 3),
+        # np.linalg.norm(Tx - x)
+        ('residual', lambda: np.linalg.norm(Tx - x), 5),
+    ]
+    if method == 'Krasnoselskii-Mann':
+        steps += [
+            # Tx *= step; x *= 1 - step
+            ('scaling', lambda: (np.multiply(Tx, step, out=Tx), np.multiply(x, 1. - step, out=x)), 4),
+            # x += Tx
+            ('accumulation', lambda: np.add(x, Tx, out=x), 3),
+        ]
+    elif method == 'Hishinuma2015':
+        s = step * d
+        steps += [
+            # d *= b; step * d
+            ('scaling', lambda: (np.multiply(d, b, out=d), step * d), 5),
+            # Tx -= x; d += Tx; x += (step * d)
+            ('accumulation', lambda: (np.subtract(Tx, x, out=Tx), np.add(d, Tx, out=d), np.add(x, s, out=x)), 9),
+        ]
+    else:
+        y = step * x0
+        steps += [
+            # x = step * x0; Tx *= 1 - step
+            ('scaling', lambda: (step * x0, np.multiply(Tx, 1. - step, out=Tx)), 5),
+            # x += Tx
+            ('accumulation', lambda: np.add(y, Tx, out=y), 3),
+        ]
+    return steps
+
+
+def benchmark(
+    T: Optional[NonexpansiveMap] = None,
+    n: int = 1 << 22,
+    methods: Sequence[str] = _METHODS,
+    repeat: int = 5,
+    duration: float = 0.2,
+    baseline: Optional[Dict[str, float]] = None
+) -> Dict[str, Any]:
+    r"""
+    Measure each step of the loops of given methods.
+
+    For each step, the result has the following items:
+
+    - ``seconds``: the best time of the step,
+    - ``ns_per_element``: the time per element in nanoseconds,
+    - ``bytes``: the number of bytes read and written by the step, counted in the same manner as ``stream``, which is a lower bound for ``map``, assuming that :math:`T` reads :math:`x` and writes :math:`T(x)` only once,
+    - ``bandwidth``: the achieved bandwidth in bytes per second, and
+    - ``fraction``: the ratio of ``bandwidth`` to the baseline of ``stream``.
+
+    :param T: A nonexpansive mapping on :math:`\mathbb{R}^N` evaluated in the step ``map``, which is ``Box`` onto :math:`[-1,1]^N` if ``None`` is specified.
+    :param n: Number of elements :math:`N` of the vectors.
+    :param methods: Names of the methods of ``find``, which are ``Krasnoselskii-Mann``, ``Hishinuma2015`` and ``Halpern``.
+    :param repeat: Number of measurements, the best of which is reported.
+    :param duration: The least duration of each measurement in seconds, for which a step is run repeatedly.
+    :param baseline: The result of ``stream``, which is measured with vectors of :math:`N` elements if ``None`` is specified.
+    :return: the dictionary of the host, the result of ``stream``, and the result of each step of each method, which can be dumped as JSON.
+    """
+
+    for method in methods:
+        if method not in _METHODS:
+            raise ValueError('Unknown algorithm %s is specified.' % method)
+    if T is None:
+        T = Box(-np.ones(n), np.ones(n))
+    if T.ndim is not None and T.ndim != n:
+        raise ValueError('The mapping must be on %d-dimensional space.' % n)
+    if baseline is None:
+        baseline = stream(n, repeat, duration)
+
+    result = {}  # type: Dict[str, Dict[str, Dict[str, float]]]
+    for method in methods:
+        result[method] = {}
+        for name, statement, words in _steps(method, T, n):
+            seconds = _measure(statement, repeat, duration)
+            nbytes = words * _ITEMSIZE * n
+            result[method][name] = {
+                'seconds': seconds,
+                'ns_per_element': seconds / n * 1e9,
+                'bytes': nbytes,
+                'bandwidth': nbytes / seconds,
+                'fraction': nbytes / seconds / baseline['baseline'],
+            }
+
+    return {
+        'host': {
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'cpus': os.cpu_count(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+        },
+        'n': n,
+        'map': type(T).__name__,
+        'stream': baseline,
+        'methods': result,
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    r"""
+    Run ``benchmark`` with the ``Box`` mapping, and write the result as JSON into the standard output or the file given by ``--output``.
+    """
+
+    parser = argparse.ArgumentParser(prog='python -m fpmlib.benchmarks', description='Microbenchmarks of the steps of find.')
+    parser.add_argument('--size', type=int, default=1 << 22, help='number of elements of the vectors')
+    parser.add_argument('--methods', nargs='+', default=list(_METHODS), choices=_METHODS, help='methods to be measured')
+    parser.add_argument('--repeat', type=int, default=5, help='number of measurements of each step')
+    parser.add_argument('--duration', type=float, default=0.2, help='least duration of each measurement in seconds')
+    parser.add_argument('--output', help='file into which the result is written')
+    args = parser.parse_args(argv)
+
+    result = benchmark(n=args.size, methods=args.methods, repeat=args.repeat, duration=args.duration)
+    if args.output is None:
+        json.dump(result, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
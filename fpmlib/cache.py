@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Solution cache
+--------------
+
+``fpmlib.cache`` module provides ``SolutionCache``, which memorizes the results of ``find`` so that identical problems are answered without any iteration, and similar problems are started from the solution of the nearest one.
+"""
+
+import os
+import hashlib
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple, Union
+from .typing import FixedPointMap, NonexpansiveMap
+from .nonexpansive import MapCache
+from .algorithms import find, FindResult
+__all__ = ['SolutionCache']
+
+# Methods whose solution depends on the initial point itself, not only on its vicinity.
+_NO_WARM_START = frozenset(['Halpern'])
+
+
+class _Unhashable(Exception):
+    pass
+
+
+def _update(h: Any, value: Any) -> None:
+    # Feed a canonical encoding of value to the hash object h.
+    if isinstance(value, np.ndarray):
+        h.update(b'a%s%r' % (value.dtype.str.encode(), value.shape))
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif value is None or isinstance(value, (bool, int, float, complex, str, np.generic)):
+        h.update(b'v%s%r;' % (type(value).__name__.encode(), value))
+    elif isinstance(value, (tuple, list)):
+        h.update(b'(%d' % len(value))
+        for v in value:
+            _update(h, v)
+        h.update(b')')
+    elif isinstance(value, dict):
+        h.update(b'{%d' % len(value))
+        for k in sorted(value):
+            _update(h, k)
+            _update(h, value[k])
+        h.update(b'}')
+    elif isinstance(value, MapCache):
+        # A shared evaluation cache does not change the mapping.
+        h.update(b'm')
+    elif isinstance(value, FixedPointMap) and type(value).__module__.startswith('fpmlib.'):
+        # Each built-in mapping is determined by its type and its attributes except the transient ones (see fpmlib.serialization).
+        h.update(b'<%s.%s' % (type(value).__module__.encode(), type(value).__qualname__.encode()))
+        transient = getattr(value, '_TRANSIENT', ())
+        _update(h, {k: v for k, v in vars(value).items() if k not in transient})
+        h.update(b'>')
+    else:
+        raise _Unhashable()
+
+
+def _digest(*values: Any) -> str:
+    h = hashlib.sha1()
+    for v in values:
+        _update(h, v)
+    return h.hexdigest()
+
+
+def _copy_result(res: FindResult, **items: Any) -> FindResult:
+    # A copy of res which shares none of its arrays and dictionaries, so that the callers cannot change the cached entries.
+    return FindResult(
+        res,
+        x=res.x.copy(),
+        residuals=res.residuals.copy(),
+        certificate=None if res.certificate is None else res.certificate.copy(),
+        time=dict(res.time),
+        **items
+    )
+
+
+class _Entry(object):
+    def __init__(self, x0: np.ndarray, result: FindResult, cold: int):
+        self.x0 = x0
+        self.result = result
+        # Estimated number of iterations which the problem takes from a cold start.
+        self.cold = cold
+
+
+class SolutionCache(object):
+    r"""
+    A bounded cache of the results of ``find``, keyed by the fingerprint of the mapping, the initial point, the method, the tolerance and the options.
+    The fingerprint is the hash of the types and parameter arrays of a tree of built-in mappings, e.g., ``Intersection`` of ``Box``, ``Ball`` and ``HalfSpace``; thus, mappings constructed with the same parameters share their entries.
+    Calls with a mapping not defined in ``fpmlib`` or with an option which is not a plain value (e.g., ``callback`` and an iterable of ``steps``) are passed to ``find`` without caching.
+
+    If the same problem is solved from the same initial point again, the stored result is returned without evaluating the mapping.
+    Otherwise, if ``warm_start`` is enabled, the problem is solved from the solution of the cached entry whose initial point is the nearest to the given one.
+    Then, the obtained solution is a fixed point within the tolerance, but it may differ from the one obtained from the given initial point; warm starts are not used for ``Halpern``, whose solution is the nearest fixed point to the initial point.
+    The least recently used entry is evicted if the number of entries exceeds ``maxsize``.
+
+    If ``path`` is given, each entry is also saved as an ``npz`` file in that directory, and the most recent ``maxsize`` entries there are loaded on construction, so that the cache survives restarts of processes.
+
+    :param maxsize: Maximum number of entries kept in memory.
+    :param path: A directory where the entries are stored.
+    :param warm_start: Whether a new problem is started from the solution of the nearest cached one.
+    """
+
+    @property
+    def hits(self) -> int:
+        r"""
+        Number of calls answered from this cache.
+        """
+
+        return self._hits
+
+    @property
+    def warm_starts(self) -> int:
+        r"""
+        Number of calls solved from the solution of a cached entry.
+        """
+
+        return self._warm_starts
+
+    @property
+    def misses(self) -> int:
+        r"""
+        Number of calls solved from the given initial point.
+        """
+
+        return self._misses
+
+    @property
+    def bypasses(self) -> int:
+        r"""
+        Number of calls which cannot be cached.
+        """
+
+        return self._bypasses
+
+    @property
+    def hit_rate(self) -> float:
+        r"""
+        Ratio of ``hits`` to the number of cacheable calls.
+        """
+
+        total = self._hits + self._warm_starts + self._misses
+        return self._hits / total if total else 0.
+
+    @property
+    def saved_iterations(self) -> int:
+        r"""
+        Estimated number of iterations saved by hits and warm starts, compared with cold starts.
+        """
+
+        return self._saved_iterations
+
+    def __init__(self, maxsize: int = 128, path: Optional[str] = None, warm_start: bool = True):
+        if maxsize < 1:
+            raise ValueError('Parameter `maxsize` must be a positive integer.')
+
+        self._maxsize = maxsize
+        self._path = path
+        self._warm_start = warm_start
+        self._entries = OrderedDict()  # type: OrderedDict
+        self._problems = {}  # type: Dict[str, Dict[str, _Entry]]
+        self._hits = self._warm_starts = self._misses = self._bypasses = 0
+        self._saved_iterations = 0
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def find(
+        self,
+        T: NonexpansiveMap,
+        x0: np.ndarray,
+        method: str = 'Krasnoselskii-Mann',
+        tol: float = 1e-7,
+        options: Dict[str, Any] = {},
+        full_output: bool = False
+    ) -> Union[np.ndarray, FindResult]:
+        r"""
+        Find a fixed point of given nonexpansive mapping in the same manner as ``fpmlib.algorithms.find``.
+        The returned ``FindResult`` has an additional item ``cache``, which is one of ``'hit'``, ``'warm'``, ``'miss'`` and ``'bypass'``; ``nit`` and ``nfev`` of a hit are those of the call which stored it.
+        """
+
+        x0 = np.asarray(x0)
+        try:
+            problem = _digest(T, method, tol, options)
+        except _Unhashable:
+            self._bypasses += 1
+            res = find(T, x0, method, tol, options, full_output=True)
+            res.cache = 'bypass'
+            return res if full_output else res.x
+        point = _digest(x0)
+
+        entry = self._entries.get((problem, point))
+        if entry is not None and np.array_equal(entry.x0, x0):
+            self._entries.move_to_end((problem, point))
+            self._hits += 1
+            self._saved_iterations += entry.cold
+            res = _copy_result(entry.result, cache='hit')
+            return res if full_output else res.x
+
+        nearest = self._nearest(problem, x0) if self._warm_start and method not in _NO_WARM_START else None
+        if nearest is None:
+            self._misses += 1
+            res = find(T, x0, method, tol, options, full_output=True)
+            res.cache = 'miss'
+            cold = res.nit
+        else:
+            self._warm_starts += 1
+            res = find(T, nearest.result.x, method, tol, options, full_output=True)
+            res.cache = 'warm'
+            cold = max(nearest.cold, res.nit)
+            self._saved_iterations += cold - res.nit
+
+        self._insert(problem, point, _Entry(x0.copy(), _copy_result(res), cold))
+        return res if full_output else res.x
+
+    def clear(self) -> None:
+        r"""
+        Remove all the entries kept in memory and reset the counters.
+        The files in ``path`` are kept.
+        """
+
+        self._entries.clear()
+        self._problems.clear()
+        self._hits = self._warm_starts = self._misses = self._bypasses = 0
+        self._saved_iterations = 0
+
+    def _nearest(self, problem: str, x0: np.ndarray) -> Optional[_Entry]:
+        candidates = [e for e in self._problems.get(problem, {}).values() if e.x0.shape == x0.shape]
+        if not candidates:
+            return None
+        distances = np.linalg.norm(np.stack([e.x0 for e in candidates]) - x0, axis=1)
+        return candidates[int(np.argmin(distances))]
+
+    def _insert(self, problem: str, point: str, entry: _Entry, save: bool = True) -> None:
+        self._entries[problem, point] = entry
+        self._entries.move_to_end((problem, point))
+        self._problems.setdefault(problem, {})[point] = entry
+        if len(self._entries) > self._maxsize:
+            (p, q), _ = self._entries.popitem(last=False)
+            del self._problems[p][q]
+            if not self._problems[p]:
+                del self._problems[p]
+        if save and self._path is not None:
+            self._save(problem, point, entry)
+
+    def _save(self, problem: str, point: str, entry: _Entry) -> None:
+        res = entry.result
+        filename = os.path.join(self._path, '%s-%s.npz' % (problem, point))
+        # Write into a temporary file and rename it, so that concurrent readers never see a partial file.
+        temporary = filename + '.tmp.npz'
+        certificate = {} if res.certificate is None else {'certificate': res.certificate}
+        np.savez(
+            temporary,
+            x0=entry.x0, x=res.x, residuals=res.residuals, cold=entry.cold,
+            success=res.success, status=res.status, nit=res.nit, nfev=res.nfev, residual=res.residual,
+            **certificate
+        )
+        os.replace(temporary, filename)
+
+    def _load(self) -> None:
+        files = [f for f in os.listdir(self._path) if f.endswith('.npz') and not f.endswith('.tmp.npz')]
+        files = sorted(files, key=lambda f: os.path.getmtime(os.path.join(self._path, f)))[-self._maxsize:]
+        for f in files:
+            problem, point = f[:-len('.npz')].split('-')
+            with np.load(os.path.join(self._path, f)) as data:
+                res = FindResult(
+                    x=data['x'], success=bool(data['success']), status=str(data['status']),
+                    nit=int(data['nit']), nfev=int(data['nfev']), residual=float(data['residual']),
+                    residuals=data['residuals'], certificate=data['certificate'] if 'certificate' in data else None,
+                    time={'setup': 0., 'map': 0., 'update': 0.}
+                )
+                self._insert(problem, point, _Entry(data['x0'], res, int(data['cold'])), save=False)
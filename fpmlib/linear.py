@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Linear mappings
+---------------
+
+A linear mapping :math:`x\\mapsto Mx` is nonexpansive if and only if the spectral norm :math:`\\|M\\|` is not greater than :math:`1`.
+``fpmlib.linear`` module provides linear and affine mappings given by matrices, whose spectral norms are estimated once on construction.
+The following items are automatically loaded when ``fpmlib`` package is imported.
+"""
+
+import hashlib
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+from .typing import NonexpansiveMap
+__all__ = ['LinearMap', 'AffineMap']
+
+_NORM_RTOL = 1e-6
+_NORM_CACHE_SIZE = 64
+# The estimated spectral norms keyed by the digests of matrices, so that a matrix given again is not estimated again.
+_NORMS = OrderedDict()  # type: OrderedDict
+
+
+def _is_sparse(M: Any) -> bool:
+    return hasattr(M, 'tocsr')
+
+
+def _digest(M: Any) -> Optional[str]:
+    # Return the digest of a dense or sparse matrix, or None for an abstract operator.
+    h = hashlib.sha1()
+    if isinstance(M, np.ndarray):
+        arrays = (M,)
+    elif _is_sparse(M):
+        M = M.tocsr()
+        arrays = (M.data, M.indices, M.indptr)
+    else:
+        return None
+    h.update(repr(M.shape).encode())
+    for a in arrays:
+        h.update(a.dtype.str.encode())
+        h.update(np.ascontiguousarray(a).tobytes())
+    return h.hexdigest()
+
+
+def _adjoint(M: Any) -> Callable[[np.ndarray], np.ndarray]:
+    if isinstance(M, np.ndarray) or _is_sparse(M):
+        return M.T.dot
+    if hasattr(M, 'rmatvec'):
+        return M.rmatvec
+    raise ValueError('The spectral norm of an operator without `rmatvec` cannot be estimated; specify `check=False`.')
+
+
+def _spectral_norm(M: Any, iterations: int = 1000) -> float:
+    # The randomized power iteration on M^T M with a fixed seed.
+    forward = M.dot if hasattr(M, 'dot') else M.matvec
+    adjoint = _adjoint(M)
+    v = np.random.RandomState(0).randn(M.shape[1])
+    v /= np.linalg.norm(v)
+    sigma = 0.
+    for _ in range(iterations):
+        w = adjoint(forward(v))
+        norm = np.linalg.norm(w)
+        if norm == 0:
+            return 0.
+        v = w / norm
+        last, sigma = sigma, np.sqrt(norm)
+        if abs(sigma - last) <= 1e-12 * sigma:
+            break
+    return sigma
+
+
+def _cached_spectral_norm(M: Any) -> float:
+    key = _digest(M)
+    if key is not None and key in _NORMS:
+        _NORMS.move_to_end(key)
+        return _NORMS[key]
+    sigma = _spectral_norm(M)
+    if key is not None:
+        _NORMS[key] = sigma
+        if len(_NORMS) > _NORM_CACHE_SIZE:
+            _NORMS.popitem(last=False)
+    return sigma
+
+
+class LinearMap(NonexpansiveMap):
+    r"""
+    The linear mapping :math:`T(x):=Mx` given by a square matrix :math:`M\in\mathbb{R}^{N\times N}` with :math:`\|M\|\le 1`, e.g., a rotation or an averaging operator.
+
+    The matrix can be an ``ndarray``, a SciPy sparse matrix, or an operator such as ``scipy.sparse.linalg.LinearOperator`` providing ``shape``, ``matvec`` (or ``dot``) and ``rmatvec``.
+    The spectral norm is estimated once on construction by the power iteration on :math:`M^\top M` from a random vector, and cached for each matrix with the same entries.
+    Since the power iteration approaches the norm from below, it is accepted up to the relative error :math:`10^{-6}`.
+
+    A dense matrix is applied by a single BLAS call into ``out`` if it is given: matrix-vector multiplication for a vector, and matrix-matrix multiplication for a batch of points given as the rows of a matrix.
+
+    :param M: A square matrix.
+    :param check: If ``False``, the spectral norm is trusted without the estimation.
+    """
+
+    _INPLACE = True
+    _BATCH = True
+
+    @property
+    def ndim(self):
+        return self._M.shape[0]
+
+    @property
+    def norm(self) -> Optional[float]:
+        r"""
+        The estimated spectral norm :math:`\|M\|`, or ``None`` if it has not been estimated.
+        """
+
+        return self._norm
+
+    def __init__(self, M: Any, check: bool = True):
+        if len(M.shape) != 2 or M.shape[0] != M.shape[1]:
+            raise ValueError('Parameter `M` must be a square matrix.')
+        if isinstance(M, np.ndarray):
+            M = np.ascontiguousarray(M, dtype=np.result_type(M.dtype, float))
+        elif _is_sparse(M):
+            M = M.tocsr()
+
+        self._M = M
+        self._norm = None  # type: Optional[float]
+        if check:
+            self._norm = _cached_spectral_norm(M)
+            if self._norm > 1 + _NORM_RTOL:
+                raise ValueError('The spectral norm of `M` is %g, which must not be greater than 1.' % self._norm)
+
+    def _apply(self, x: np.ndarray, out: Optional[np.ndarray]) -> np.ndarray:
+        M = self._M
+        if isinstance(M, np.ndarray):
+            # gemv for a vector, and gemm for the rows of a matrix.
+            if out is x:
+                x[...] = M.dot(x) if len(x.shape) == 1 else np.dot(x, M.T)
+                return x
+            if x.dtype != M.dtype:
+                x = x.astype(M.dtype)
+            if len(x.shape) == 1:
+                return np.dot(M, x, out=out)
+            return np.dot(x, M.T, out=out)
+        if len(x.shape) == 1:
+            y = M.dot(x) if hasattr(M, 'dot') else M.matvec(x)
+        else:
+            y = (M.dot(x.T) if hasattr(M, 'dot') else M.matmat(x.T)).T
+        y = np.asarray(y)
+        if out is None:
+            return y
+        out[...] = y
+        return out
+
+    def __call__(self, x, out=None):
+        r"""
+        Map the given point :math:`x` (or each row of the given matrix) to :math:`T(x)`.
+        If ``out`` is given, the result is written into it; in particular, ``out=x`` updates :math:`x` in place.
+        """
+
+        return self._apply(x, out)
+
+    def __contains__(self, x):
+        if not isinstance(x, np.ndarray) or x.shape != (self.ndim,):
+            return False
+        return np.allclose(self(x), x)
+
+
+class AffineMap(LinearMap):
+    r"""
+    The affine mapping :math:`T(x):=Mx+b` given by a square matrix :math:`M\in\mathbb{R}^{N\times N}` with :math:`\|M\|\le 1` and a vector :math:`b\in\mathbb{R}^N`.
+    Its fixed point set is the set of all solutions of :math:`(I-M)x=b`.
+    The matrix is dealt with in the same manner as ``LinearMap``, and :math:`b` is added into the output buffer without any further memory.
+
+    :param M: A square matrix.
+    :param b: An ``ndarray`` vector.
+    :param check: If ``False``, the spectral norm is trusted without the estimation.
+    """
+
+    _INPLACE = True
+    _BATCH = True
+
+    def __init__(self, M: Any, b: np.ndarray, check: bool = True):
+        super().__init__(M, check)
+        if not isinstance(b, np.ndarray) or b.shape != (self.ndim,):
+            raise ValueError('Parameter `b` must be a vector of the same dimension as `M`.')
+
+        self._b = b.astype(float)
+
+    def __call__(self, x, out=None):
+        r"""
+        Map the given point :math:`x` (or each row of the given matrix) to :math:`T(x)`.
+        If ``out`` is given, the result is written into it; in particular, ``out=x`` updates :math:`x` in place.
+        """
+
+        y = self._apply(x, out)
+        # A LinearOperator may return x itself or a view of it, which must not be changed unless out=x.
+        if out is None and np.shares_memory(y, x):
+            y = np.copy(y)
+        y += self._b
+        return y
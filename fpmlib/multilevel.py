@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Multilevel methods
+------------------
+
+Many fixed point problems are discretized fields on regular grids, on which the iterations from a cold start spend most of their time propagating information across the grid.
+``fpmlib.multilevel`` module provides ``find_multilevel``, which solves the problem on a hierarchy of grids coarsened by the factor :math:`2` along every axis, from the coarsest to the finest, and starts each level from the solution of the coarser one.
+Then, most of the iterations are taken on grids :math:`2^{d(L-1)}` times smaller, where :math:`d` is the number of axes and :math:`L` is the number of levels.
+
+A field on a grid of shape :math:`(n_1,\\ldots,n_d)` is dealt with as an ``ndarray`` of that shape, and it is flattened in C order for the mappings.
+The grid points are vertex-centered: the :math:`i`-th point of a coarse axis corresponds to the :math:`2i`-th point of the fine one, so that a fine axis of :math:`n` points is coarsened into :math:`\\lceil n/2\\rceil` points.
+"""
+
+import numpy as np
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+from .typing import FixedPointMap, NonexpansiveMap
+from .algorithms import find, FindResult
+__all__ = ['restrict', 'prolong', 'find_multilevel']
+
+
+def _restrict_axis(x: np.ndarray, axis: int) -> np.ndarray:
+    x = np.moveaxis(x, axis, -1)
+    y = x[..., ::2].astype(np.result_type(x.dtype, float))
+    # Full weighting (1/4, 1/2, 1/4) at the coarse points with both neighbors, and injection at the others.
+    m = max((x.shape[-1] - 2) // 2, 0)
+    y[..., 1:m + 1] *= 0.5
+    y[..., 1:m + 1] += 0.25 * (x[..., 1:2 * m:2] + x[..., 3:2 * m + 2:2])
+    return np.moveaxis(y, -1, axis)
+
+
+def _prolong_axis(x: np.ndarray, n: int, axis: int) -> np.ndarray:
+    x = np.moveaxis(x, axis, -1)
+    y = np.empty(x.shape[:-1] + (n,), dtype=np.result_type(x.dtype, float))
+    y[..., ::2] = x
+    # Linear interpolation at the fine points between two coarse ones, and the constant extension at the last one.
+    odd = y[..., 1::2]
+    m = min(odd.shape[-1], x.shape[-1] - 1)
+    np.add(x[..., :m], x[..., 1:m + 1], out=odd[..., :m])
+    odd[..., :m] *= 0.5
+    odd[..., m:] = x[..., -1:]
+    return np.moveaxis(y, -1, axis)
+
+
+def restrict(x: np.ndarray) -> np.ndarray:
+    r"""
+    Restrict a field on a regular grid to the grid coarsened by the factor :math:`2` along every axis.
+    Each coarse value is the full-weighting average :math:`(x_{2i-1}+2x_{2i}+x_{2i+1})/4` along each axis, or the value :math:`x_{2i}` itself on the boundary.
+
+    :param x: An ``ndarray`` of the shape of the fine grid.
+    :return: an ``ndarray`` of the shape of the coarse grid.
+    """
+
+    for axis in range(len(x.shape)):
+        x = _restrict_axis(x, axis)
+    return x
+
+
+def prolong(x: np.ndarray, shape: Tuple[int, ...]) -> np.ndarray:
+    r"""
+    Prolong a field on a coarse grid to the fine grid of given shape by the (multi)linear interpolation along every axis.
+
+    :param x: An ``ndarray`` of the shape of the coarse grid.
+    :param shape: The shape of the fine grid, whose coarsened shape must be that of ``x``.
+    :return: an ``ndarray`` of given shape.
+    """
+
+    shape = tuple(shape)
+    if x.shape != tuple((n + 1) // 2 for n in shape):
+        raise ValueError('Parameter `x` must be a field on the grid coarsened from `shape`.')
+    for axis, n in enumerate(shape):
+        x = _prolong_axis(x, n, axis)
+    return x
+
+
+def find_multilevel(
+    maps: Union[Sequence[NonexpansiveMap], Callable[[Tuple[int, ...]], NonexpansiveMap]],
+    x0: np.ndarray,
+    shape: Optional[Tuple[int, ...]] = None,
+    levels: int = 3,
+    method: str = 'Krasnoselskii-Mann',
+    tol: float = 1e-7,
+    options: Dict[str, Any] = {},
+    coarse_tol: Optional[float] = None,
+    restriction: Callable[[np.ndarray], np.ndarray] = restrict,
+    prolongation: Callable[[np.ndarray, Tuple[int, ...]], np.ndarray] = prolong,
+    full_output: bool = False
+) -> Union[np.ndarray, FindResult]:
+    r"""
+    Find a fixed point of the mapping on the finest grid by the coarse-to-fine iteration of ``fpmlib.algorithms.find``.
+    The initial point is restricted down to the coarsest grid, where the first problem is solved; then, the solution on each grid is prolonged up to the next finer grid as its initial point.
+
+    For ``Halpern`` (with any ``steps``, e.g. ``'restarted'``), the anchor of each level is the prolonged solution, and so the obtained fixed point is the nearest one to it, not to ``x0``.
+
+    :param maps:
+        A function which returns the nonexpansive mapping on the grid of given shape, or a sequence of the mappings from the finest grid to the coarsest one.
+        The mapping on each grid maps the fields flattened in C order.
+    :param x0: An initial point on the finest grid, given as a field of the shape of the grid or flattened in C order.
+    :param shape: The shape of the finest grid, which is ``x0.shape`` if ``None`` is specified.
+    :param levels: Number of grids, which is ignored if ``maps`` is a sequence.
+    :param method: The method of ``find`` used on every grid.
+    :param tol: Tolerance on the finest grid.
+    :param options: Options of ``find`` used on every grid, except ``warm_start``, since each grid is started from the coarser one.
+    :param coarse_tol:
+        Tolerance on the coarser grids.
+        If ``None`` is specified, ``tol`` is scaled by :math:`\sqrt{N_l/N}` on the grid of :math:`N_l` points, so that the root-mean-square residual per point is the same on every grid.
+    :param restriction: A function which restricts a field on a grid to the coarser grid, e.g., ``restrict``.
+    :param prolongation: A function which prolongs a field on a coarse grid to the finer grid of given shape, e.g., ``prolong``.
+    :param full_output:
+        If ``True``, the ``FindResult`` of the finest grid is returned, with an additional item ``levels``, the list of the ``FindResult`` of each grid from the coarsest to the finest.
+        Its ``nit``, ``nfev`` and ``time`` are summed over all the grids, so that they count the total work.
+    :return: the obtained fixed point on the finest grid, of the same shape as ``x0``.
+    """
+
+    x0 = np.asarray(x0)
+    shape = x0.shape if shape is None else tuple(shape)
+    if int(np.prod(shape)) != x0.size or (len(x0.shape) != 1 and x0.shape != shape):
+        raise ValueError('Parameter `x0` must be a field on the grid or a vector of the size of the grid.')
+    if isinstance(maps, FixedPointMap):
+        raise ValueError('Parameter `maps` must be a function or a sequence of mappings.')
+    factory = callable(maps)
+    if not factory:
+        maps = list(maps)
+        levels = len(maps)
+    if levels < 1:
+        raise ValueError('At least one level must be given.')
+    if 'warm_start' in options:
+        raise ValueError('Option `warm_start` cannot be given, since each grid is started from the solution of the coarser one.')
+
+    # The initial points restricted down to each grid, from the finest to the coarsest.
+    fields = [x0.reshape(shape)]
+    for _ in range(levels - 1):
+        fields.append(restriction(fields[-1]))
+    shapes = [f.shape for f in fields]
+    if not factory:
+        for T, s in zip(maps, shapes):
+            if T.ndim is not None and T.ndim != int(np.prod(s)):
+                raise ValueError('The mapping of the grid of shape %r has a wrong dimension.' % (s,))
+
+    results = []  # type: List[FindResult]
+    x = fields[-1]
+    for level in reversed(range(levels)):
+        if level < levels - 1:
+            x = prolongation(x, shapes[level])
+        size = int(np.prod(shapes[level]))
+        if level == 0:
+            t = tol
+        else:
+            t = coarse_tol if coarse_tol is not None else tol * np.sqrt(size / x0.size)
+        T = maps(shapes[level]) if factory else maps[level]
+        res = find(T, x.reshape(-1), method, t, options, full_output=True)
+        results.append(res)
+        x = res.x.reshape(shapes[level])
+
+    res = FindResult(
+        results[-1],
+        x=results[-1].x.reshape(x0.shape),
+        nit=sum(r.nit for r in results),
+        nfev=sum(r.nfev for r in results),
+        time={k: sum(r.time[k] for r in results) for k in results[-1].time},
+        levels=results,
+    )
+    return res if full_output else res.x
@@ -7,10 +7,50 @@ The following items are automatically loaded when ``fpmlib`` package is imported
 """
 
 import numpy as np
-from typing import Iterable
-from .typing import FixedPointMap, FirmlyNonexpansiveMap, NonexpansiveMap
-from .contracts import check_firmly_nonexpansive_map, check_nonexpansive_map
-__all__ = ['Intersection', 'Composition']
+import itertools
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+from .typing import FixedPointMap, FirmlyNonexpansiveMap, NonexpansiveMap, MetricProjection
+from .contracts import check_firmly_nonexpansive_map, check_nonexpansive_map, check_fixed_point_map
+__all__ = ['Intersection', 'Composition', 'Relaxation', 'Reflection', 'ProductSpace', 'MapCache']
+
+
+_WRAPPERS = {}  # type: Dict[Tuple[type, type], type]
+
+
+def _wrapper_class(base: type, T: FixedPointMap) -> type:
+    # Return a subclass of base which also belongs to the most specific category of T,
+    # so that a wrapped mapping can be used wherever T can.
+    for category in (MetricProjection, FirmlyNonexpansiveMap, NonexpansiveMap, FixedPointMap):
+        if isinstance(T, category):
+            break
+    if (base, category) not in _WRAPPERS:
+        _WRAPPERS[base, category] = type(base.__name__, (base, category), {'__module__': base.__module__})
+    return _WRAPPERS[base, category]
+
+
+def _averagedness(T: NonexpansiveMap) -> float:
+    if isinstance(T, Relaxation):
+        return T.averagedness
+    if isinstance(T, ProductSpace):
+        # The composition of two 1/2-averaged mappings is 2/3-averaged ([Combettes2004]_).
+        return 2 / 3
+    if isinstance(T, FirmlyNonexpansiveMap):
+        return 0.5
+    return 1.
+
+
+def _declares(T: FixedPointMap, flag: str) -> bool:
+    # Return whether the class defining the __call__ of T sets given capability flag to True:
+    # _INPLACE if it accepts `out` (e.g., out=x updates x in place), and _BATCH if it maps each row of a matrix.
+    # A subclass overriding __call__ must set the flag itself, so that it is not taken for capable by inheritance.
+    for c in type(T).__mro__:
+        if '__call__' in vars(c):
+            return vars(c).get(flag, False)
+    return False
 
 
 class Intersection(NonexpansiveMap):
@@ -23,15 +63,21 @@ class Intersection(NonexpansiveMap):
 
     This construction method is based on Propositions 4.9 and 4.47 in [Bauschke2017]_.
 
+    The mappings can be added and removed in :math:`O(1)` time by ``add`` and ``remove``, e.g., for constraints arriving and expiring online.
+    Then, the previous solution is a good initial point for the updated mapping (see ``warm_start`` of ``find``).
+    Note that the order of the mappings is not kept by ``remove``.
+
     :param maps: A list of nonexpansive mappings.
     """
 
+    _TRANSIENT = ('_positions',)
+
     @property
     def ndim(self):
         return self._ndim
 
     def __init__(self, maps: Iterable[NonexpansiveMap]):
-        maps = tuple(maps)
+        maps = list(maps)
         if len(maps) < 1:
             raise ValueError('At least one mapping must be given.')
         ndim = ([m.ndim for m in maps if isinstance(m, FixedPointMap) and m.ndim] + [None])[0]
@@ -40,10 +86,60 @@ class Intersection(NonexpansiveMap):
         
         self._maps = maps
         self._ndim = ndim
+        self._init_transient()
+
+    def _init_transient(self) -> None:
+        # The positions of each mapping in self._maps, keyed by its identity.
+        self._positions = {}  # type: Dict[int, List[int]]
+        for i, m in enumerate(self._maps):
+            self._positions.setdefault(id(m), []).append(i)
+
+    def __len__(self) -> int:
+        return len(self._maps)
+
+    def add(self, T: NonexpansiveMap) -> None:
+        r"""
+        Add a nonexpansive mapping to this intersection.
+
+        :param T: A nonexpansive mapping.
+        """
+
+        check_nonexpansive_map(T, self._ndim)
+        self._positions.setdefault(id(T), []).append(len(self._maps))
+        self._maps.append(T)
+        if self._ndim is None and isinstance(T, FixedPointMap):
+            self._ndim = T.ndim
+
+    def remove(self, T: NonexpansiveMap) -> None:
+        r"""
+        Remove a nonexpansive mapping from this intersection.
+        If it has been given several times, one of them is removed.
+
+        :param T: A nonexpansive mapping contained in this intersection.
+        """
+
+        positions = self._positions.get(id(T))
+        if positions is None:
+            raise ValueError('The given mapping is not contained.')
+        if len(self._maps) == 1:
+            raise ValueError('At least one mapping must be kept.')
+        # Move the last mapping into the vacated position.
+        i = positions.pop()
+        if not positions:
+            del self._positions[id(T)]
+        last = self._maps.pop()
+        if i < len(self._maps):
+            self._maps[i] = last
+            moved = self._positions[id(last)]
+            moved[moved.index(len(self._maps))] = i
 
     def __call__(self, x):
         return np.average([m(x) for m in self._maps], axis=0)
 
+    def evaluate(self, x, accuracy=None):
+        # The error of the average is bounded by the average of the errors.
+        return np.average([m.evaluate(x, accuracy) for m in self._maps], axis=0)
+
     def __contains__(self, x):
         return all(x in m for m in self._maps)
 
@@ -82,8 +178,477 @@ class Composition(NonexpansiveMap):
     def __call__(self, x):
         out = x
         for m in reversed(self._maps):
-            out = m(out)
+            # Mappings accepting `out` update the buffer returned by the preceding element in place instead of allocating another one;
+            # the input x itself is never written.
+            if out is not x and _declares(m, '_INPLACE') and out.dtype.kind in 'fc':
+                out = m(out, out=out)
+            else:
+                out = m(out)
+        return out
+
+    def map_stream(self, points: Iterable[np.ndarray], maxsize: int = 4, batch_size: Optional[int] = None) -> Iterator[np.ndarray]:
+        r"""
+        Map each point of the given stream, yielding the results in the same order.
+        Each element of this composition runs in its own thread, connected to the next one by a queue of ``maxsize`` items, so that the elements work on successive points at once.
+        A full queue blocks the preceding thread, so that at most about ``maxsize`` items wait between two elements however fast the stream is.
+        The throughput is limited by the slowest element, rather than the sum of all of them, as long as the elements release the GIL, e.g., in NumPy operations on large arrays.
+
+        If ``batch_size`` is specified, that number of successive points are stacked as the rows of a matrix, which is passed at once to each element mapping every row of a matrix (e.g., ``LinearMap``, ``SecondOrderCone`` and the proximal mappings); the other elements map the rows one by one.
+        If an element raises an exception, it is raised from this generator.
+
+        :param points: An iterable of points.
+        :param maxsize: Maximum number of items waiting in each queue.
+        :param batch_size: Number of points mapped at once by each element.
+        """
+
+        if maxsize < 1:
+            raise ValueError('Parameter `maxsize` must be a positive integer.')
+        if batch_size is not None and batch_size < 1:
+            raise ValueError('Parameter `batch_size` must be a positive integer.')
+        return self._map_stream(points, maxsize, batch_size)
+
+    def _map_stream(self, points: Iterable[np.ndarray], maxsize: int, batch_size: Optional[int]) -> Iterator[np.ndarray]:
+        stop = threading.Event()
+        queues = [queue.Queue(maxsize) for _ in range(len(self._maps) + 1)]
+
+        def feed() -> None:
+            try:
+                if batch_size is None:
+                    for x in iterator:
+                        if not _put(queues[0], x, stop):
+                            return
+                else:
+                    for batch in iter(lambda: list(itertools.islice(iterator, batch_size)), []):
+                        if not _put(queues[0], np.stack(batch), stop):
+                            return
+            except BaseException as e:
+                _put(queues[0], _Failure(e), stop)
+                return
+            _put(queues[0], _END, stop)
+
+        def work(T: FixedPointMap, source: queue.Queue, sink: queue.Queue) -> None:
+            batched = _declares(T, '_BATCH')
+            while True:
+                item = _get(source, stop)
+                if item is None:
+                    return
+                if item is not _END and not isinstance(item, _Failure):
+                    try:
+                        item = T(item) if batch_size is None or batched else np.stack([T(x) for x in item])
+                    except BaseException as e:
+                        item = _Failure(e)
+                if not _put(sink, item, stop) or item is _END or isinstance(item, _Failure):
+                    return
+
+        iterator = iter(points)
+        threads = [threading.Thread(target=feed, name=_STREAM_THREAD, daemon=True)]
+        for i, T in enumerate(reversed(self._maps)):
+            threads.append(threading.Thread(target=work, args=(T, queues[i], queues[i + 1]), name=_STREAM_THREAD, daemon=True))
+        for t in threads:
+            t.start()
+        try:
+            while True:
+                item = queues[-1].get()
+                if item is _END:
+                    break
+                if isinstance(item, _Failure):
+                    raise item.error
+                if batch_size is None:
+                    yield item
+                else:
+                    yield from item
+        finally:
+            # Release the threads blocked on full queues if the consumer stops early.
+            stop.set()
+            for t in threads:
+                t.join()
+
+    def evaluate(self, x, accuracy=None):
+        # Since each element is nonexpansive, the errors of the elements are accumulated without amplification.
+        if accuracy is not None:
+            accuracy /= len(self._maps)
+        out = x
+        for m in reversed(self._maps):
+            out = m.evaluate(out, accuracy)
         return out
     
     def __contains__(self, x):
         return all(x in m for m in self._maps)
+
+
+_END = object()
+_POLL_INTERVAL = 0.05
+_STREAM_THREAD = 'Composition.map_stream'
+
+
+class _Failure(object):
+    # An exception raised in a thread of ``Composition.map_stream``, passed downstream to the consumer.
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def _put(q: queue.Queue, item: Any, stop: threading.Event) -> bool:
+    # Put the item unless the pipeline is stopped; return whether it is put.
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=_POLL_INTERVAL)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _get(q: queue.Queue, stop: threading.Event) -> Any:
+    # Get an item unless the pipeline is stopped; return None if it is stopped.
+    while not stop.is_set():
+        try:
+            return q.get(timeout=_POLL_INTERVAL)
+        except queue.Empty:
+            pass
+    return None
+
+
+class Relaxation(NonexpansiveMap):
+    r"""
+    The relaxation of a given nonexpansive mapping :math:`T` with parameter :math:`\lambda>0`, that is
+
+    .. math::
+        T_\lambda(x):=x+\lambda(T(x)-x)=(1-\lambda)x+\lambda T(x).
+
+    If :math:`T` is :math:`\alpha`-averaged, :math:`T_\lambda` is :math:`\lambda\alpha`-averaged, and hence it is nonexpansive for any :math:`\lambda\in(0,1/\alpha]` and :math:`\mathrm{Fix}(T_\lambda)=\mathrm{Fix}(T)` ([Bauschke2017]_, Proposition 4.40).
+    Here, each ``FirmlyNonexpansiveMap`` is treated as :math:`1/2`-averaged and each other ``NonexpansiveMap`` as :math:`1`-averaged.
+    If :math:`\lambda\alpha\le 1/2`, the generated mapping is an instance of ``FirmlyNonexpansiveMap``, so that it can be used as any element of ``Composition``.
+
+    The relaxation of a relaxation is collapsed into a single one, i.e., :math:`(T_\lambda)_\mu=T_{\lambda\mu}`.
+    The result is written into the buffer returned by :math:`T`, so no further memory is allocated.
+
+    :param T: A nonexpansive mapping.
+    :param lam: A ``float`` value which expresses the relaxation parameter :math:`\lambda`.
+    """
+
+    @property
+    def ndim(self):
+        return self._T.ndim
+
+    @property
+    def averagedness(self) -> float:
+        r"""
+        The constant :math:`\lambda\alpha` such that this mapping is :math:`\lambda\alpha`-averaged.
+        """
+
+        return self._lam * _averagedness(self._T)
+
+    def __new__(cls, T: NonexpansiveMap, lam: float = 0.5):
+        if cls is Relaxation and isinstance(T, NonexpansiveMap) and 0 < lam * _averagedness(T) <= 0.5:
+            cls = _FirmlyNonexpansiveRelaxation
+        return super().__new__(cls)
+
+    def __getnewargs__(self):
+        return self._T, self._lam
+
+    def __init__(self, T: NonexpansiveMap, lam: float = 0.5):
+        check_nonexpansive_map(T)
+        if not 0 < lam * _averagedness(T) <= 1:
+            raise ValueError('Parameter `lam` must be between 0 and %g.' % (1 / _averagedness(T)))
+        if isinstance(T, Relaxation):
+            T, lam = T._T, lam * T._lam
+
+        self._T = T
+        self._lam = lam
+
+    def __call__(self, x):
+        return self._relax(x, self._T(x))
+
+    def evaluate(self, x, accuracy=None):
+        return self._relax(x, self._T.evaluate(x, None if accuracy is None else accuracy / self._lam))
+
+    def _relax(self, x: np.ndarray, u: np.ndarray) -> np.ndarray:
+        if u is x or u.dtype.kind not in 'fc':
+            u = u.astype(np.result_type(u.dtype, float))
+        # u = x + lam * (u - x)
+        u -= x
+        u *= self._lam
+        u += x
+        return u
+
+    def __contains__(self, x):
+        return x in self._T
+
+
+class _FirmlyNonexpansiveRelaxation(Relaxation, FirmlyNonexpansiveMap):
+    pass
+
+
+class Reflection(Relaxation):
+    r"""
+    The reflection :math:`2T-\mathrm{Id}` of a given firmly nonexpansive mapping :math:`T`, e.g., the reflector :math:`2P_C-\mathrm{Id}` for a metric projection :math:`P_C`.
+    This is the relaxation of :math:`T` with :math:`\lambda=2`, and it is nonexpansive ([Bauschke2017]_, Proposition 4.4).
+
+    :param T: A firmly nonexpansive mapping.
+    """
+
+    def __init__(self, T: FirmlyNonexpansiveMap):
+        check_firmly_nonexpansive_map(T)
+        super().__init__(T, 2.)
+
+
+class ProductSpace(NonexpansiveMap):
+    r"""
+    A nonexpansive mapping on the product space :math:`H^K` whose fixed points are the copies of the points in the intersection of the fixed point sets of given firmly nonexpansive mappings ([Pierra1984]_).
+    For given :math:`T_i\ (i=1,2,\ldots,K)` on :math:`H=\mathbb{R}^N` and for any :math:`\mathbf{x}=(x_1,x_2,\ldots,x_K)\in H^K`, it computes
+
+    .. math::
+        T(\mathbf{x}):=P_D(T_1(x_1),T_2(x_2),\ldots,T_K(x_K)),
+
+    where :math:`P_D` is the metric projection onto the diagonal subspace :math:`D:=\{(x,x,\ldots,x):x\in H\}`, which replaces each copy with their average.
+    Since :math:`T` is the composition of two firmly nonexpansive mappings, it is :math:`2/3`-averaged, and :math:`\mathrm{Fix}(T)=\{(x,x,\ldots,x):x\in\bigcap_{i=1}^K\mathrm{Fix}(T_i)\}` if the intersection is nonempty.
+
+    A point of :math:`H^K` is an ``ndarray`` vector of :math:`KN` elements, i.e., the rows of a contiguous :math:`K\times N` array flattened in C order; ``embed`` and ``component`` convert points between :math:`H` and :math:`H^K`.
+    Unlike ``Intersection``, each mapping is applied to its own copy, and so the copies can be mapped in parallel: if ``threads`` is specified, the rows are divided into that number of contiguous blocks, each of which is mapped by its own thread.
+    Since :math:`\|(u,\ldots,u)-(x,\ldots,x)\|^2=K\|u-x\|^2`, the nearest point of :math:`\mathrm{Fix}(T)` to ``embed(u)`` is the copy of the nearest point of :math:`\bigcap_{i=1}^K\mathrm{Fix}(T_i)` to :math:`u`.
+    Thus, for metric projections :math:`T_i=P_{C_i}`, ``Halpern`` started at ``embed(u)`` finds the exact projection of :math:`u` onto :math:`\bigcap_{i=1}^K C_i`.
+
+    :param maps: A list of firmly nonexpansive mappings.
+    :param ndim: Number of vector dimensions :math:`N` of :math:`H`, which can be omitted if one of ``maps`` specifies it.
+    :param threads: Number of threads mapping the copies, or ``None`` to map them in the calling thread.
+    """
+
+    _TRANSIENT = ('_executor',)
+
+    @property
+    def ndim(self):
+        return self._K * self._N
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        r"""
+        The shape :math:`(K,N)` of the points of :math:`H^K` as arrays.
+        """
+
+        return self._K, self._N
+
+    def __init__(self, maps: Iterable[FirmlyNonexpansiveMap], ndim: Optional[int] = None, threads: Optional[int] = None):
+        maps = list(maps)
+        if len(maps) < 1:
+            raise ValueError('At least one mapping must be given.')
+        if ndim is None:
+            ndim = ([m.ndim for m in maps if isinstance(m, FixedPointMap) and m.ndim] + [None])[0]
+        if ndim is None:
+            raise ValueError('Parameter `ndim` must be specified if no mapping specifies it.')
+        for m in maps:
+            check_firmly_nonexpansive_map(m, ndim)
+        if threads is not None and threads < 1:
+            raise ValueError('Parameter `threads` must be a positive integer.')
+
+        self._maps = maps
+        self._K = len(maps)
+        self._N = ndim
+        self._threads = threads
+        self._init_transient()
+
+    def _init_transient(self) -> None:
+        # The pool of threads, which is created on the first call.
+        self._executor = None  # type: Optional[ThreadPoolExecutor]
+
+    def close(self) -> None:
+        r"""
+        Shut down the threads mapping the copies, which are created again if this mapping is called after that.
+        This mapping can also be used as a context manager, which calls ``close`` on exit.
+        """
+
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self) -> 'ProductSpace':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def embed(self, x: np.ndarray) -> np.ndarray:
+        r"""
+        Return the point :math:`(x,x,\ldots,x)\in D` for given :math:`x\in H`.
+        """
+
+        if x.shape != (self._N,):
+            raise ValueError('Parameter `x` must be a vector of %d dimensions.' % self._N)
+        return np.tile(x.astype(np.result_type(x.dtype, float)), self._K)
+
+    def component(self, x: np.ndarray) -> np.ndarray:
+        r"""
+        Return the average :math:`\frac{1}{K}\sum_{i=1}^K x_i\in H` of the copies of given :math:`\mathbf{x}\in H^K`, i.e., the point :math:`x` such that :math:`P_D(\mathbf{x})=(x,x,\ldots,x)`.
+        """
+
+        return x.reshape(self.shape).mean(axis=0)
+
+    def _map(self, x: np.ndarray, apply: Any) -> np.ndarray:
+        X = x.reshape(self.shape)
+        Y = np.empty(self.shape, dtype=np.result_type(x.dtype, float))
+
+        def work(rows: range) -> None:
+            for i in rows:
+                Y[i] = apply(self._maps[i], X[i])
+
+        if self._threads is None or self._threads == 1:
+            work(range(self._K))
+        else:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self._threads)
+            bounds = np.linspace(0, self._K, min(self._threads, self._K) + 1).astype(int)
+            for f in [self._executor.submit(work, range(a, b)) for a, b in zip(bounds[:-1], bounds[1:])]:
+                f.result()
+        Y[...] = Y.mean(axis=0)
+        return Y.reshape(-1)
+
+    def __call__(self, x):
+        return self._map(x, lambda m, v: m(v))
+
+    def evaluate(self, x, accuracy=None):
+        # P_D is nonexpansive, and so the error is at most the norm of the errors of the K copies.
+        if accuracy is not None:
+            accuracy /= np.sqrt(self._K)
+        return self._map(x, lambda m, v: m.evaluate(v, accuracy))
+
+    def __contains__(self, x):
+        if not isinstance(x, np.ndarray) or x.shape != (self.ndim,):
+            return False
+        X = x.reshape(self.shape)
+        return bool((X == X[0]).all()) and all(X[0] in m for m in self._maps)
+
+
+class MapCache(object):
+    r"""
+    A bounded cache of evaluations of mappings shared among several branches of a tree of ``Intersection`` and ``Composition``.
+    If the same mapping appears in several branches, each of them evaluates it on the same input, e.g., each element of ``Intersection`` is given the same point.
+    Wrapping such a mapping with ``share`` and the whole tree with ``root``, the shared mapping is evaluated only once per evaluation of the tree.
+
+    Each entry is keyed by the identity of a shared mapping and the identity of its input buffer, and all the entries are dropped at the start of every evaluation of a ``root`` mapping; thus, inputs updated in place between evaluations never hit stale entries, and the entries of past evaluations do not keep their arrays alive.
+    Outside of the evaluation of a ``root`` mapping, shared mappings are evaluated without caching.
+    The least recently used entry is evicted if the number of entries exceeds ``maxsize``.
+
+    :param maxsize: Maximum number of cached evaluations.
+    """
+
+    @property
+    def hits(self) -> int:
+        r"""
+        Number of evaluations answered from this cache.
+        """
+
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        r"""
+        Number of evaluations of shared mappings actually computed within the evaluation of a ``root`` mapping.
+        """
+
+        return self._misses
+
+    def __init__(self, maxsize: int = 128):
+        if maxsize < 1:
+            raise ValueError('Parameter `maxsize` must be a positive integer.')
+
+        self._maxsize = maxsize
+        self._entries = OrderedDict()  # type: OrderedDict
+        self._depth = 0
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def share(self, T: FixedPointMap) -> FixedPointMap:
+        r"""
+        Wrap a mapping so that its evaluations are cached in this cache.
+        The returned mapping belongs to the same category (e.g., ``MetricProjection``) as the given one.
+
+        :param T: A mapping used in several branches.
+        """
+
+        check_fixed_point_map(T)
+        return _wrapper_class(_SharedMap, T)(T, self)
+
+    def root(self, T: FixedPointMap) -> FixedPointMap:
+        r"""
+        Wrap the outermost mapping so that each of its evaluations starts with an empty cache.
+        The returned mapping belongs to the same category (e.g., ``NonexpansiveMap``) as the given one.
+
+        :param T: A mapping containing mappings wrapped with ``share``.
+        """
+
+        check_fixed_point_map(T)
+        return _wrapper_class(_RootMap, T)(T, self)
+
+    def clear(self) -> None:
+        r"""
+        Remove all the entries and reset the counters.
+        """
+
+        self._entries.clear()
+        self._hits = self._misses = 0
+
+    def _evaluate(self, T: FixedPointMap, x: np.ndarray, accuracy: Optional[float] = None) -> np.ndarray:
+        if self._depth == 0:
+            return T(x) if accuracy is None else T.evaluate(x, accuracy)
+        key = (id(T), id(x))
+        entry = self._entries.get(key)
+        # An entry is reused only if it is at least as accurate as required.
+        if entry is not None and entry[0] is x and (entry[2] is None or accuracy is not None and entry[2] <= accuracy):
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1].copy()
+
+        y = T(x) if accuracy is None else T.evaluate(x, accuracy)
+        self._misses += 1
+        # The input is kept alive with the entry so that its identity is not reused.
+        self._entries[key] = (x, y, accuracy)
+        if len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+        return y.copy()
+
+
+class _SharedMap(FixedPointMap):
+    @property
+    def ndim(self):
+        return self._T.ndim
+
+    def __init__(self, T: FixedPointMap, cache: MapCache):
+        self._T = T
+        self._cache = cache
+
+    def __call__(self, x):
+        return self._cache._evaluate(self._T, x)
+
+    def evaluate(self, x, accuracy=None):
+        return self._cache._evaluate(self._T, x, accuracy)
+
+    def __contains__(self, x):
+        return x in self._T
+
+
+class _RootMap(FixedPointMap):
+    @property
+    def ndim(self):
+        return self._T.ndim
+
+    def __init__(self, T: FixedPointMap, cache: MapCache):
+        self._T = T
+        self._cache = cache
+
+    def __call__(self, x):
+        return self.evaluate(x)
+
+    def evaluate(self, x, accuracy=None):
+        cache = self._cache
+        if cache._depth == 0:
+            cache._entries.clear()
+        cache._depth += 1
+        try:
+            return self._T(x) if accuracy is None else self._T.evaluate(x, accuracy)
+        finally:
+            cache._depth -= 1
+
+    def __contains__(self, x):
+        return x in self._T
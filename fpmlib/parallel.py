@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Parallel execution
+------------------
+
+``fpmlib.parallel`` module provides the data-parallel execution of the Krasnosel'skii-Mann algorithm, where the iterate is partitioned into contiguous blocks of coordinates and each block is updated by its own worker.
+Each worker evaluates the given mapping only on its block through the ``SeparableMap`` interface, exchanging the partial sums needed for global reductions (e.g., the inner product of ``HalfSpace`` or the norm of ``Ball``) through a ``Communicator``.
+
+The workers are independent of how the partial sums are exchanged.
+``SharedMemoryCommunicator`` connects processes on one machine; a transport over sockets can connect processes on several machines by implementing ``Communicator``, and then each of them runs ``krasnoselskii_mann_block`` on its own block.
+"""
+
+import numpy as np
+import itertools
+import multiprocessing
+from queue import Empty
+from abc import ABC, abstractmethod
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+from .typing import FixedPointMap, SeparableMap
+from .nonexpansive import Intersection, Composition
+__all__ = ['Communicator', 'SharedMemoryCommunicator', 'krasnoselskii_mann_block']
+
+_POLL_INTERVAL = 0.1
+
+
+class Communicator(ABC):
+    r"""
+    An abstract base class that expresses a group of workers, each of which owns a block of coordinates.
+    """
+
+    @property
+    @abstractmethod
+    def rank(self) -> int:
+        r"""
+        Index of this worker in the group.
+        """
+
+        raise NotImplementedError()
+
+    @property
+    @abstractmethod
+    def size(self) -> int:
+        r"""
+        Number of workers in the group.
+        """
+
+        raise NotImplementedError()
+
+    @abstractmethod
+    def allreduce(self, x: np.ndarray) -> np.ndarray:
+        r"""
+        Return the sum of the given vectors over all the workers.
+        Every worker must call this method with a vector of the same length, and every worker obtains the same result.
+        """
+
+        raise NotImplementedError()
+
+
+class SharedMemoryCommunicator(Communicator):
+    r"""
+    A ``Communicator`` connecting processes on one machine through a shared buffer and a barrier.
+    Each ``allreduce`` costs two barrier synchronizations.
+
+    :param rank: Index of this worker in the group.
+    :param buffer: A shared ``multiprocessing.RawArray`` of ``float`` values whose length is ``size * width``.
+    :param barrier: A ``multiprocessing.Barrier`` for ``size`` parties.
+    :param size: Number of workers in the group.
+    :param width: Maximum length of vectors given to ``allreduce``.
+    """
+
+    @property
+    def rank(self):
+        return self._rank
+
+    @property
+    def size(self):
+        return self._size
+
+    def __init__(self, rank: int, buffer: Any, barrier: Any, size: int, width: int):
+        self._rank = rank
+        self._size = size
+        self._buffer = np.frombuffer(buffer, dtype=float).reshape(size, width)
+        self._barrier = barrier
+
+    def allreduce(self, x):
+        n = x.shape[0]
+        self._buffer[self._rank, :n] = x
+        self._barrier.wait()
+        total = self._buffer[:, :n].sum(axis=0)
+        self._barrier.wait()
+        return total
+
+
+class _Average(SeparableMap):
+    # The blockwise form of Intersection, i.e., the barycenter of separable mappings.
+
+    @property
+    def ndim(self):
+        return None
+
+    @property
+    def reduce_size(self):
+        return sum(m.reduce_size for m in self._maps)
+
+    def __init__(self, maps: Sequence[SeparableMap]):
+        self._maps = maps
+
+    def block_reduce(self, x, index):
+        return np.concatenate([m.block_reduce(x, index) for m in self._maps])
+
+    def block_apply(self, x, index, total):
+        out, offset = None, 0
+        for m in self._maps:
+            y = m.block_apply(x, index, total[offset:offset + m.reduce_size])
+            offset += m.reduce_size
+            if out is None:
+                out = y.astype(float)
+            else:
+                out += y
+        out /= len(self._maps)
+        return out
+
+    def __call__(self, x):
+        out = self._maps[0](x).astype(float)
+        for m in self._maps[1:]:
+            out += m(x)
+        out /= len(self._maps)
+        return out
+
+    def __contains__(self, x):
+        return all(x in m for m in self._maps)
+
+
+def _stages(T: FixedPointMap) -> List[SeparableMap]:
+    # Return the separable mappings whose composition, applied from the first, coincides with T.
+    if isinstance(T, Composition):
+        return [s for m in reversed(T._maps) for s in _stages(m)]
+    if isinstance(T, Intersection) and all(isinstance(m, SeparableMap) for m in T._maps):
+        return [_Average(T._maps)]
+    if isinstance(T, SeparableMap):
+        return [T]
+    raise ValueError('%s cannot be evaluated blockwise.' % type(T).__name__)
+
+
+def krasnoselskii_mann_block(
+    comm: Communicator,
+    T: FixedPointMap,
+    x: np.ndarray,
+    index: slice,
+    tol: float,
+    maxiter: Optional[int] = None,
+    steps: Optional[Iterable[float]] = None
+) -> Tuple[int, np.ndarray]:
+    r"""
+    Run the Krasnosel'skii-Mann algorithm as a worker owning the block :math:`x_I`, updating ``x`` in place.
+    Each worker of ``comm`` must call this function with the same arguments except for its own block.
+
+    :param comm: A group of workers.
+    :param T: A mapping composed of ``SeparableMap`` instances by ``Intersection`` and ``Composition``.
+    :param x: The block :math:`x_I` of an initial point, which will be overwritten with the block of the obtained solution.
+    :param index: A ``slice`` expressing :math:`I`.
+    :param tol: Error tolerance on the residual :math:`\|x-T(x)\|` of the whole point.
+    :param maxiter: Maximum number of iterations.
+    :param steps: A step size sequence, which defaults to the constant sequence :math:`0.5`.
+    :return: the number of iterations and the residual computed at each iteration.
+    """
+
+    stages = _stages(T)
+    if steps is None:
+        steps = itertools.repeat(0.5)
+    if maxiter is not None:
+        steps = itertools.islice(steps, maxiter)
+
+    residuals = []
+    nit = 0
+    for step in steps:
+        y = x
+        for stage in stages:
+            total = comm.allreduce(stage.block_reduce(y, index)) if stage.reduce_size else np.empty(0)
+            y = stage.block_apply(y, index, total)
+        y -= x
+        rnorm = np.sqrt(comm.allreduce(np.array([np.inner(y, y)]))[0])
+        residuals.append(rnorm)
+        if rnorm < tol:
+            break
+        y *= step
+        x += y
+        nit += 1
+
+    return nit, np.array(residuals)
+
+
+def _worker(rank, size, x, width, buffer, barrier, queue, T, tol, maxiter, steps):
+    try:
+        bounds = np.linspace(0, len(x), size + 1).astype(int)
+        index = slice(int(bounds[rank]), int(bounds[rank + 1]))
+        comm = SharedMemoryCommunicator(rank, buffer, barrier, size, width)
+        block = np.frombuffer(x, dtype=float)[index]
+        nit, residuals = krasnoselskii_mann_block(comm, T, block, index, tol, maxiter, steps)
+        queue.put((rank, None, nit, residuals if rank == 0 else None))
+    except BaseException as e:
+        barrier.abort()
+        queue.put((rank, '%s: %s' % (type(e).__name__, e), 0, None))
+
+
+def _find_partitioned(
+    T: FixedPointMap,
+    x0: np.ndarray,
+    tol: float,
+    processes: int,
+    maxiter: Optional[int] = None,
+    steps: Optional[Iterable[float]] = None
+) -> Tuple[np.ndarray, int, np.ndarray]:
+    stages = _stages(T)
+    width = max([s.reduce_size for s in stages] + [1])
+    processes = max(1, min(processes, x0.shape[0]))
+    # Forking spares pickling the mapping and the step size sequence.
+    methods = multiprocessing.get_all_start_methods()
+    ctx = multiprocessing.get_context('fork' if 'fork' in methods else None)
+
+    x = ctx.RawArray('d', x0.shape[0])
+    np.frombuffer(x, dtype=float)[:] = x0
+    buffer = ctx.RawArray('d', processes * width)
+    barrier = ctx.Barrier(processes)
+    queue = ctx.Queue()
+    workers = [
+        ctx.Process(target=_worker, args=(rank, processes, x, width, buffer, barrier, queue, T, tol, maxiter, steps))
+        for rank in range(processes)
+    ]
+    for w in workers:
+        w.start()
+    results = []  # type: List[Tuple[int, Optional[str], int, Optional[np.ndarray]]]
+    while len(results) < len(workers):
+        try:
+            results.append(queue.get(timeout=_POLL_INTERVAL))
+        except Empty:
+            # A worker killed before posting its result never posts it, and the others wait for it at the barrier.
+            codes = [w.exitcode for w in workers if w.exitcode]
+            if codes:
+                for w in workers:
+                    w.terminate()
+                    w.join()
+                raise RuntimeError('A worker died with exit code %d.' % codes[0])
+    for w in workers:
+        w.join()
+
+    # The other workers fail with BrokenBarrierError after the first failure.
+    errors = sorted((error for _, error, _, _ in results if error is not None), key=lambda e: e.startswith('BrokenBarrierError'))
+    if errors:
+        raise RuntimeError('A worker failed with %s' % errors[0])
+    _, _, nit, residuals = next(r for r in results if r[0] == 0)
+    return np.frombuffer(x, dtype=float).copy(), nit, residuals
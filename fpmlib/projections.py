@@ -9,12 +9,48 @@ The following items are automatically loaded when ``fpmlib`` package is imported
 """
 
 import numpy as np
-from typing import Optional, Union
-from .typing import MetricProjection
-__all__ = ['Box', 'HalfSpace', 'Ball']
-
-
-class Box(MetricProjection):
+import threading
+import warnings
+from collections import OrderedDict
+from typing import Any, Optional, Sequence, Tuple, Union
+from .typing import MetricProjection, SeparableMap
+__all__ = ['Box', 'HalfSpace', 'Ball', 'Ellipsoid', 'Polyhedron', 'SecondOrderCone', 'PSDCone']
+
+_NEWTON_MAXITER = 100
+_ACTIVE_SET_RTOL = 1e-12
+_ACTIVE_SET_MAXITER_FACTOR = 3
+_ACTIVE_SET_CACHE_SIZE = 16
+_ACTIVE_SET_MAXCOND = 1e10
+
+
+def _as_sparse(v: Any) -> Optional[Tuple[np.ndarray, np.ndarray, Optional[int]]]:
+    # Return (indices, values, ndim) if v is given as a pair of index and value arrays
+    # or as a SciPy sparse row; otherwise, return None.
+    if isinstance(v, tuple) and len(v) == 2:
+        idx, val = np.asarray(v[0]), np.asarray(v[1], dtype=float)
+        if len(idx.shape) != 1 or idx.shape != val.shape:
+            raise ValueError('Indices and values must be vectors of the same length.')
+        if idx.size and idx.min() < 0:
+            raise ValueError('Indices must be nonnegative.')
+        idx, inv = np.unique(idx.astype(np.intp), return_inverse=True)
+        return idx, np.bincount(inv, weights=val, minlength=idx.size), None
+    if hasattr(v, 'tocoo'):
+        if len(v.shape) != 1 and (len(v.shape) != 2 or v.shape[0] != 1):
+            raise ValueError('A sparse parameter must be a row vector.')
+        coo = v.tocoo()
+        coo.sum_duplicates()
+        idx = coo.coords[-1] if hasattr(coo, 'coords') else coo.col
+        return idx.astype(np.intp), coo.data.astype(float), v.shape[-1]
+    return None
+
+
+def _block(idx: np.ndarray, index: slice) -> Tuple[slice, np.ndarray]:
+    # Return the range of the sorted indices falling into the given block, and their offsets in the block.
+    a, b = np.searchsorted(idx, [index.start, index.stop])
+    return slice(a, b), idx[a:b] - index.start
+
+
+class Box(MetricProjection, SeparableMap):
     r"""
     The metric projection onto the orthotope defined with its lower and upper bound of each dimension.
     For given :math:`(\mathbf{lb}_i)_{i=1}^N\in\mathbb{R}^N` and :math:`(\mathbf{ub}_i)_{i=1}^N\in\mathbb{R}^N``, the fixed point set of the created mapping :math:`T` is
@@ -27,13 +63,17 @@ class Box(MetricProjection):
     :param lb:
         An ``ndarray`` vector whose element expresses the lower bound corresponding to each dimension.
         If a ``float`` value is specified, it is dealt with as the vector whose all elements are set as the given value.
+        If a pair ``(indices, values)`` of vectors is specified, only the dimensions listed in ``indices`` are bounded below, and the projection touches only them.
         If ``None`` is specified, the fixed point set of the created mapping is unbounded below.
     :param ub:
         An ``ndarray`` vector whose element expresses the upper bound corresponding to each dimension.
         If a ``float`` value is specified, it is dealt with as the vector whose all elements are set as the given value.
+        If a pair ``(indices, values)`` of vectors is specified, only the dimensions listed in ``indices`` are bounded above, and the projection touches only them.
         If ``None`` is specified, the fixed point set of the created mapping is unbounded above.
     """
 
+    _INPLACE = True
+
     @property
     def ndim(self):
         if isinstance(self._lb, np.ndarray):
@@ -42,38 +82,90 @@ class Box(MetricProjection):
             return self._ub.shape[0]
         return None
 
-    def __init__(self, lb: Optional[Union[np.ndarray, float]] = None, ub: Optional[Union[np.ndarray, float]] = None):
+    def __init__(self, lb: Optional[Union[np.ndarray, float, Tuple[np.ndarray, np.ndarray]]] = None, ub: Optional[Union[np.ndarray, float, Tuple[np.ndarray, np.ndarray]]] = None):
         if isinstance(lb, np.ndarray) and isinstance(ub, np.ndarray) and lb.shape != ub.shape:
             raise ValueError('Vectors lb and ub must have the same number of dimensions')
 
         if isinstance(lb, np.ndarray):
             lb = lb.copy()
+        elif isinstance(lb, tuple):
+            lb = _as_sparse(lb)[:2]
         if isinstance(ub, np.ndarray):
             ub = ub.copy()
+        elif isinstance(ub, tuple):
+            ub = _as_sparse(ub)[:2]
 
         self._lb = lb
         self._ub = ub
 
-    def __call__(self, x):
-        return np.clip(x, self._lb, self._ub)
+    def __call__(self, x, out=None):
+        r"""
+        Map the given point :math:`x` to :math:`T(x)`.
+        If ``out`` is given, the result is written into it; in particular, ``out=x`` updates :math:`x` in place.
+        """
+
+        lb, ub = self._lb, self._ub
+        if not isinstance(lb, tuple) and not isinstance(ub, tuple):
+            return np.clip(x, lb, ub, out=out)
+
+        if out is None:
+            out = x.astype(np.result_type(x.dtype, float))
+        elif out is not x:
+            out[...] = x
+        for bound, clip in ((lb, np.maximum), (ub, np.minimum)):
+            if isinstance(bound, tuple):
+                idx, val = bound
+                out[idx] = clip(out[idx], val)
+            elif bound is not None:
+                clip(out, bound, out=out)
+        return out
+
+    @property
+    def reduce_size(self):
+        return 0
+
+    def block_reduce(self, x, index):
+        return np.empty(0)
+
+    def block_apply(self, x, index, total):
+        out = x.astype(np.result_type(x.dtype, float))
+        for bound, clip in ((self._lb, np.maximum), (self._ub, np.minimum)):
+            if isinstance(bound, tuple):
+                sl, idx = _block(bound[0], index)
+                out[idx] = clip(out[idx], bound[1][sl])
+            elif isinstance(bound, np.ndarray):
+                clip(out, bound[index], out=out)
+            elif bound is not None:
+                clip(out, bound, out=out)
+        return out
 
     def __contains__(self, x):
         if not isinstance(x, np.ndarray):
             return False
         if self._lb is not None:
-            if isinstance(self._lb, np.ndarray) and self._lb.shape != x.shape:
-                return False
-            if not (self._lb <= x).all():
-                return False
+            if isinstance(self._lb, tuple):
+                idx, val = self._lb
+                if idx.size and (len(x.shape) != 1 or idx[-1] >= x.shape[0] or not (val <= x[idx]).all()):
+                    return False
+            else:
+                if isinstance(self._lb, np.ndarray) and self._lb.shape != x.shape:
+                    return False
+                if not (self._lb <= x).all():
+                    return False
         if self._ub is not None:
-            if isinstance(self._ub, np.ndarray) and self._ub.shape != x.shape:
-                return False
-            if not (x <= self._ub).all():
-                return False
+            if isinstance(self._ub, tuple):
+                idx, val = self._ub
+                if idx.size and (len(x.shape) != 1 or idx[-1] >= x.shape[0] or not (x[idx] <= val).all()):
+                    return False
+            else:
+                if isinstance(self._ub, np.ndarray) and self._ub.shape != x.shape:
+                    return False
+                if not (x <= self._ub).all():
+                    return False
         return True
 
 
-class HalfSpace(MetricProjection):
+class HalfSpace(MetricProjection, SeparableMap):
     r"""
     The metric projection :math:`P_H` onto the closed half-space
     
@@ -82,43 +174,109 @@ class HalfSpace(MetricProjection):
 
     where :math:`w\in\mathbb{R}^N\setminus\{0\}` and :math:`d\in\mathbb{R}`.
 
+    The normal vector :math:`w` may be given in a sparse form.
+    Then, both the inner product and the correction touch only the nonzero elements of :math:`w`, and so a projection computed in place costs :math:`O(\mathrm{nnz}(w))`.
+    In particular, ``Composition`` computes in place every element but the first one applied, and so the composition of :math:`K` such half-spaces costs a single copy of :math:`x` and :math:`O(\sum_{i=1}^K\mathrm{nnz}(w_i))`.
+
     :param w:
         An ``ndarray`` vector which defines the half-space as its parameter :math:`w`.
+        A pair ``(indices, values)`` of vectors expressing the nonzero elements of :math:`w`, or a SciPy sparse row vector, is also accepted.
     :param d:
         A ``float`` value which defines the half-space as its parameter :math:`d`.
+    :param ndim:
+        Number of vector dimensions, which is used only if ``w`` is given as a pair ``(indices, values)``.
+        If ``None`` is specified, the created mapping accepts any vector whose dimension exceeds the indices.
     """
 
+    _INPLACE = True
+
     @property
     def ndim(self):
-        return self._w.shape[0]
-
-    def __init__(self, w: np.ndarray, d: float):
-        if not isinstance(w, np.ndarray) or len(w.shape) != 1:
-            raise ValueError('Parameter w must be a vector.')
+        return self._ndim
+
+    def __init__(self, w: Union[np.ndarray, Tuple[np.ndarray, np.ndarray]], d: float, ndim: Optional[int] = None):
+        sparse = _as_sparse(w)
+        if sparse is None:
+            if not isinstance(w, np.ndarray) or len(w.shape) != 1:
+                raise ValueError('Parameter w must be a vector.')
+            idx, ndim = None, w.shape[0]
+        else:
+            idx, w, n = sparse
+            ndim = n if n is not None else ndim
+            if ndim is not None and idx.size and idx[-1] >= ndim:
+                raise ValueError('Indices of parameter w must be less than ndim.')
         l = np.linalg.norm(w)
         if l == 0:
             raise ValueError('Parameter w must be a nonzero vector.')
 
         self._w = w / l
         self._d = d / l
-
-    def __call__(self, x):
-        det = self._d - np.inner(self._w, x)
-        if det >= 0:
-            y = x.copy()
+        self._idx = idx
+        self._ndim = ndim
+
+    def __call__(self, x, out=None):
+        r"""
+        Map the given point :math:`x` to :math:`P_H(x)`.
+        If ``out`` is given, the result is written into it; in particular, ``out=x`` updates :math:`x` in place.
+        """
+
+        if self._idx is None:
+            det = self._d - np.inner(self._w, x)
+            if out is None:
+                if det >= 0:
+                    y = x.copy()
+                else:
+                    y = det * self._w
+                    y += x
+                return y
         else:
-            y = det * self._w
-            y += x
-        return y
+            det = self._d - np.inner(self._w, x[self._idx])
+
+        if out is None:
+            out = x.astype(np.result_type(x.dtype, self._w.dtype))
+        elif out is not x:
+            out[...] = x
+        if det < 0:
+            if self._idx is None:
+                out += det * self._w
+            else:
+                out[self._idx] += det * self._w
+        return out
+
+    @property
+    def reduce_size(self):
+        return 1
+
+    def block_reduce(self, x, index):
+        if self._idx is None:
+            return np.array([np.inner(self._w[index], x)])
+        sl, idx = _block(self._idx, index)
+        return np.array([np.inner(self._w[sl], x[idx])])
+
+    def block_apply(self, x, index, total):
+        det = self._d - total[0]
+        out = x.astype(np.result_type(x.dtype, self._w.dtype))
+        if det < 0:
+            if self._idx is None:
+                out += det * self._w[index]
+            else:
+                sl, idx = _block(self._idx, index)
+                out[idx] += det * self._w[sl]
+        return out
 
     def __contains__(self, x):
-        if not isinstance(x, np.ndarray) or x.shape != self._w.shape:
+        if not isinstance(x, np.ndarray) or len(x.shape) != 1:
             return False
-
-        return (self._d - np.inner(self._w, x)) >= 0
+        if self._idx is None:
+            if x.shape != self._w.shape:
+                return False
+            return (self._d - np.inner(self._w, x)) >= 0
+        if (self._ndim is not None and x.shape[0] != self._ndim) or (self._idx.size and self._idx[-1] >= x.shape[0]):
+            return False
+        return (self._d - np.inner(self._w, x[self._idx])) >= 0
 
 
-class Ball(MetricProjection):
+class Ball(MetricProjection, SeparableMap):
     r"""
     The metric projection :math:`P_B` onto the closed ball with center :math:`c\in\mathbb{R}^N` and radius :math:`r\in\mathbb{R}`, that is
 
@@ -154,8 +312,407 @@ class Ball(MetricProjection):
             v += self._c
             return v
 
+    @property
+    def reduce_size(self):
+        return 1
+
+    def block_reduce(self, x, index):
+        v = x - self._c[index]
+        return np.array([np.inner(v, v)])
+
+    def block_apply(self, x, index, total):
+        d = np.sqrt(total[0])
+        if d <= self._r:
+            return x.copy()
+        v = x - self._c[index]
+        v *= self._r / d
+        v += self._c[index]
+        return v
+
     def __contains__(self, x):
         if not isinstance(x, np.ndarray) or x.shape != self._c.shape:
             return False
 
         return np.linalg.norm(x - self._c) <= self._r
+
+
+class Ellipsoid(MetricProjection):
+    r"""
+    The metric projection :math:`P_E` onto the closed ellipsoid with center :math:`c\in\mathbb{R}^N` and symmetric positive definite shape matrix :math:`A\in\mathbb{R}^{N\times N}`, that is
+
+    .. math::
+        E:=\{x\in\mathbb{R}^N:(x-c)^\top A(x-c)\le 1\}.
+
+    For :math:`x\notin E`, the projection is :math:`P_E(x)=c+(I+\mu A)^{-1}(x-c)`, where :math:`\mu>0` is the root of the secular equation
+
+    .. math::
+        \varphi(\mu):=\sum_{i=1}^N\frac{\lambda_i z_i^2}{(1+\mu\lambda_i)^2}-1=0
+
+    with the eigenvalues :math:`\lambda_i` of :math:`A` and the coordinates :math:`z:=Q^\top(x-c)` in its eigenbasis :math:`Q`.
+    The eigendecomposition is computed once on construction, and so each projection costs two multiplications by :math:`Q` and :math:`O(N)` operations per iteration of the Newton's method safeguarded by bisection.
+    Since :math:`\varphi` is convex and decreasing, the Newton's method started at :math:`\mu=0` increases monotonically to the root.
+    If :math:`A` is given as a vector of its diagonal elements, i.e., if the ellipsoid is axis-aligned, no multiplication by :math:`Q` is needed.
+    A stack of vectors given as an ``ndarray`` of shape ``[..., N]`` is projected row by row, solving all the secular equations at once.
+
+    :param A:
+        A symmetric positive definite ``ndarray`` matrix, or an ``ndarray`` vector of positive diagonal elements.
+    :param c:
+        An ``ndarray`` vector which expresses the center of the ellipsoid.
+        If ``None`` is specified, the center is the origin.
+    """
+
+    _BATCH = True
+
+    @property
+    def ndim(self) -> int:
+        return self._w.shape[0]
+
+    def __init__(self, A: np.ndarray, c: Optional[np.ndarray] = None):
+        if not isinstance(A, np.ndarray) or len(A.shape) not in (1, 2) or (len(A.shape) == 2 and A.shape[0] != A.shape[1]):
+            raise ValueError('Parameter `A` must be a square matrix or a vector.')
+        if len(A.shape) == 2:
+            if not np.allclose(A, A.T):
+                raise ValueError('Parameter `A` must be symmetric.')
+            w, Q = np.linalg.eigh(A)
+        else:
+            w, Q = A.astype(float), None
+        if not (w > 0).all():
+            raise ValueError('Parameter `A` must be positive definite.')
+        if c is None:
+            c = np.zeros(w.shape[0])
+        if not isinstance(c, np.ndarray) or c.shape != w.shape:
+            raise ValueError('Parameter `c` must be a vector of the same dimension as `A`.')
+
+        self._w = w
+        self._Q = Q
+        self._c = c.astype(float)
+
+    def _solve(self, z2: np.ndarray) -> np.ndarray:
+        # Return the root mu >= 0 of phi for each row of the squared coordinates z2, which is 0 for the points in E.
+        w, shape = self._w, z2.shape[:-1]
+        z2 = z2.reshape(-1, w.shape[0])
+        lz2 = z2 * w
+        mu = np.zeros(z2.shape[0])
+        # phi(mu) <= sum(z2 / w) / mu^2 - 1 gives an upper bound of the root.
+        lo, hi = mu.copy(), np.sqrt((z2 / w).sum(axis=-1))
+        active = lz2.sum(axis=-1) > 1
+        for _ in range(_NEWTON_MAXITER):
+            if not active.any():
+                break
+            m = mu[active]
+            d = 1 + m[..., np.newaxis] * w
+            t = lz2[active] / (d * d)
+            phi = t.sum(axis=-1) - 1
+            dphi = -2 * (t * w / d).sum(axis=-1)
+            l, h = lo[active], hi[active]
+            l[phi > 0] = m[phi > 0]
+            h[phi <= 0] = m[phi <= 0]
+            step = m - phi / dphi
+            # Bisection whenever the Newton step leaves the bracket.
+            outside = (step <= l) | (step >= h)
+            step[outside] = (l[outside] + h[outside]) / 2
+            done = np.abs(step - m) <= 1e-15 * np.maximum(step, 1.)
+            mu[active], lo[active], hi[active] = step, l, h
+            idx = np.flatnonzero(active)
+            active[idx[done]] = False
+        return mu.reshape(shape)
+
+    def __call__(self, x):
+        v = x - self._c
+        z = v if self._Q is None else v.dot(self._Q)
+        mu = self._solve(z * z)
+        z /= 1 + mu[..., np.newaxis] * self._w
+        y = z if self._Q is None else z.dot(self._Q.T)
+        y += self._c
+        # The points in E are kept exactly as they are.
+        inside = mu == 0
+        if inside.any():
+            y[inside] = x[inside]
+        return y
+
+    def __contains__(self, x):
+        if not isinstance(x, np.ndarray) or x.shape != self._c.shape:
+            return False
+
+        v = x - self._c
+        z = v if self._Q is None else v.dot(self._Q)
+        return np.inner(z * self._w, z) <= 1 + 4 * np.finfo(float).eps * self.ndim
+
+
+class Polyhedron(MetricProjection):
+    r"""
+    The metric projection :math:`P_C` onto the closed polyhedron
+
+    .. math::
+        C:=\{x\in\mathbb{R}^N:Ax\le b\}=\bigcap_{j=1}^M\{x\in\mathbb{R}^N:\langle a_j, x\rangle\le b_j\},
+
+    where :math:`a_j` is the :math:`j`-th row of :math:`A\in\mathbb{R}^{M\times N}`, which is a nonzero vector.
+    Unlike ``Intersection`` of ``HalfSpace``, which averages the projections onto the half-spaces, this mapping computes the exact projection :math:`P_C(x)=x-A^\top\lambda`, where :math:`\lambda\in\mathbb{R}^M` is a solution of the dual problem
+
+    .. math::
+        \mathop{\mathrm{minimize}}_{\lambda\ge 0}\ \frac{1}{2}\lambda^\top AA^\top\lambda-\lambda^\top(Ax-b).
+
+    It is reduced to a nonnegative least squares problem, which is solved by the active-set method of Lawson and Hanson ([Lawson1995]_, Chapter 23): the most violated constraint :math:`\langle a_j, x-A^\top\lambda\rangle>b_j` is added to the active set one by one, and the constraints whose multipliers become negative are removed.
+    The Gram matrix :math:`AA^\top` is computed once on construction, and the inverse of its block of each active set is cached, so that the projection with an active set seen recently costs :math:`O(MN)` operations.
+    Each projection starts from the active set of the previous one; thus, the successive projections of the iterates of ``find``, whose active sets seldom change, take no iteration of the active-set method.
+    Since this state is updated on each call, the projections of the points given from several threads (e.g., by ``Composition.map_stream`` or ``ARock``) are serialized by a lock.
+    If the active-set method does not terminate in :math:`3M` iterations, which can happen only by rounding errors, a ``RuntimeWarning`` is issued and the last iterate is taken.
+    The points in :math:`C` are kept exactly as they are, and a stack of vectors given as an ``ndarray`` of shape ``[..., N]`` is projected row by row.
+
+    :param A:
+        An ``ndarray`` matrix whose rows are the normal vectors :math:`a_j` of the half-spaces, or a sequence of ``HalfSpace`` with dense normal vectors.
+    :param b:
+        An ``ndarray`` vector of :math:`b_j`, which must be ``None`` if ``A`` is a sequence of ``HalfSpace``.
+    """
+
+    _TRANSIENT = ('_active', '_inverses', '_lock')
+
+    @property
+    def ndim(self) -> int:
+        return self._A.shape[1]
+
+    def __init__(self, A: Union[np.ndarray, Sequence[HalfSpace]], b: Optional[np.ndarray] = None):
+        if b is None:
+            if isinstance(A, np.ndarray) or not A or not all(isinstance(h, HalfSpace) and h._idx is None for h in A):
+                raise ValueError('Parameter `A` must be a nonempty sequence of HalfSpace with dense normal vectors if `b` is not given.')
+            if len(set(h.ndim for h in A)) != 1:
+                raise ValueError('Half-spaces must be of the same dimension.')
+            A, b = np.stack([h._w for h in A]), np.array([h._d for h in A])
+        if not isinstance(A, np.ndarray) or len(A.shape) != 2 or A.shape[0] < 1:
+            raise ValueError('Parameter `A` must be a nonempty matrix.')
+        if not isinstance(b, np.ndarray) or b.shape != A.shape[:1]:
+            raise ValueError('Parameter `b` must be a vector with an element for each row of `A`.')
+        if not (np.isfinite(A).all() and np.isfinite(b).all()):
+            raise ValueError('Parameters `A` and `b` must be finite.')
+        l = np.linalg.norm(A, axis=1)
+        if not (l > 0).all():
+            raise ValueError('Each row of parameter `A` must be a nonzero vector.')
+
+        # Normalized rows, so that each violation is the distance to the half-space.
+        self._A = A / l[:, np.newaxis]
+        self._b = b / l
+        self._G = self._A.dot(self._A.T)
+        self._init_transient()
+
+    def _init_transient(self) -> None:
+        # The active set of the last projection, the inverses of the blocks of G keyed by active sets, and the lock guarding them.
+        self._active = np.empty(0, dtype=np.intp)
+        self._inverses = OrderedDict()  # type: OrderedDict
+        self._lock = threading.Lock()
+
+    def _inverse(self, P: np.ndarray) -> Optional[np.ndarray]:
+        # Return the inverse of the block of G for the active set P, or None if it is ill-conditioned.
+        key = P.tobytes()
+        if key in self._inverses:
+            self._inverses.move_to_end(key)
+            return self._inverses[key]
+        G = self._G[np.ix_(P, P)]
+        inv = self._inverses[key] = np.linalg.inv(G) if np.linalg.cond(G) < _ACTIVE_SET_MAXCOND else None
+        if len(self._inverses) > _ACTIVE_SET_CACHE_SIZE:
+            self._inverses.popitem(last=False)
+        return inv
+
+    def _solve(self, P: np.ndarray, h: np.ndarray) -> np.ndarray:
+        # Return z minimizing |E_P z - e|, where E = [-A^T; h^T] and e is the last unit vector.
+        inv = self._inverse(P)
+        if inv is not None:
+            # (G_PP + h_P h_P^T)^{-1} h_P by the Sherman-Morrison formula.
+            g = inv.dot(h[P])
+            return g / (1 + h[P].dot(g))
+        E = np.vstack([-self._A[P].T, h[P]])
+        e = np.zeros(E.shape[0])
+        e[-1] = 1.
+        return np.linalg.lstsq(E, e, rcond=None)[0]
+
+    def _multipliers(self, h: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Return the active set P and the multipliers lam[P] > 0 of the projection of x, where h = Ax - b.
+        # The dual problem is reduced to the nonnegative least squares min |Eu - e| over u >= 0 ([Lawson1995]_, Chapter 23),
+        # which is solved by the active-set method keeping the columns of E_P linearly independent; then, lam = u / (1 - h^T u).
+        G = self._G
+        M = h.shape[0]
+        tol = _ACTIVE_SET_RTOL * max(1., np.abs(h).max())
+        u = np.zeros(M)
+
+        # Warm start: drop the previously active constraints with nonpositive multipliers until all are positive.
+        P = self._active
+        while P.size:
+            z = self._solve(P, h)
+            if (z > 0).all():
+                u[P] = z
+                break
+            P = P[z > 0]
+
+        banned = np.zeros(M, dtype=bool)
+        for _ in range(_ACTIVE_SET_MAXITER_FACTOR * M):
+            # The negative gradient, which is (1 - h^T u) times the violations of the constraints at x - A^T lam.
+            s = 1 - h[P].dot(u[P])
+            w = h * s - G[:, P].dot(u[P])
+            w[P] = -np.inf
+            w[banned] = -np.inf
+            j = int(np.argmax(w))
+            if w[j] <= tol * s:
+                break
+            P = np.sort(np.append(P, j))
+            while True:
+                z = self._solve(P, h)
+                if (z > 0).all():
+                    break
+                # Move from u toward z until a multiplier hits zero, and drop it.
+                l = u[P]
+                negative = np.flatnonzero(z <= 0)
+                ratio = l[negative] / (l[negative] - z[negative])
+                k = int(np.argmin(ratio))
+                l += ratio[k] * (z - l)
+                l[negative[k]] = 0.
+                np.maximum(l, 0., out=l)
+                u[P] = l
+                P = P[l > 0]
+                if not P.size:
+                    z = np.empty(0)
+                    break
+            # A constraint which cannot enter due to rounding errors is skipped until the active set changes.
+            banned[j] = j not in P
+            if not banned[j]:
+                banned[:] = False
+            u[:] = 0.
+            u[P] = z
+        else:
+            warnings.warn('The active-set method of Polyhedron did not terminate in %d iterations.' % (_ACTIVE_SET_MAXITER_FACTOR * M), RuntimeWarning)
+
+        s = 1 - h[P].dot(u[P])
+        if s <= _ACTIVE_SET_RTOL:
+            raise ValueError('The polyhedron is empty.')
+        self._active = P
+        return P, u[P] / s
+
+    def __call__(self, x):
+        if len(x.shape) != 1:
+            y = np.stack([self(v) for v in x.reshape(-1, self.ndim)])
+            return y.reshape(x.shape)
+
+        h = self._A.dot(x)
+        h -= self._b
+        if (h <= 0).all():
+            return x.astype(np.result_type(x.dtype, float))
+        with self._lock:
+            P, lam = self._multipliers(h)
+        y = x - lam.dot(self._A[P])
+        return y
+
+    def __contains__(self, x):
+        if not isinstance(x, np.ndarray) or x.shape != (self.ndim,):
+            return False
+
+        # The violations up to the tolerance of the active-set method are accepted.
+        tol = _ACTIVE_SET_RTOL * max(1., np.linalg.norm(x), np.abs(self._b).max())
+        return bool((self._A.dot(x) - self._b <= tol).all())
+
+
+class SecondOrderCone(MetricProjection):
+    r"""
+    The metric projection :math:`P_K` onto the second-order cone (Lorentz cone)
+
+    .. math::
+        K:=\{(t,u)\in\mathbb{R}\times\mathbb{R}^{N-1}:\|u\|\le t\},
+
+    where the first element of each vector is dealt with as :math:`t`.
+    It is computed in closed form ([Bauschke2017]_, Exercise 29.11), and a stack of vectors given as an ``ndarray`` of shape ``[..., N]`` is projected row by row.
+
+    :param ndim:
+        Number of vector dimensions :math:`N`.
+        If ``None`` is specified, the created mapping accepts any vector in arbitrary dimension.
+    """
+
+    _BATCH = True
+
+    @property
+    def ndim(self):
+        return self._ndim
+
+    def __init__(self, ndim: Optional[int] = None):
+        if ndim is not None and ndim < 1:
+            raise ValueError('Parameter `ndim` must be a positive integer.')
+
+        self._ndim = ndim
+
+    def __call__(self, x):
+        t = x[..., :1]
+        l = np.linalg.norm(x[..., 1:], axis=-1, keepdims=True)
+        a = (t + l) / 2
+        # y = a * (1, u / |u|) unless |u| <= t (kept as it is) or |u| <= -t (mapped to the origin)
+        y = x * np.divide(a, l, out=np.zeros_like(a), where=l > 0)
+        y[..., :1] = a
+        y = np.where(l <= t, x, np.where(l <= -t, 0., y))
+        return y
+
+    def __contains__(self, x):
+        if not isinstance(x, np.ndarray) or len(x.shape) != 1 or x.shape[0] < 1:
+            return False
+        if self._ndim is not None and x.shape[0] != self._ndim:
+            return False
+
+        return np.linalg.norm(x[1:]) <= x[0]
+
+
+class PSDCone(MetricProjection):
+    r"""
+    The metric projection :math:`P_{\mathbb{S}_+^n}` onto the cone of the positive semidefinite matrices of order :math:`n`, which are dealt with as vectors in :math:`\mathbb{R}^{n(n+1)/2}`.
+    A symmetric matrix :math:`X` corresponds to the vector :math:`\mathrm{svec}(X)` of its lower triangular elements in row-major order, where each off-diagonal element is multiplied by :math:`\sqrt{2}`, so that :math:`\|\mathrm{svec}(X)\|` coincides with the Frobenius norm of :math:`X`.
+    The projection replaces the negative eigenvalues of :math:`X` with zero.
+
+    Each vector consists of ``blocks`` such vectors, i.e., the fixed point set is the product of ``blocks`` positive semidefinite cones, and a stack of vectors given as an ``ndarray`` of shape ``[..., N]`` is projected row by row.
+    All the matrices are eigendecomposed at once by a batched ``np.linalg.eigh``.
+    If ``check`` is ``True``, a Cholesky factorization of all the matrices is attempted first, and the eigendecomposition is skipped if it succeeds, that is, if all the matrices are already positive definite.
+
+    :param n: The order :math:`n` of the matrices.
+    :param blocks: Number of matrices packed in each vector.
+    :param check: Whether the Cholesky factorization is attempted before the eigendecomposition.
+    """
+
+    _BATCH = True
+
+    @property
+    def ndim(self):
+        return self._blocks * self._rows.shape[0]
+
+    def __init__(self, n: int, blocks: int = 1, check: bool = True):
+        if n < 1:
+            raise ValueError('Parameter `n` must be a positive integer.')
+        if blocks < 1:
+            raise ValueError('Parameter `blocks` must be a positive integer.')
+
+        self._rows, self._cols = np.tril_indices(n)
+        self._scale = np.where(self._rows == self._cols, 1., 2 ** 0.5)
+        self._n = n
+        self._blocks = blocks
+        self._check = check
+
+    def _unpack(self, x: np.ndarray) -> np.ndarray:
+        v = x.reshape(x.shape[:-1] + (self._blocks, self._rows.shape[0])) / self._scale
+        X = np.empty(v.shape[:-1] + (self._n, self._n), dtype=v.dtype)
+        X[..., self._rows, self._cols] = v
+        X[..., self._cols, self._rows] = v
+        return X
+
+    def __call__(self, x):
+        X = self._unpack(x)
+        if self._check:
+            try:
+                np.linalg.cholesky(X)
+                return x.astype(X.dtype)
+            except np.linalg.LinAlgError:
+                pass
+        w, V = np.linalg.eigh(X)
+        np.maximum(w, 0, out=w)
+        V *= np.sqrt(w)[..., np.newaxis, :]
+        X = np.matmul(V, np.swapaxes(V, -1, -2))
+        y = X[..., self._rows, self._cols]
+        y *= self._scale
+        return y.reshape(x.shape)
+
+    def __contains__(self, x):
+        if not isinstance(x, np.ndarray) or x.shape != (self.ndim,):
+            return False
+
+        w = np.linalg.eigvalsh(self._unpack(x))
+        return (w >= -np.finfo(w.dtype).eps * self._n * max(1., np.abs(w).max())).all()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Proximal mappings
+-----------------
+
+The proximal mapping of a proper lower semicontinuous convex function :math:`f:\\mathbb{R}^N\\to(-\\infty,\\infty]` with parameter :math:`\\gamma>0`, that is
+
+.. math::
+    \\mathrm{prox}_{\\gamma f}(x):=\\mathop{\\mathrm{argmin}}_{y\\in\\mathbb{R}^N}\\left(f(y)+\\frac{1}{2\\gamma}\\|x-y\\|^2\\right),
+
+is firmly nonexpansive, and its fixed point set is the set of all minimizers of :math:`f` ([Bauschke2017]_, Propositions 12.28 and 12.29).
+``fpmlib.proximal`` module provides some proximal mappings which can be computed explicitly.
+Each of them accepts a batch of points given as the rows of a matrix, and writes the result into ``out`` if it is given, e.g., ``out=x`` updates :math:`x` in place.
+The following items are automatically loaded when ``fpmlib`` package is imported.
+"""
+
+import numpy as np
+from typing import Optional, Union
+from .typing import FirmlyNonexpansiveMap, SeparableMap
+__all__ = ['SoftThreshold', 'GroupSoftThreshold', 'HuberProx', 'SquaredNormProx']
+
+
+def _check_gamma(gamma: Union[np.ndarray, float]) -> Union[np.ndarray, float]:
+    if isinstance(gamma, np.ndarray):
+        if len(gamma.shape) != 1:
+            raise ValueError('Parameter `gamma` must be a vector or a float value.')
+        gamma = gamma.astype(float)
+    if np.any(np.asarray(gamma) <= 0):
+        raise ValueError('Parameter `gamma` must be positive.')
+    return gamma
+
+
+def _output(x: np.ndarray, out: Optional[np.ndarray]) -> np.ndarray:
+    # Return a float buffer for the result, which is out itself if given.
+    if out is not None:
+        return out
+    return np.empty(x.shape, dtype=np.result_type(x.dtype, float))
+
+
+class _ElementwiseProx(FirmlyNonexpansiveMap, SeparableMap):
+    # A proximal mapping of a separable function f(x) = sum_i f_i(x_i) with a minimizer 0,
+    # whose parameter gamma may differ for each coordinate.
+
+    _INPLACE = True
+    _BATCH = True
+
+    @property
+    def ndim(self):
+        return self._gamma.shape[0] if isinstance(self._gamma, np.ndarray) else None
+
+    @property
+    def reduce_size(self):
+        return 0
+
+    def block_reduce(self, x, index):
+        return np.empty(0)
+
+    def block_apply(self, x, index, total):
+        gamma = self._gamma
+        return self._apply(x, gamma[index] if isinstance(gamma, np.ndarray) else gamma, None)
+
+    def __call__(self, x, out=None):
+        r"""
+        Map the given point :math:`x` (or each row of the given matrix) to :math:`T(x)`.
+        If ``out`` is given, the result is written into it; in particular, ``out=x`` updates :math:`x` in place.
+        """
+
+        return self._apply(x, self._gamma, out)
+
+    def __contains__(self, x):
+        if not isinstance(x, np.ndarray) or (self.ndim is not None and x.shape != (self.ndim,)):
+            return False
+        return not x.any()
+
+
+class SoftThreshold(_ElementwiseProx):
+    r"""
+    The soft-thresholding operator, that is, the proximal mapping of :math:`\gamma\|\cdot\|_1`:
+
+    .. math::
+        T(x)_i:=\mathrm{sign}(x_i)\max\{|x_i|-\gamma_i,0\}\quad(i=1,2,\ldots,N).
+
+    :param gamma:
+        A positive ``float`` value, or an ``ndarray`` vector of the threshold :math:`\gamma_i` of each dimension.
+    """
+
+    def __init__(self, gamma: Union[np.ndarray, float] = 1.):
+        self._gamma = _check_gamma(gamma)
+
+    def _apply(self, x, gamma, out):
+        # T(x) = x - clip(x, -gamma, gamma)
+        if out is x:
+            clipped = np.clip(x, -gamma, gamma)
+            out -= clipped
+            return out
+        out = _output(x, out)
+        np.clip(x, -gamma, gamma, out=out)
+        np.subtract(x, out, out=out)
+        return out
+
+
+class SquaredNormProx(_ElementwiseProx):
+    r"""
+    The proximal mapping of :math:`\frac{\gamma}{2}\|\cdot\|^2`, that is, :math:`T(x):=x/(1+\gamma)`.
+
+    :param gamma:
+        A positive ``float`` value, or an ``ndarray`` vector of :math:`\gamma_i` of each dimension for the weighted norm :math:`\sum_{i=1}^N\gamma_i x_i^2/2`.
+    """
+
+    def __init__(self, gamma: Union[np.ndarray, float] = 1.):
+        self._gamma = _check_gamma(gamma)
+
+    def _apply(self, x, gamma, out):
+        return np.divide(x, 1 + gamma, out=_output(x, out))
+
+
+class HuberProx(_ElementwiseProx):
+    r"""
+    The proximal mapping of :math:`\gamma\sum_{i=1}^N h_\delta(x_i)` for the Huber function
+
+    .. math::
+        h_\delta(t):=\begin{cases}t^2/2&(|t|\le\delta),\\ \delta(|t|-\delta/2)&(\text{otherwise}),\end{cases}
+
+    that is, :math:`T(x)_i:=x_i/(1+\gamma_i)` if :math:`|x_i|\le\delta(1+\gamma_i)`, and :math:`T(x)_i:=x_i-\gamma_i\delta\,\mathrm{sign}(x_i)` otherwise.
+
+    :param delta:
+        A positive ``float`` value which expresses the threshold :math:`\delta` between the quadratic and linear parts.
+    :param gamma:
+        A positive ``float`` value, or an ``ndarray`` vector of :math:`\gamma_i` of each dimension.
+    """
+
+    def __init__(self, delta: float = 1., gamma: Union[np.ndarray, float] = 1.):
+        if delta <= 0:
+            raise ValueError('Parameter `delta` must be positive.')
+
+        self._delta = delta
+        self._gamma = _check_gamma(gamma)
+
+    def _apply(self, x, gamma, out):
+        # T(x) = x - clip(gamma * x / (1 + gamma), -gamma * delta, gamma * delta)
+        step = gamma * self._delta
+        shrink = x * (gamma / (1 + gamma))
+        np.clip(shrink, -step, step, out=shrink)
+        return np.subtract(x, shrink, out=_output(x, out))
+
+
+class GroupSoftThreshold(FirmlyNonexpansiveMap):
+    r"""
+    The group soft-thresholding operator, that is, the proximal mapping of the group-lasso penalty :math:`\gamma\sum_{g=1}^G\|x_{I_g}\|` for a partition :math:`\{I_g\}_{g=1}^G` of the dimensions:
+
+    .. math::
+        T(x)_{I_g}:=\max\left\{1-\frac{\gamma}{\|x_{I_g}\|},0\right\}x_{I_g}\quad(g=1,2,\ldots,G).
+
+    The norms of all the groups are computed by a single ``numpy.add.reduceat`` over the coordinates sorted by group, which is skipped if the groups are contiguous.
+
+    :param groups:
+        An ``ndarray`` vector of integers whose :math:`i`-th element is the label of the group containing the :math:`i`-th dimension.
+    :param gamma:
+        A positive ``float`` value, or an ``ndarray`` vector of :math:`\gamma` of each group, in the ascending order of labels.
+    """
+
+    _INPLACE = True
+    _BATCH = True
+
+    @property
+    def ndim(self):
+        return self._labels.shape[0]
+
+    def __init__(self, groups: np.ndarray, gamma: Union[np.ndarray, float] = 1.):
+        groups = np.asarray(groups)
+        if len(groups.shape) != 1 or groups.shape[0] < 1 or groups.dtype.kind not in 'iu':
+            raise ValueError('Parameter `groups` must be a nonempty vector of integers.')
+        labels, inverse = np.unique(groups, return_inverse=True)
+        gamma = _check_gamma(gamma)
+        if isinstance(gamma, np.ndarray) and gamma.shape != labels.shape:
+            raise ValueError('Parameter `gamma` must have an element for each group.')
+
+        order = np.argsort(inverse, kind='stable')
+        self._order = None if (order == np.arange(order.shape[0])).all() else order
+        self._starts = np.flatnonzero(np.r_[True, np.diff(inverse[order]) != 0])
+        self._labels = inverse
+        self._gamma = gamma
+
+    def __call__(self, x, out=None):
+        r"""
+        Map the given point :math:`x` (or each row of the given matrix) to :math:`T(x)`.
+        If ``out`` is given, the result is written into it; in particular, ``out=x`` updates :math:`x` in place.
+        """
+
+        sq = np.square(x if self._order is None else x[..., self._order])
+        norms = np.sqrt(np.add.reduceat(sq, self._starts, axis=-1))
+        # scale = max(1 - gamma / norm, 0), which is 0 for a group of norm 0.
+        with np.errstate(divide='ignore'):
+            scale = np.divide(self._gamma, norms)
+        np.subtract(1, scale, out=scale)
+        np.maximum(scale, 0, out=scale)
+        return np.multiply(x, scale[..., self._labels], out=_output(x, out))
+
+    def __contains__(self, x):
+        if not isinstance(x, np.ndarray) or x.shape != self._labels.shape:
+            return False
+        return not x.any()
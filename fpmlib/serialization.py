@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Serialization
+-------------
+
+``fpmlib.serialization`` module saves a tree of built-in mappings (e.g., ``Intersection`` of ``Box``, ``Ball`` and ``HalfSpace``) into a single file and loads it back.
+The file consists of a JSON header describing the tree and a raw blob of all the parameter arrays, in the manner of ``safetensors``:
+
+1. the length :math:`L` of the header as a little-endian 8-byte unsigned integer,
+2. the header of :math:`L` bytes, which is a JSON object, and
+3. the blob, where each array is aligned to 64 bytes.
+
+Each mapping is stored with its attributes as they are after its construction, e.g., the normalized vector of ``HalfSpace``, the eigendecomposition of ``Ellipsoid``, and the spectral norm of ``LinearMap``, so that nothing is recomputed on loading.
+The blob is memory-mapped, so that the arrays are not copied and several processes loading the same file share one copy of the parameters in the page cache.
+"""
+
+import os
+import json
+import struct
+import numpy as np
+from typing import Any, Dict, List, Optional
+from .typing import FixedPointMap
+from .contracts import check_firmly_nonexpansive_map, check_nonexpansive_map
+from . import projections, proximal, linear, nonexpansive
+__all__ = ['save', 'load']
+
+_FORMAT = 'fpmlib'
+_VERSION = 1
+_ALIGNMENT = 64
+
+# The classes which can be saved and loaded, keyed by their qualified names.
+_CLASSES = {
+    '%s.%s' % (c.__module__, c.__qualname__): c
+    for c in (
+        [getattr(m, name) for m in (projections, proximal, linear) for name in m.__all__] +
+        [
+            nonexpansive.Intersection, nonexpansive.Composition, nonexpansive.Relaxation, nonexpansive.Reflection,
+            nonexpansive._FirmlyNonexpansiveRelaxation, nonexpansive.ProductSpace,
+        ]
+    )
+}
+
+# A small instance of each class (or of its nearest listed base class), whose attributes are the only ones accepted from files.
+_SAMPLES = {
+    projections.Box: lambda: projections.Box(0., 1.),
+    projections.HalfSpace: lambda: projections.HalfSpace(np.ones(1), 0.),
+    projections.Ball: lambda: projections.Ball(np.zeros(1), 1.),
+    projections.Ellipsoid: lambda: projections.Ellipsoid(np.ones(1)),
+    projections.Polyhedron: lambda: projections.Polyhedron(np.ones((1, 1)), np.zeros(1)),
+    projections.SecondOrderCone: lambda: projections.SecondOrderCone(),
+    projections.PSDCone: lambda: projections.PSDCone(1),
+    proximal.SoftThreshold: lambda: proximal.SoftThreshold(),
+    proximal.GroupSoftThreshold: lambda: proximal.GroupSoftThreshold(np.zeros(1, dtype=int)),
+    proximal.HuberProx: lambda: proximal.HuberProx(),
+    proximal.SquaredNormProx: lambda: proximal.SquaredNormProx(),
+    linear.LinearMap: lambda: linear.LinearMap(np.eye(1)),
+    linear.AffineMap: lambda: linear.AffineMap(np.eye(1), np.zeros(1)),
+    nonexpansive.Intersection: lambda: nonexpansive.Intersection([projections.Box(0.)]),
+    nonexpansive.Composition: lambda: nonexpansive.Composition([projections.Box(0.)]),
+    nonexpansive.Relaxation: lambda: nonexpansive.Reflection(projections.Box(0.)),
+    nonexpansive.ProductSpace: lambda: nonexpansive.ProductSpace([projections.Box(0.)], 1),
+}
+_ATTRIBUTES = {}  # type: Dict[type, frozenset]
+
+
+def _encode(value: Any, arrays: List[np.ndarray]) -> Any:
+    if isinstance(value, np.ndarray):
+        arrays.append(value)
+        return {'array': len(arrays) - 1}
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, tuple):
+        return {'tuple': [_encode(v, arrays) for v in value]}
+    if isinstance(value, list):
+        return {'list': [_encode(v, arrays) for v in value]}
+    if isinstance(value, FixedPointMap):
+        name = '%s.%s' % (type(value).__module__, type(value).__qualname__)
+        if _CLASSES.get(name) is not type(value):
+            raise ValueError('%s cannot be serialized.' % type(value).__name__)
+        # A mapping may list in `_TRANSIENT` the attributes which do not determine it, e.g., caches, locks and pools of threads.
+        # They are excluded from the files, from the fingerprints of fpmlib.cache and from the pickles, and rebuilt by `_init_transient`.
+        transient = getattr(value, '_TRANSIENT', ())
+        attributes = {}
+        for k, v in vars(value).items():
+            if k not in transient:
+                try:
+                    attributes[k] = _encode(v, arrays)
+                except ValueError as e:
+                    raise ValueError('%s of %s: %s' % (k, type(value).__name__, e)) from e
+        return {'map': name, 'attributes': attributes}
+    raise ValueError('%s cannot be serialized.' % type(value).__name__)
+
+
+def _decode(value: Any, arrays: List[np.ndarray], trusted: bool) -> Any:
+    if not isinstance(value, dict):
+        return value
+    if 'array' in value:
+        index = value['array']
+        if not isinstance(index, int) or isinstance(index, bool) or not 0 <= index < len(arrays):
+            raise ValueError('Array index %r is out of range.' % (index,))
+        return arrays[index]
+    if 'tuple' in value:
+        return tuple(_decode(v, arrays, trusted) for v in value['tuple'])
+    if 'list' in value:
+        return [_decode(v, arrays, trusted) for v in value['list']]
+    cls = _CLASSES.get(value.get('map'))
+    if cls is None:
+        raise ValueError('Unknown mapping %s is given.' % value.get('map'))
+    attributes = value.get('attributes')
+    if not isinstance(attributes, dict):
+        raise ValueError('%s has malformed attributes.' % cls.__name__)
+    unknown = set(attributes) - _attributes(cls)
+    if unknown:
+        raise ValueError('%s has unknown attributes %s.' % (cls.__name__, ', '.join(sorted(map(str, unknown)))))
+    # The constructor is bypassed, so that the arrays are neither copied nor preprocessed again.
+    T = object.__new__(cls)
+    for k, v in attributes.items():
+        setattr(T, k, _decode(v, arrays, trusted))
+    try:
+        if getattr(T, '_TRANSIENT', ()):
+            T._init_transient()
+        if not trusted:
+            _validate(T)
+    except (AttributeError, TypeError, IndexError) as e:
+        raise ValueError('%s has malformed attributes: %s' % (cls.__name__, e)) from e
+    return T
+
+
+def _attributes(cls: type) -> frozenset:
+    # The names of the attributes set by the constructor, except properties and transient attributes.
+    if cls not in _ATTRIBUTES:
+        sample = next(_SAMPLES[c] for c in cls.__mro__ if c in _SAMPLES)()
+        transient = getattr(cls, '_TRANSIENT', ())
+        _ATTRIBUTES[cls] = frozenset(k for k in vars(sample) if k not in transient and not isinstance(getattr(cls, k, None), property))
+    return _ATTRIBUTES[cls]
+
+
+def _validate(T: FixedPointMap) -> None:
+    # The checks done by the constructors, which are skipped for trusted files.
+    for v in vars(T).values():
+        if isinstance(v, np.ndarray) and v.dtype.kind in 'fc':
+            # The bounds of Box may be infinite.
+            if np.isnan(v).any() or not isinstance(T, projections.Box) and not np.isfinite(v).all():
+                raise ValueError('%s has a non-finite parameter.' % type(T).__name__)
+    if isinstance(T, nonexpansive.Intersection):
+        for m in T._maps:
+            check_nonexpansive_map(m, T.ndim)
+    elif isinstance(T, nonexpansive.Composition):
+        for m in T._maps[:-1]:
+            check_firmly_nonexpansive_map(m, T.ndim)
+        check_nonexpansive_map(T._maps[-1], T.ndim)
+    elif isinstance(T, nonexpansive.ProductSpace):
+        for m in T._maps:
+            check_firmly_nonexpansive_map(m, T.shape[1])
+    elif isinstance(T, nonexpansive.Relaxation):
+        check_nonexpansive_map(T._T)
+        if not 0 < T.averagedness <= 1:
+            raise ValueError('The relaxation parameter is out of range.')
+    elif isinstance(T, linear.LinearMap):
+        if not isinstance(T._M, np.ndarray) or len(T._M.shape) != 2 or T._M.shape[0] != T._M.shape[1]:
+            raise ValueError('LinearMap must have a square matrix.')
+        if isinstance(T, linear.AffineMap) and not _is_vector(T._b, T.ndim):
+            raise ValueError('AffineMap must have a vector of the dimension of its matrix.')
+        T._norm = linear._cached_spectral_norm(T._M)
+        if T._norm > 1 + linear._NORM_RTOL:
+            raise ValueError('The spectral norm of LinearMap is %g, which must not be greater than 1.' % T._norm)
+    else:
+        _validate_parameters(T)
+
+
+def _is_real(v: Any) -> bool:
+    return isinstance(v, (int, float)) and not isinstance(v, bool) and not np.isnan(v)
+
+
+def _is_vector(v: Any, n: Optional[int] = None, kind: str = 'iuf') -> bool:
+    return isinstance(v, np.ndarray) and len(v.shape) == 1 and v.dtype.kind in kind and (n is None or v.shape[0] == n)
+
+
+def _is_indices(idx: Any, n: Optional[int] = None) -> bool:
+    # Sorted distinct nonnegative indices, as made by projections._as_sparse.
+    return _is_vector(idx, kind='iu') and (idx.size == 0 or idx[0] >= 0 and (np.diff(idx) > 0).all()) and (n is None or idx.size == n)
+
+
+def _bound(v: Any) -> Any:
+    # Return (indices, values) of a bound of Box, where indices is None for a dense or scalar bound.
+    if isinstance(v, tuple):
+        if len(v) != 2 or not _is_indices(v[0]) or not _is_vector(v[1], v[0].size) or np.isnan(v[1]).any():
+            raise ValueError('Box has a malformed sparse bound.')
+        return v
+    if v is not None and not _is_real(v) and not _is_vector(v):
+        raise ValueError('Box has a malformed bound.')
+    return None, v
+
+
+def _validate_parameters(T: FixedPointMap) -> None:
+    # The invariants established by the constructors of the mappings of projections and proximal.
+    if isinstance(T, projections.Box):
+        (li, lv), (ui, uv) = _bound(T._lb), _bound(T._ub)
+        if isinstance(lv, np.ndarray) and isinstance(uv, np.ndarray) and li is None and ui is None and lv.shape != uv.shape:
+            raise ValueError('Box has bounds of different dimensions.')
+        if lv is not None and uv is not None:
+            if li is not None and ui is not None:
+                _, i, j = np.intersect1d(li, ui, assume_unique=True, return_indices=True)
+                lv, uv = lv[i], uv[j]
+            elif li is not None:
+                uv = uv[li] if isinstance(uv, np.ndarray) else uv
+            elif ui is not None:
+                lv = lv[ui] if isinstance(lv, np.ndarray) else lv
+            if not np.all(lv <= uv):
+                raise ValueError('Box has a lower bound greater than its upper bound.')
+    elif isinstance(T, projections.HalfSpace):
+        if not _is_vector(T._w) or not _is_real(T._d) or not np.isclose(np.linalg.norm(T._w), 1.):
+            raise ValueError('HalfSpace must have a unit normal vector.')
+        if T._idx is None:
+            if T._ndim != T._w.shape[0]:
+                raise ValueError('HalfSpace has a wrong dimension.')
+        elif not _is_indices(T._idx, T._w.shape[0]) or T._ndim is not None and (not isinstance(T._ndim, int) or T._idx.size and T._idx[-1] >= T._ndim):
+            raise ValueError('HalfSpace has malformed indices.')
+    elif isinstance(T, projections.Ball):
+        if not _is_vector(T._c) or not _is_real(T._r) or T._r < 0:
+            raise ValueError('Ball must have a center vector and a nonnegative radius.')
+    elif isinstance(T, projections.Ellipsoid):
+        n = T._w.shape[0] if _is_vector(T._w) else 0
+        if n == 0 or not (T._w > 0).all() or not _is_vector(T._c, n):
+            raise ValueError('Ellipsoid must have positive weights and a center of the same dimension.')
+        if T._Q is not None and (not isinstance(T._Q, np.ndarray) or T._Q.shape != (n, n) or not np.allclose(T._Q.T.dot(T._Q), np.eye(n))):
+            raise ValueError('Ellipsoid must have an orthogonal matrix of eigenvectors.')
+    elif isinstance(T, projections.Polyhedron):
+        A = T._A
+        if not isinstance(A, np.ndarray) or len(A.shape) != 2 or A.shape[0] < 1 or not _is_vector(T._b, A.shape[0]):
+            raise ValueError('Polyhedron must have a matrix and a vector with an element for each row of it.')
+        if not np.allclose(np.linalg.norm(A, axis=1), 1.):
+            raise ValueError('Polyhedron must have normalized rows.')
+        T._G = A.dot(A.T)
+    elif isinstance(T, projections.SecondOrderCone):
+        if T._ndim is not None and (not isinstance(T._ndim, int) or T._ndim < 1):
+            raise ValueError('SecondOrderCone has a wrong dimension.')
+    elif isinstance(T, projections.PSDCone):
+        # The index arrays are rebuilt by the constructor and compared.
+        if not all(isinstance(v, int) and not isinstance(v, bool) for v in (T._n, T._blocks)) or not isinstance(T._check, bool):
+            raise ValueError('PSDCone has malformed parameters.')
+        S = projections.PSDCone(T._n, T._blocks, T._check)
+        if not all(isinstance(getattr(T, k), np.ndarray) and np.array_equal(getattr(T, k), getattr(S, k)) for k in ('_rows', '_cols', '_scale')):
+            raise ValueError('PSDCone has malformed indices.')
+    elif isinstance(T, proximal.GroupSoftThreshold):
+        if not _is_vector(T._labels, kind='iu'):
+            raise ValueError('GroupSoftThreshold must have a vector of labels.')
+        S = proximal.GroupSoftThreshold(T._labels, T._gamma)
+        if not np.array_equal(T._labels, S._labels) or not np.array_equal(T._starts, S._starts) or (T._order is None) != (S._order is None) or T._order is not None and not np.array_equal(T._order, S._order):
+            raise ValueError('GroupSoftThreshold has malformed groups.')
+    elif isinstance(T, proximal._ElementwiseProx):
+        if not _is_real(T._gamma) and not _is_vector(T._gamma):
+            raise ValueError('%s has a malformed parameter `gamma`.' % type(T).__name__)
+        proximal._check_gamma(T._gamma)
+        if isinstance(T, proximal.HuberProx) and (not _is_real(T._delta) or T._delta <= 0):
+            raise ValueError('HuberProx must have a positive parameter `delta`.')
+
+
+def save(T: FixedPointMap, path: str) -> None:
+    r"""
+    Save a tree of built-in mappings into a file.
+
+    :param T: A mapping composed of the mappings of ``fpmlib.projections``, ``fpmlib.proximal`` and ``fpmlib.linear`` (with a dense matrix) by ``Intersection``, ``Composition``, ``ProductSpace``, ``Relaxation`` and ``Reflection``.
+    :param path: The path of the file.
+    """
+
+    arrays = []  # type: List[np.ndarray]
+    root = _encode(T, arrays)
+    entries, offset = [], 0
+    for a in arrays:
+        if a.dtype.hasobject:
+            raise ValueError('An array of objects cannot be serialized.')
+        entries.append({'dtype': a.dtype.str, 'shape': list(a.shape), 'offset': offset})
+        offset += -(-a.nbytes // _ALIGNMENT) * _ALIGNMENT
+    header = json.dumps({'format': _FORMAT, 'version': _VERSION, 'root': root, 'arrays': entries}).encode()
+    # Pad the header so that the blob starts at an aligned position.
+    header += b' ' * (-(8 + len(header)) % _ALIGNMENT)
+
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<Q', len(header)))
+        f.write(header)
+        for a, entry in zip(arrays, entries):
+            f.seek(8 + len(header) + entry['offset'])
+            f.write(np.ascontiguousarray(a).tobytes())
+        f.truncate(8 + len(header) + offset)
+
+
+def load(path: str, mmap: bool = True, trusted: bool = False) -> FixedPointMap:
+    r"""
+    Load a tree of mappings saved by ``save``.
+
+    :param path: The path of the file.
+    :param mmap: If ``True``, the parameter arrays are read-only views of the memory-mapped file; otherwise, they are read into memory.
+    :param trusted: If ``True``, the checks done by the constructors (e.g., the contracts of the elements of ``Composition``, the spectral norm of ``LinearMap``, the unit normal vector of ``HalfSpace`` and the nonnegative radius of ``Ball``) are skipped.
+        Only the structure of the file is still checked, i.e., the class and the names of the attributes of each mapping against the built-in ones, and the numeric dtypes of the arrays.
+    :return: the loaded mapping.
+    """
+
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        length, = struct.unpack('<Q', f.read(8)) if size >= 8 else (size,)
+        # Decoding errors of the header are also ValueError.
+        header = json.loads(f.read(length).decode()) if length <= size - 8 else None
+    if not isinstance(header, dict) or header.get('format') != _FORMAT or header.get('version') != _VERSION:
+        raise ValueError('%s is not a file saved by fpmlib.serialization.' % path)
+
+    start = 8 + length
+    if mmap:
+        # A memory map of no bytes cannot be created.
+        blob = np.memmap(path, dtype=np.uint8, mode='r', offset=start) if start < size else np.empty(0, np.uint8)
+    else:
+        blob = np.fromfile(path, dtype=np.uint8, offset=start)
+    arrays = []
+    try:
+        for entry in header['arrays']:
+            dtype, shape = np.dtype(entry['dtype']), tuple(entry['shape'])
+            # Arrays of objects would be read from raw bytes, and structured arrays are never saved.
+            if dtype.kind not in 'biufc':
+                raise ValueError('Arrays of dtype %s cannot be loaded.' % dtype)
+            nbytes = dtype.itemsize * int(np.prod(shape, dtype=np.int64))
+            arrays.append(blob[entry['offset']:entry['offset'] + nbytes].view(dtype).reshape(shape))
+        T = _decode(header['root'], arrays, trusted)
+    except (KeyError, TypeError) as e:
+        raise ValueError('%s has a malformed header: %s' % (path, e)) from e
+    if not isinstance(T, FixedPointMap):
+        raise ValueError('%s does not contain a mapping.' % path)
+    return T
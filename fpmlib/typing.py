@@ -13,7 +13,7 @@ import numpy as np
 from abc import abstractmethod
 from collections.abc import Callable, Container
 from typing import Any, Optional
-__all__ = ['FixedPointMap', 'NonexpansiveMap', 'FirmlyNonexpansiveMap', 'MetricProjection']
+__all__ = ['FixedPointMap', 'NonexpansiveMap', 'FirmlyNonexpansiveMap', 'MetricProjection', 'SeparableMap']
 
 
 class FixedPointMap(Callable, Container):
@@ -40,6 +40,25 @@ class FixedPointMap(Callable, Container):
 
         raise NotImplementedError()
 
+    def evaluate(self, x: np.ndarray, accuracy: Optional[float] = None) -> np.ndarray:
+        r"""
+        Map the given point :math:`x\in H` to an approximation :math:`\tilde{T}(x)` such that :math:`\|\tilde{T}(x)-T(x)\|\le\mathtt{accuracy}`.
+        Mappings computed by iterative methods (e.g., projections computed by sub-solvers) can override this method to stop early; by default, it returns the exact value ``self(x)``.
+        If ``accuracy`` is ``None``, the exact value is required.
+        """
+
+        return self(x)
+
+    def __getstate__(self) -> dict:
+        # The transient attributes (see fpmlib.serialization) are dropped, and rebuilt by __setstate__.
+        transient = getattr(self, '_TRANSIENT', ())
+        return {k: v for k, v in vars(self).items() if k not in transient}
+
+    def __setstate__(self, state: dict) -> None:
+        vars(self).update(state)
+        if getattr(self, '_TRANSIENT', ()):
+            self._init_transient()
+
     @abstractmethod
     def __contains__(self, x: Any) -> bool:
         r"""
@@ -63,31 +82,68 @@ class FirmlyNonexpansiveMap(NonexpansiveMap):
 
     @staticmethod
     def from_nonexpansive(T: NonexpansiveMap, alpha: float=0.5) -> FirmlyNonexpansiveMap:
-        # TODO: Test this method
-        # return __FirmlyNonexpansiveMap(T, alpha)
-        return None
-
-
-class __FirmlyNonexpansiveMap(FirmlyNonexpansiveMap):
-    def __init__(self, T: NonexpansiveMap, alpha: float=0.5):
-        assert 0 < alpha <= 0.5, 'Argument alpha must be between 0 and 0.5.'
-
-        self.__T = T
-        self.__alpha = alpha
+        r"""
+        Make the :math:`\alpha`-averaged mapping :math:`(1-\alpha)\mathrm{Id}+\alpha T` from a given nonexpansive mapping :math:`T`, which is firmly nonexpansive if :math:`\alpha\le 1/2`.
+        Its fixed point set coincides with :math:`\mathrm{Fix}(T)`.
+        See also ``fpmlib.nonexpansive.Relaxation``.
 
-    def __call__(self, x: np.ndarray) -> np.ndarray:
-        u = self.__T(x)
-        if u is x:
-            u = x.copy()
-        u *= self.__alpha
-        u += (1 - self.__alpha) * x
-        return u
+        :param T: A nonexpansive mapping.
+        :param alpha: A ``float`` value in :math:`(0, 1/2]`.
+        """
 
-    def __contains__(self, x: np.ndarray) -> bool:
-        return x in self.__T
+        from .nonexpansive import Relaxation
+        R = Relaxation(T, alpha)
+        if not isinstance(R, FirmlyNonexpansiveMap):
+            raise ValueError('Parameter `alpha` must be between 0 and 0.5.')
+        return R
 
 
 class MetricProjection(FirmlyNonexpansiveMap):
     r"""
     An abstract base class that expresses a metric projection onto some nonempty, closed, convex subset of :math:`H`, that is, a mapping :math:`T:H\to H` which satisfies :math:`T(x)\in\mathrm{Fix}(T)` and :math:`\|T(x)-x\|=\inf_{y\in\mathrm{Fix}(T)}\|x-y\|` for any :math:`x\in H`.
     """
+
+
+class SeparableMap(FixedPointMap):
+    r"""
+    An abstract base class that expresses a mapping :math:`T` which can be evaluated on each block of coordinates separately, up to a global reduction of a few partial sums.
+    For a partition of the coordinates into contiguous blocks :math:`x=(x_{I_1},x_{I_2},\ldots,x_{I_P})`, the block :math:`T(x)_{I_p}` is computed as
+
+    .. math::
+        T(x)_{I_p}=\mathtt{block\_apply}\left(x_{I_p}, I_p, \sum_{q=1}^P\mathtt{block\_reduce}(x_{I_q}, I_q)\right).
+
+    For instance, the metric projection onto a box needs no reduction, and the one onto a half-space needs the inner product :math:`\langle w,x\rangle`.
+    """
+
+    @property
+    @abstractmethod
+    def reduce_size(self) -> int:
+        r"""
+        Number of partial sums returned by ``block_reduce``.
+        """
+
+        raise NotImplementedError()
+
+    @abstractmethod
+    def block_reduce(self, x: np.ndarray, index: slice) -> np.ndarray:
+        r"""
+        Return the partial sums contributed by the block :math:`x_I` of a point, where ``index`` expresses the coordinates :math:`I` as a ``slice`` with nonnegative ``start`` and ``stop``.
+        """
+
+        raise NotImplementedError()
+
+    @abstractmethod
+    def block_apply(self, x: np.ndarray, index: slice, total: np.ndarray) -> np.ndarray:
+        r"""
+        Return :math:`T(x)_I` for the block :math:`x_I` and the sum ``total`` of the partial sums over all the blocks.
+        """
+
+        raise NotImplementedError()
+
+    def block_call(self, x: np.ndarray, index: slice) -> np.ndarray:
+        r"""
+        Return :math:`T(x)_I` for a whole point :math:`x`.
+        """
+
+        total = self.block_reduce(x, slice(0, x.shape[0])) if self.reduce_size else np.empty(0)
+        return self.block_apply(x[index], index, total)
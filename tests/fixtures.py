@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+import numpy as np
+from fpmlib.projections import Ball
+
+
+class InexactBall(Ball):
+    # A projection whose approximation is shifted by the given accuracy along the first axis,
+    # recording the accuracy required by each evaluation.
+    def __init__(self, c, r):
+        super().__init__(c, r)
+        self.accuracies = []
+
+    def evaluate(self, x, accuracy=None):
+        self.accuracies.append(accuracy)
+        y = super().__call__(x)
+        if accuracy is not None:
+            y = y.astype(float)
+            y[0] += accuracy
+        return y
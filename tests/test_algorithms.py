@@ -2,10 +2,12 @@ import numpy as np
 import unittest
 import itertools
 from math import sin, cos
-from fpmlib.projections import Ball, HalfSpace
-from fpmlib.nonexpansive import Intersection
+from fpmlib.projections import Ball, Box, HalfSpace
+from fpmlib.nonexpansive import Intersection, Composition, Reflection
 from fpmlib.typing import NonexpansiveMap
 from fpmlib.algorithms import *
+from fpmlib.algorithms import _Trace
+from .fixtures import InexactBall
 
 
 class _Rotation(NonexpansiveMap):
@@ -27,6 +29,21 @@ class _Rotation(NonexpansiveMap):
         return x == self._sol
 
 
+class _DouglasRachford(NonexpansiveMap):
+    @property
+    def ndim(self):
+        return 2
+
+    def __init__(self, A, B):
+        self._RA, self._RB = Reflection(A), Reflection(B)
+
+    def __call__(self, x):
+        return (x + self._RA(self._RB(x))) / 2
+
+    def __contains__(self, x):
+        return x in self._RA and x in self._RB
+
+
 class TestFindKrasnoselskiiMann(unittest.TestCase):
     def test_rotation(self):
         T = _Rotation(np.array([1, -2]))
@@ -52,6 +69,36 @@ class TestFindKrasnoselskiiMann(unittest.TestCase):
         np.testing.assert_equal(x0, np.ones(2))
         np.testing.assert_almost_equal(x, np.ones(2))
 
+    def test_adaptive(self):
+        T = _Rotation(np.array([1, -2]))
+        x0 = np.ones(2)
+        x = find(T, x0, method='Krasnoselskii-Mann', tol=1e-8, options={'steps': 'adaptive'})
+        self.assertIsNot(x, x0)
+        np.testing.assert_equal(x0, np.ones(2))
+        np.testing.assert_almost_equal(x, np.array([1, -2]), decimal=7)
+
+    def test_adaptive_over_relaxation(self):
+        T = Ball(np.zeros(3), 1)
+        steps = []
+        x = find(T, np.array([5., 1., 1.]), method='Krasnoselskii-Mann', tol=1e-8,
+                 options={'steps': 'adaptive', 'callback': lambda x, step: steps.append(step)})
+        np.testing.assert_almost_equal(x, np.array([5., 1., 1.]) / 27 ** 0.5, decimal=7)
+        self.assertTrue(all(1 <= step <= 1.9 for step in steps))
+        self.assertLess(len(steps), 24)
+
+    def test_callback(self):
+        T = _Rotation(np.array([1, -2]))
+        steps = []
+        find(T, np.ones(2), method='Krasnoselskii-Mann', options={'steps': itertools.repeat(0.3), 'maxiter': 10, 'callback': lambda x, step: steps.append(step)})
+        self.assertEqual(steps, [0.3] * 10)
+
+    def test_ndarray_steps(self):
+        T = _Rotation(np.array([1, -2]))
+        x = find(T, np.ones(2), method='Krasnoselskii-Mann', options={'steps': np.full(50, .5)})
+        self.assertEqual(x.shape, (2,))
+        with self.assertRaises(ValueError):
+            find(T, np.ones(2), method='Krasnoselskii-Mann', options={'steps': 'unknown'})
+
 
 class TestFindHishinuma2015(unittest.TestCase):
     def test_rotation(self):
@@ -63,6 +110,117 @@ class TestFindHishinuma2015(unittest.TestCase):
         np.testing.assert_almost_equal(x, np.array([1, -2]), decimal=7)
 
 
+class TestFindMainge2008(unittest.TestCase):
+    def test_rotation(self):
+        T = _Rotation(np.array([1, -2]))
+        x0 = np.ones(2)
+        x = find(T, x0, method='Mainge2008', tol=1e-8)
+        self.assertIsNot(x, x0)
+        np.testing.assert_equal(x0, np.ones(2))
+        np.testing.assert_almost_equal(x, np.array([1, -2]), decimal=7)
+
+    def test_projections(self):
+        T = Composition([
+            HalfSpace(np.array([-1, 1]), 0),
+            Ball(np.zeros(2), 1)
+        ])
+        x0 = np.array([5., 10.])
+        mainge = find(T, x0, method='Mainge2008', tol=1e-8, options={'inertia': itertools.repeat(0.5)}, full_output=True)
+        mann = find(T, x0, method='Krasnoselskii-Mann', tol=1e-8, full_output=True)
+        self.assertTrue(mainge.success)
+        self.assertLess(mainge.nfev, mann.nfev)
+        self.assertIn(mainge.x, T)
+
+    def test_restart(self):
+        T = Intersection([
+            HalfSpace(np.array([-1, 1]), 0),
+            Ball(np.zeros(2), 1)
+        ])
+        options = {'inertia': itertools.repeat(0.9), 'maxiter': 1000}
+        restarted = find(T, np.array([5., 10.]), method='Mainge2008', tol=1e-6, options=options, full_output=True)
+        plain = find(T, np.array([5., 10.]), method='Mainge2008', tol=1e-6, options=dict(options, restart=False), full_output=True)
+        self.assertTrue(restarted.success)
+        self.assertLess(restarted.nfev, plain.nfev)
+
+
+class TestFindBot2023(unittest.TestCase):
+    def test_rotation(self):
+        T = _Rotation(np.array([1, -2]))
+        x0 = np.ones(2)
+        res = find(T, x0, method='Bot2023', tol=1e-8, full_output=True)
+        self.assertIsNot(res.x, x0)
+        np.testing.assert_equal(x0, np.ones(2))
+        np.testing.assert_almost_equal(res.x, np.array([1, -2]), decimal=7)
+        self.assertLess(res.nfev, find(T, x0, method='Krasnoselskii-Mann', tol=1e-8, full_output=True).nfev)
+
+    def test_projections(self):
+        T = Composition([
+            HalfSpace(np.array([-1, 1]), 0),
+            Ball(np.zeros(2), 1)
+        ])
+        x = find(T, np.array([5, 10]), method='Bot2023', tol=1e-8)
+        np.testing.assert_almost_equal(x, np.array([2 ** -0.5, 2 ** -0.5]), decimal=7)
+
+    def test_invalid_alpha(self):
+        with self.assertRaises(ValueError):
+            find(_Rotation(np.array([1, -2])), np.ones(2), method='Bot2023', options={'alpha': 2})
+
+
+class TestFindSuperMann(unittest.TestCase):
+    def test_rotation(self):
+        T = _Rotation(np.array([1, -2]))
+        x0 = np.ones(2)
+        res = find(T, x0, method='SuperMann', tol=1e-10, full_output=True)
+        self.assertIsNot(res.x, x0)
+        np.testing.assert_equal(x0, np.ones(2))
+        np.testing.assert_almost_equal(res.x, np.array([1, -2]), decimal=9)
+        self.assertLess(res.nfev, 100)
+
+    def test_projections(self):
+        T = Composition([
+            HalfSpace(np.array([1, 0.05]), 0),
+            HalfSpace(np.array([-1, 0.05]), 0)
+        ])
+        res = find(T, np.array([5, 10]), method='SuperMann', tol=1e-10, full_output=True)
+        self.assertTrue(res.success)
+        self.assertLess(np.linalg.norm(T(res.x) - res.x), 1e-10)
+        self.assertLess(res.nfev, find(T, np.array([5., 10.]), method='Krasnoselskii-Mann', tol=1e-10, full_output=True).nfev)
+
+    def test_memory(self):
+        T = _Rotation(np.array([1, -2]))
+        x = find(T, np.ones(2), method='SuperMann', tol=1e-10, options={'memory': 1})
+        np.testing.assert_almost_equal(x, np.array([1, -2]), decimal=9)
+
+
+class TestFindARock(unittest.TestCase):
+    def setUp(self):
+        self.T = Intersection([
+            Box(-np.ones(100), np.ones(100)),
+            HalfSpace(np.linspace(-1, 1, 100), -1.),
+            Ball(np.zeros(100), 5.)
+        ])
+        self.x0 = np.linspace(-3, 3, 100)
+
+    def test_sequential(self):
+        res = find(self.T, self.x0, method='ARock', tol=1e-8, full_output=True, options={'seed': 0, 'blocks': 7})
+        self.assertTrue(res.success)
+        self.assertLess(np.linalg.norm(self.T(res.x) - res.x), 1e-8)
+        np.testing.assert_equal(self.x0, np.linspace(-3, 3, 100))
+        x = find(self.T, self.x0, method='ARock', tol=1e-8, options={'seed': 0, 'blocks': 7})
+        np.testing.assert_equal(x, res.x)
+
+    def test_threads(self):
+        res = find(self.T, self.x0, method='ARock', tol=1e-8, full_output=True, options={'threads': 3, 'seed': 1})
+        self.assertTrue(res.success)
+        self.assertLess(np.linalg.norm(self.T(res.x) - res.x), 1e-8)
+
+    def test_not_separable(self):
+        with self.assertRaises(ValueError):
+            find(_Rotation(np.array([1, -2])), np.ones(2), method='ARock')
+        with self.assertRaises(ValueError):
+            find(Composition([Ball(np.zeros(2), 1.), Box(0., 1.)]), np.ones(2), method='ARock')
+
+
 class TestFindHalpern(unittest.TestCase):
     def test_rotation(self):
         T = _Rotation(np.array([1, -2]))
@@ -82,3 +240,184 @@ class TestFindHalpern(unittest.TestCase):
         self.assertIsNot(x, x0)
         np.testing.assert_equal(x0, np.array([5, 10]))
         np.testing.assert_almost_equal(x, np.array([2 ** -0.5, 2 ** -0.5]), decimal=2)
+
+    def test_optimal(self):
+        T = _Rotation(np.array([1, -2]))
+        steps = []
+        x = find(T, np.ones(2), method='Halpern', tol=1e-8, options={'steps': 'optimal', 'callback': lambda x, step: steps.append(step)})
+        np.testing.assert_almost_equal(x, np.array([1, -2]), decimal=7)
+        self.assertEqual(steps[:3], [1 / 2, 1 / 3, 1 / 4])
+
+    def test_restarted(self):
+        T = Composition([
+            HalfSpace(np.array([-1, 1]), 0),
+            Ball(np.zeros(2), 1)
+        ])
+        x0 = np.array([5, 10])
+        x = find(T, x0, method='Halpern', tol=1e-8, options={'steps': 'restarted', 'maxiter': 1000})
+        self.assertIsNot(x, x0)
+        np.testing.assert_equal(x0, np.array([5, 10]))
+        np.testing.assert_almost_equal(x, np.array([2 ** -0.5, 2 ** -0.5]), decimal=7)
+
+    def test_ndarray_steps(self):
+        T = _Rotation(np.array([1, -2]))
+        steps = []
+        find(T, np.ones(2), method='Halpern', options={'steps': np.full(50, .5), 'maxiter': 100, 'callback': lambda x, step: steps.append(step)})
+        self.assertEqual(steps, [.5] * 50)
+        with self.assertRaises(ValueError):
+            find(T, np.ones(2), method='Halpern', options={'steps': 'unknown', 'maxiter': 100})
+
+
+class TestAccuracy(unittest.TestCase):
+    def test_schedule(self):
+        a = InexactBall(np.zeros(2), 1.)
+        T = Intersection([a, HalfSpace(np.array([1., 1.]), 0.)])
+        res = find(T, np.array([3., 2.]), tol=1e-8, options={'accuracy': 1e-2}, full_output=True)
+        self.assertTrue(res.success)
+        eps = np.array(a.accuracies)
+        self.assertEqual(eps.shape, (res.nfev,))
+        self.assertEqual(eps[0], 1e-2)
+        self.assertTrue((eps[1:] <= 0.1 * res.residuals[:-1]).all())
+        self.assertTrue((eps <= 1e-2 / np.arange(1, eps.shape[0] + 1) ** 2).all())
+        exact = Intersection([Ball(np.zeros(2), 1.), HalfSpace(np.array([1., 1.]), 0.)])
+        self.assertLess(np.linalg.norm(exact(res.x) - res.x), 1e-8)
+
+    def test_several_evaluations(self):
+        # Each evaluation is given its own accuracy, even if a solver evaluates T several times per iteration.
+        a = InexactBall(np.zeros(2), 1.)
+        trace = _Trace(a, accuracy=1e-2)
+        for _ in range(3):
+            trace(np.array([3., 2.]))
+        np.testing.assert_almost_equal(a.accuracies, [1e-2, 1e-2 / 4, 1e-2 / 9])
+
+    def test_exact(self):
+        a = InexactBall(np.zeros(2), 1.)
+        find(a, np.array([3., 2.]))
+        self.assertEqual(a.accuracies, [])
+        np.testing.assert_almost_equal(a.evaluate(np.array([3., 4.])), np.array([.6, .8]))
+
+
+class TestWarmStart(unittest.TestCase):
+    def setUp(self):
+        self.T = Intersection([Ball(np.zeros(10), 3.), Box(-np.ones(10), np.ones(10))])
+        self.x0 = np.linspace(-4, 4, 10)
+
+    def test_krasnoselskii_mann(self):
+        res = find(self.T, self.x0, tol=1e-8, full_output=True)
+        self.T.add(HalfSpace(np.ones(10), -1.))
+        cold = find(self.T, self.x0, tol=1e-8, full_output=True)
+        warm = find(self.T, self.x0, tol=1e-8, full_output=True, options={'warm_start': res})
+        self.assertTrue(warm.success)
+        self.assertLess(warm.nit, cold.nit)
+
+    def test_halpern(self):
+        res = find(self.T, self.x0, method='Halpern', options={'maxiter': 100}, full_output=True)
+        warm = find(self.T, self.x0, method='Halpern', options={'maxiter': 100, 'warm_start': res}, full_output=True)
+        cold = find(self.T, self.x0, method='Halpern', options={'maxiter': 200}, full_output=True)
+        np.testing.assert_almost_equal(warm.x, cold.x)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            find(self.T, self.x0, options={'warm_start': np.zeros(10)})
+        res = find(Ball(np.zeros(5), 1.), np.zeros(5), full_output=True)
+        with self.assertRaises(ValueError):
+            find(self.T, self.x0, options={'warm_start': res})
+
+
+class TestDiagnostics(unittest.TestCase):
+    def test_infeasible(self):
+        T = _DouglasRachford(Ball(np.zeros(2), 1.), Ball(np.array([3., 1.]), 1.))
+        for method in ['Krasnoselskii-Mann', 'Mainge2008']:
+            res = find(T, np.array([.5, 2.]), method=method, options={'infeasibility': 1e-6, 'maxiter': 10000}, full_output=True)
+            self.assertFalse(res.success)
+            self.assertEqual(res.status, 'infeasible')
+            self.assertLess(res.nit, 1000)
+            self.assertEqual(res.residuals.shape, (res.nit + 1,))
+            # The gap vector between the two balls.
+            np.testing.assert_almost_equal(np.linalg.norm(res.certificate), 10 ** 0.5 - 2, decimal=4)
+
+    def test_stagnation(self):
+        T = _DouglasRachford(Ball(np.zeros(2), 1.), Ball(np.array([3., 1.]), 1.))
+        res = find(T, np.array([.5, 2.]), options={'stagnation': 1e-3, 'patience': 20, 'maxiter': 10000}, full_output=True)
+        self.assertEqual(res.status, 'stagnation')
+        self.assertIsNotNone(res.certificate)
+
+    def test_certificate(self):
+        # The certificate is the displacement at the returned point, even if T is evaluated elsewhere after it.
+        T = _DouglasRachford(Ball(np.zeros(2), 1.), Ball(np.array([3., 1.]), 1.))
+        for method in ['Krasnoselskii-Mann', 'Hishinuma2015', 'Halpern', 'SuperMann']:
+            res = find(T, np.array([.5, 2.]), method=method, options={'stagnation': 1e-3, 'patience': 20, 'maxiter': 10000}, full_output=True)
+            self.assertEqual(res.status, 'stagnation')
+            np.testing.assert_almost_equal(res.certificate, res.x - T(res.x))
+
+    def test_feasible(self):
+        T = _DouglasRachford(Ball(np.zeros(2), 1.), Ball(np.array([1., 1.]), 1.))
+        options = {'infeasibility': 1e-6, 'stagnation': 1e-3}
+        for method in ['Krasnoselskii-Mann', 'Mainge2008', 'Bot2023']:
+            res = find(T, np.array([.5, 2.]), method=method, tol=1e-6, options=dict(options, maxiter=10000), full_output=True)
+            self.assertEqual(res.status, 'tol')
+            self.assertIsNone(res.certificate)
+
+    def test_processes(self):
+        with self.assertRaises(ValueError):
+            find(Ball(np.zeros(2), 1.), np.ones(2), options={'processes': 2, 'stagnation': 1e-3})
+        with self.assertRaises(ValueError):
+            find(InexactBall(np.zeros(2), 1.), np.ones(2), options={'processes': 2, 'accuracy': 1e-2})
+
+
+class TestFindResult(unittest.TestCase):
+    def test_full_output(self):
+        T = _Rotation(np.array([1, -2]))
+        for method in ['Krasnoselskii-Mann', 'Hishinuma2015', 'Halpern', 'Mainge2008', 'Bot2023', 'SuperMann']:
+            res = find(T, np.ones(2), method=method, tol=1e-8, full_output=True)
+            self.assertIsInstance(res, FindResult)
+            self.assertTrue(res.success)
+            self.assertEqual(res.status, 'tol')
+            np.testing.assert_almost_equal(res.x, np.array([1, -2]), decimal=7)
+            self.assertEqual(res.residuals.shape, (res.nit + 1,))
+            self.assertEqual(res.residual, res.residuals[-1])
+            self.assertLess(res.residual, 1e-8)
+            self.assertGreaterEqual(res.nfev, res.nit)
+            self.assertEqual(set(res.time), {'setup', 'map', 'update'})
+
+    def test_maxiter(self):
+        T = _Rotation(np.array([1, -2]))
+        for method in ['Krasnoselskii-Mann', 'Hishinuma2015', 'Halpern', 'Mainge2008', 'Bot2023']:
+            res = find(T, np.ones(2), method=method, tol=1e-8, options={'maxiter': 10}, full_output=True)
+            self.assertFalse(res.success)
+            self.assertEqual(res.status, 'maxiter')
+            self.assertEqual(res.nit, 10)
+            self.assertEqual(res.residuals.shape, (10,))
+
+    def test_huge_maxiter(self):
+        # The residuals are not preallocated for maxiter.
+        T = Ball(np.zeros(2), 1.)
+        for method in ['Krasnoselskii-Mann', 'Hishinuma2015', 'SuperMann']:
+            x = find(T, np.array([3., 4.]), method=method, options={'maxiter': 10 ** 11})
+            self.assertLess(np.linalg.norm(x), 1 + 1e-6)
+            res = find(T, np.array([3., 4.]), method=method, options={'maxiter': 10 ** 11}, full_output=True)
+            self.assertTrue(res.success)
+            self.assertEqual(res.residuals.shape, (res.nit + 1,))
+
+    def test_steps_exhausted(self):
+        T = _Rotation(np.array([1, -2]))
+        for method in ['Krasnoselskii-Mann', 'Halpern']:
+            res = find(T, np.ones(2), method=method, tol=1e-8, options={'steps': np.full(5, .5), 'maxiter': 10}, full_output=True)
+            self.assertFalse(res.success)
+            self.assertEqual(res.status, 'steps')
+            self.assertEqual(res.nit, 5)
+        res = find(T, np.ones(2), tol=1e-8, options={'steps': [.5] * 5}, full_output=True)
+        self.assertEqual(res.status, 'steps')
+
+    def test_residuals(self):
+        T = _Rotation(np.array([1, -2]))
+        res = find(T, np.ones(2), method='Krasnoselskii-Mann', tol=1e-8, options={'steps': itertools.repeat(0.5)}, full_output=True)
+        self.assertEqual(res.nfev, res.nit + 1)
+        self.assertTrue((np.diff(res.residuals) <= 0).all())
+        self.assertGreater(res.residuals.shape[0], 256)
+
+    def test_attributes(self):
+        res = FindResult(x=np.zeros(1))
+        self.assertIs(res.x, res['x'])
+        with self.assertRaises(AttributeError):
+            res.nit
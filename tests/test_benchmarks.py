@@ -0,0 +1,39 @@
+import os
+import json
+import unittest
+import tempfile
+import numpy as np
+from fpmlib.projections import Ball
+from fpmlib.benchmarks import *
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_result(self):
+        baseline = stream(1 << 12, repeat=1, duration=1e-3)
+        self.assertEqual(set(baseline), {'copy', 'scale', 'add', 'triad', 'baseline'})
+        self.assertEqual(baseline['baseline'], max(v for k, v in baseline.items() if k != 'baseline'))
+        result = benchmark(Ball(np.zeros(1 << 12), 1.), 1 << 12, repeat=1, duration=1e-3, baseline=baseline)
+        self.assertEqual((result['n'], result['map']), (1 << 12, 'Ball'))
+        self.assertEqual(set(result['methods']), {'Krasnoselskii-Mann', 'Hishinuma2015', 'Halpern'})
+        for steps in result['methods'].values():
+            self.assertEqual(set(steps), {'map', 'residual', 'scaling', 'accumulation'})
+            for step in steps.values():
+                self.assertGreater(step['seconds'], 0)
+                self.assertAlmostEqual(step['ns_per_element'], step['seconds'] / (1 << 12) * 1e9)
+                self.assertAlmostEqual(step['fraction'], step['bytes'] / step['seconds'] / baseline['baseline'])
+        self.assertEqual(json.loads(json.dumps(result)), result)
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as path:
+            filename = os.path.join(path, 'result.json')
+            main(['--size', '1024', '--methods', 'Halpern', '--repeat', '1', '--duration', '1e-3', '--output', filename])
+            with open(filename) as f:
+                result = json.load(f)
+        self.assertEqual(list(result['methods']), ['Halpern'])
+        self.assertEqual(result['methods']['Halpern']['accumulation']['bytes'], 3 * 8 * 1024)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            benchmark(n=16, methods=['SuperMann'])
+        with self.assertRaises(ValueError):
+            benchmark(Ball(np.zeros(3), 1.), 16)
@@ -0,0 +1,116 @@
+import numpy as np
+import unittest
+import tempfile
+from fpmlib.projections import Ball, Box, HalfSpace, Polyhedron
+from fpmlib.nonexpansive import Intersection, MapCache
+from fpmlib.typing import NonexpansiveMap
+from fpmlib.cache import *
+
+
+def _problem(r=5.):
+    return Intersection([
+        Box(-np.ones(10), np.ones(10)),
+        HalfSpace(np.linspace(-1, 1, 10), -1.),
+        Ball(np.zeros(10), r)
+    ])
+
+
+class _Identity(NonexpansiveMap):
+    ndim = None
+
+    def __call__(self, x):
+        return x.copy()
+
+    def __contains__(self, x):
+        return True
+
+
+class TestSolutionCache(unittest.TestCase):
+    def test_hit(self):
+        cache = SolutionCache()
+        x0 = np.linspace(-3, 3, 10)
+        res = cache.find(_problem(), x0, full_output=True)
+        self.assertEqual(res.cache, 'miss')
+        hit = cache.find(_problem(), x0.copy(), full_output=True)
+        self.assertEqual(hit.cache, 'hit')
+        np.testing.assert_equal(hit.x, res.x)
+        self.assertIsNot(hit.x, res.x)
+        self.assertEqual((cache.hits, cache.misses, cache.hit_rate), (1, 1, .5))
+        self.assertEqual(cache.saved_iterations, res.nit)
+
+    def test_mutation(self):
+        # Changing a returned result, either of a miss or of a hit, does not change the cached entry.
+        cache = SolutionCache()
+        x0 = np.linspace(-3, 3, 10)
+        res = cache.find(_problem(), x0, full_output=True)
+        residuals, time = res.residuals.copy(), dict(res.time)
+        for r in (res, cache.find(_problem(), x0, full_output=True)):
+            r.x[:] = 0.
+            r.residuals[:] = -1.
+            r.time['map'] = -1.
+        hit = cache.find(_problem(), x0, full_output=True)
+        self.assertEqual(hit.cache, 'hit')
+        self.assertTrue(hit.x.any())
+        np.testing.assert_equal(hit.residuals, residuals)
+        self.assertEqual(hit.time, time)
+
+    def test_key(self):
+        cache = SolutionCache(warm_start=False)
+        x0 = np.linspace(-3, 3, 10)
+        cache.find(_problem(), x0)
+        self.assertEqual(cache.find(_problem(4.), x0, full_output=True).cache, 'miss')
+        self.assertEqual(cache.find(_problem(), x0, tol=1e-8, full_output=True).cache, 'miss')
+        self.assertEqual(cache.find(_problem(), x0, options={'maxiter': 3}, full_output=True).cache, 'miss')
+        self.assertEqual(cache.find(_problem(), x0 + 1e-3, full_output=True).cache, 'miss')
+        shared = MapCache()
+        self.assertEqual(cache.find(shared.root(_problem()), x0, full_output=True).cache, 'miss')
+        self.assertEqual(cache.find(MapCache().root(_problem()), x0, full_output=True).cache, 'hit')
+        P = Polyhedron(np.eye(10), np.ones(10))
+        cache.find(P, x0)
+        self.assertEqual(cache.find(Polyhedron(np.eye(10), np.ones(10)), x0, full_output=True).cache, 'hit')
+        T = _problem()
+        c = Box(np.zeros(10))
+        T.add(c)
+        T.remove(c)
+        self.assertEqual(cache.find(T, x0, full_output=True).cache, 'hit')
+
+    def test_warm_start(self):
+        cache = SolutionCache()
+        x0 = np.linspace(-3, 3, 10)
+        cold = cache.find(_problem(), x0, full_output=True)
+        res = cache.find(_problem(), x0 + 1e-2, full_output=True)
+        self.assertEqual(res.cache, 'warm')
+        self.assertTrue(res.success)
+        self.assertLess(res.nit, cold.nit)
+        self.assertEqual(cache.saved_iterations, cold.nit - res.nit)
+        self.assertEqual(cache.find(_problem(), x0 + 1e-2, method='Halpern', options={'maxiter': 10}, full_output=True).cache, 'miss')
+
+    def test_bypass(self):
+        cache = SolutionCache()
+        res = cache.find(_Identity(), np.ones(3), full_output=True)
+        self.assertEqual(res.cache, 'bypass')
+        res = cache.find(_problem(), np.ones(10), options={'callback': lambda x, s: None}, full_output=True)
+        self.assertEqual(res.cache, 'bypass')
+        self.assertEqual((cache.bypasses, len(cache)), (2, 0))
+
+    def test_lru(self):
+        cache = SolutionCache(maxsize=2, warm_start=False)
+        for i in range(3):
+            cache.find(_problem(), np.full(10, i + 2.))
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.find(_problem(), np.full(10, 2.), full_output=True).cache, 'miss')
+        self.assertEqual(cache.find(_problem(), np.full(10, 4.), full_output=True).cache, 'hit')
+        with self.assertRaises(ValueError):
+            SolutionCache(maxsize=0)
+
+    def test_path(self):
+        with tempfile.TemporaryDirectory() as path:
+            x0 = np.linspace(-3, 3, 10)
+            res = SolutionCache(path=path).find(_problem(), x0, full_output=True)
+            cache = SolutionCache(path=path)
+            self.assertEqual(len(cache), 1)
+            hit = cache.find(_problem(), x0, full_output=True)
+            self.assertEqual(hit.cache, 'hit')
+            np.testing.assert_equal(hit.x, res.x)
+            self.assertEqual((hit.nit, hit.status), (res.nit, res.status))
+            self.assertIsNone(hit.certificate)
@@ -0,0 +1,92 @@
+import numpy as np
+import unittest
+from math import sin, cos
+from fpmlib.typing import NonexpansiveMap
+from fpmlib.algorithms import find
+from fpmlib.linear import *
+
+
+def _rotation(alpha):
+    return np.array([[cos(alpha), -sin(alpha)], [sin(alpha), cos(alpha)]])
+
+
+class TestLinearMap(unittest.TestCase):
+    def test_call(self):
+        T = LinearMap(_rotation(0.5))
+        self.assertIsInstance(T, NonexpansiveMap)
+        self.assertEqual(T.ndim, 2)
+        self.assertAlmostEqual(T.norm, 1.)
+        np.testing.assert_almost_equal(T(np.array([1., 0.])), np.array([cos(0.5), sin(0.5)]))
+        np.testing.assert_almost_equal(T(np.array([1, 0])), np.array([cos(0.5), sin(0.5)]))
+        self.assertTrue(np.zeros(2) in T)
+        self.assertFalse(np.ones(2) in T)
+
+    def test_batch(self):
+        M = np.array([[0.5, 0.2], [0.1, -0.3]])
+        T = LinearMap(M)
+        X = np.arange(6.).reshape(3, 2)
+        np.testing.assert_almost_equal(T(X), X.dot(M.T))
+        out = np.empty((3, 2))
+        self.assertIs(T(X, out=out), out)
+        np.testing.assert_almost_equal(out, X.dot(M.T))
+        self.assertIs(T(X, out=X), X)
+        np.testing.assert_almost_equal(X, out)
+        x = np.array([1., 2.])
+        self.assertIs(T(x, out=x), x)
+        np.testing.assert_almost_equal(x, M.dot(np.array([1., 2.])))
+
+    def test_norm(self):
+        with self.assertRaises(ValueError):
+            LinearMap(np.array([[1., 1.], [0., 1.]]))
+        with self.assertRaises(ValueError):
+            LinearMap(np.ones((2, 3)))
+        T = LinearMap(np.array([[1., 1.], [0., 1.]]), check=False)
+        self.assertIsNone(T.norm)
+        self.assertAlmostEqual(LinearMap(np.diag([0.5, -0.25])).norm, 0.5)
+
+    def test_scipy(self):
+        try:
+            from scipy.sparse import csr_matrix
+            from scipy.sparse.linalg import aslinearoperator
+        except ImportError:
+            self.skipTest('SciPy is not installed.')
+        M = np.array([[0., 0.5, 0.], [0.5, 0., 0.], [0., 0., 0.8]])
+        X = np.arange(6.).reshape(2, 3)
+        for A in (csr_matrix(M), aslinearoperator(M)):
+            T = LinearMap(A)
+            self.assertAlmostEqual(T.norm, 0.8)
+            np.testing.assert_almost_equal(T(np.ones(3)), M.dot(np.ones(3)))
+            np.testing.assert_almost_equal(T(X), X.dot(M.T))
+            out = np.empty(3)
+            self.assertIs(T(np.ones(3), out=out), out)
+            np.testing.assert_almost_equal(out, M.dot(np.ones(3)))
+
+
+class TestAffineMap(unittest.TestCase):
+    def test_find(self):
+        # The rotation around [1, -2].
+        M, c = _rotation(0.1), np.array([1., -2.])
+        T = AffineMap(M, c - M.dot(c))
+        np.testing.assert_almost_equal(find(T, np.ones(2), tol=1e-10), c, decimal=8)
+        self.assertTrue(c in T)
+        x = np.ones(2)
+        self.assertIs(T(x, out=x), x)
+        np.testing.assert_almost_equal(x, M.dot(np.ones(2) - c) + c)
+        np.testing.assert_almost_equal(T(np.array([c, c])), np.array([c, c]))
+
+    def test_identity_operator(self):
+        try:
+            from scipy.sparse.linalg import LinearOperator
+        except ImportError:
+            self.skipTest('SciPy is not installed.')
+        # The operator returns its input itself, which must be kept unchanged.
+        T = AffineMap(LinearOperator((2, 2), matvec=lambda v: v, rmatvec=lambda v: v, dtype=float), np.array([1., 2.]))
+        x = np.array([3., 4.])
+        np.testing.assert_equal(T(x), np.array([4., 6.]))
+        np.testing.assert_equal(x, np.array([3., 4.]))
+        self.assertIs(T(x, out=x), x)
+        np.testing.assert_equal(x, np.array([4., 6.]))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            AffineMap(np.eye(2), np.zeros(3))
@@ -0,0 +1,79 @@
+import numpy as np
+import unittest
+from fpmlib.projections import Box
+from fpmlib.linear import LinearMap
+from fpmlib.nonexpansive import Composition
+from fpmlib.algorithms import find
+from fpmlib.multilevel import *
+
+
+def _obstacle(shape):
+    # The obstacle problem on a 1-D grid: the lazy Jacobi averaging followed by the projection onto the obstacle.
+    n = shape[0]
+    M = np.eye(n) / 2
+    i = np.arange(n - 1)
+    M[i, i + 1] += .25
+    M[i + 1, i] += .25
+    M[0, 0] += .25
+    M[-1, -1] += .25
+    t = np.linspace(0, 1, n)
+    lb, ub = 0.5 - 8 * (t - 0.5) ** 2, np.full(n, np.inf)
+    lb[0] = ub[0] = lb[-1] = ub[-1] = 0.
+    return Composition([Box(lb, ub), LinearMap(M)])
+
+
+class TestGrid(unittest.TestCase):
+    def test_linear(self):
+        x = np.arange(9.)
+        np.testing.assert_equal(restrict(x), np.arange(0., 9., 2.))
+        np.testing.assert_equal(prolong(restrict(x), x.shape), x)
+        X = np.add.outer(np.arange(9.), 2 * np.arange(5.))
+        self.assertEqual(restrict(X).shape, (5, 3))
+        np.testing.assert_almost_equal(prolong(restrict(X), X.shape), X)
+
+    def test_full_weighting(self):
+        x = np.array([0., 4., 0., 0., 8., 0.])
+        np.testing.assert_equal(restrict(x), np.array([0., 1., 4.]))
+        np.testing.assert_equal(prolong(np.array([0., 1., 2.]), (6,)), np.array([0., .5, 1., 1.5, 2., 2.]))
+        with self.assertRaises(ValueError):
+            prolong(np.zeros(3), (7,))
+
+
+class TestFindMultilevel(unittest.TestCase):
+    def test_obstacle(self):
+        n = 65
+        plain = find(_obstacle((n,)), np.zeros(n), tol=1e-8, options={'maxiter': 100000}, full_output=True)
+        res = find_multilevel(_obstacle, np.zeros(n), levels=4, tol=1e-8, full_output=True)
+        self.assertTrue(res.success)
+        self.assertEqual([r.x.shape[0] for r in res.levels], [9, 17, 33, 65])
+        self.assertEqual(res.nit, sum(r.nit for r in res.levels))
+        self.assertEqual(res.nfev, sum(r.nfev for r in res.levels))
+        self.assertLess(res.nit * 5, plain.nit)
+        # The work in the evaluations of points, which is dominated by the coarse grids.
+        self.assertLess(sum(r.nfev * r.x.shape[0] for r in res.levels) * 20, plain.nfev * n)
+        np.testing.assert_almost_equal(res.x, plain.x, decimal=5)
+
+    def test_sequence(self):
+        maps = [_obstacle((n,)) for n in (33, 17, 9)]
+        x = find_multilevel(maps, np.zeros(33), tol=1e-8)
+        np.testing.assert_equal(x, find_multilevel(_obstacle, np.zeros(33), levels=3, tol=1e-8))
+        with self.assertRaises(ValueError):
+            find_multilevel(maps, np.zeros(65))
+        res = find(maps[0], np.zeros(33), tol=1e-8, full_output=True)
+        with self.assertRaises(ValueError):
+            find_multilevel(maps, np.zeros(33), options={'warm_start': res})
+
+    def test_shape(self):
+        T = lambda shape: Box(np.zeros(int(np.prod(shape))), np.ones(int(np.prod(shape))))
+        res = find_multilevel(T, np.linspace(-1, 2, 35), shape=(5, 7), full_output=True)
+        self.assertEqual([r.x.shape[0] for r in res.levels], [4, 12, 35])
+        np.testing.assert_almost_equal(res.x, np.clip(res.x, 0, 1))
+        x = find_multilevel(T, np.linspace(-1, 2, 35).reshape(5, 7))
+        self.assertEqual(x.shape, (5, 7))
+        np.testing.assert_almost_equal(x.reshape(-1), res.x)
+        with self.assertRaises(ValueError):
+            find_multilevel(T, np.zeros(35), shape=(5, 6))
+        with self.assertRaises(ValueError):
+            find_multilevel(T, np.zeros((7, 5)), shape=(5, 7))
+        with self.assertRaises(ValueError):
+            find_multilevel(T((5, 7)), np.zeros(35), shape=(5, 7))
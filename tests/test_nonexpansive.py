@@ -1,7 +1,13 @@
 import numpy as np
 import unittest
-from fpmlib.projections import HalfSpace, Box, Ball
+import pickle
+import itertools
+import threading
+from fpmlib.projections import HalfSpace, Box, Ball, Ellipsoid, SecondOrderCone, PSDCone
+from fpmlib.typing import NonexpansiveMap, FirmlyNonexpansiveMap, MetricProjection
 from fpmlib.nonexpansive import *
+from fpmlib.nonexpansive import _declares
+from .fixtures import InexactBall
 
 
 class TestIntersection(unittest.TestCase):
@@ -46,6 +52,35 @@ class TestIntersection(unittest.TestCase):
                 Box(np.array([1, 2, 3])),
             ])
 
+    def test_add_remove(self):
+        a, b, c = HalfSpace(np.array([1]), 1), HalfSpace(np.array([-1]), 1), Box(np.array([0]))
+        p = Intersection([a, b])
+        p.add(c)
+        self.assertEqual(len(p), 3)
+        np.testing.assert_almost_equal(p(np.array([-2])), np.array([-1]))
+        self.assertFalse(np.array([-1]) in p)
+        p.remove(a)
+        self.assertEqual(len(p), 2)
+        np.testing.assert_almost_equal(p(np.array([-2])), np.array([-0.5]))
+        p.add(a)
+        p.add(a)
+        p.remove(a)
+        p.remove(b)
+        p.remove(c)
+        np.testing.assert_almost_equal(p(np.array([2])), np.array([1]))
+        with self.assertRaises(ValueError):
+            p.remove(b)
+        with self.assertRaises(ValueError):
+            p.remove(a)
+        with self.assertRaises(ValueError):
+            p.add(Box(np.array([1, 2])))
+
+    def test_add_ndim(self):
+        p = Intersection([Box(0)])
+        self.assertIsNone(p.ndim)
+        p.add(HalfSpace(np.array([1, 1]), 1))
+        self.assertEqual(p.ndim, 2)
+
 class TestComposition(unittest.TestCase):
     def test_1d(self):
         # p := [-1, 1]
@@ -88,3 +123,337 @@ class TestComposition(unittest.TestCase):
         nonexp2 = Box(0)
         with self.assertRaises(ValueError):
             Composition([nonexp1, nonexp2])
+
+    def test_inplace(self):
+        maps = [HalfSpace((np.array([i]), np.array([1.])), 1., ndim=4) for i in range(4)]
+        p = Composition(maps + [Box(0)])
+        x = np.array([3., -1., 2., 5.])
+        np.testing.assert_equal(p(x), np.array([1., 0., 1., 1.]))
+        np.testing.assert_equal(x, np.array([3., -1., 2., 5.]))
+        # A subclass overriding __call__ without `out` is called without it.
+        p = Composition([_FailingBox(0), Box(ub=1)])
+        np.testing.assert_equal(p(np.array([-1, 2])), np.array([0., 1.]))
+
+
+class _FailingBox(Box):
+    def __call__(self, x):
+        if (x > 100).any():
+            raise ArithmeticError('too large')
+        return super().__call__(x)
+
+
+class TestMapStream(unittest.TestCase):
+    def setUp(self):
+        self.p = Composition([Box(np.zeros(2), np.ones(2)), HalfSpace(np.array([1, 1]), 1), Box(-np.ones(2))])
+        self.points = [np.array([i, -i], dtype=float) for i in range(-10, 10)]
+
+    def test_order(self):
+        for batch_size in (None, 1, 3):
+            ys = list(Composition([Box(np.zeros(2), np.ones(2)), Box(-np.ones(2))]).map_stream(iter(self.points), maxsize=1, batch_size=batch_size))
+            self.assertEqual(len(ys), len(self.points))
+            for x, y in zip(self.points, ys):
+                np.testing.assert_equal(y, np.clip(x, 0, 1))
+        ys = list(self.p.map_stream(self.points))
+        for x, y in zip(self.points, ys):
+            np.testing.assert_equal(y, self.p(x))
+        self.assertEqual(list(self.p.map_stream([])), [])
+
+    def test_batch(self):
+        # Ball and HalfSpace are given the rows one by one, and SecondOrderCone, Ellipsoid and PSDCone the whole batch.
+        p = Composition([
+            Ball(np.zeros(3), 1.), HalfSpace(np.array([1., 1., 0.]), 1.), SecondOrderCone(3),
+            Ellipsoid(np.array([[2., 1., 0.], [1., 2., 0.], [0., 0., 1.]])), PSDCone(2),
+        ])
+        points = [np.array([i, -i, 2. * i], dtype=float) for i in range(-5, 5)]
+        ys = list(p.map_stream(points, batch_size=4))
+        self.assertEqual(len(ys), len(points))
+        for x, y in zip(points, ys):
+            np.testing.assert_almost_equal(y, p(x))
+        self.assertEqual([_declares(m, '_BATCH') for m in p._maps], [False, False, True, True, True])
+
+    def test_error(self):
+        p = Composition([Box(np.zeros(2)), _FailingBox(-np.ones(2))])
+        with self.assertRaises(ArithmeticError):
+            list(p.map_stream(self.points + [np.array([200., 0.])] + self.points))
+
+    def test_close(self):
+        stream = self.p.map_stream(itertools.repeat(np.array([3., 0.])), maxsize=2)
+        np.testing.assert_almost_equal(next(stream), np.array([1., 0.]))
+        stream.close()
+        self.assertFalse([t for t in threading.enumerate() if t.name == 'Composition.map_stream'])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            self.p.map_stream(self.points, maxsize=0)
+        with self.assertRaises(ValueError):
+            self.p.map_stream(self.points, batch_size=0)
+
+
+class TestRelaxation(unittest.TestCase):
+    def test_behavior(self):
+        p = Relaxation(Box(-1, 1), 0.5)
+        np.testing.assert_almost_equal(p(np.array([3., 0.])), np.array([2., 0.]))
+        np.testing.assert_equal(p(np.array([1., 0.])), np.array([1., 0.]))
+        self.assertTrue(np.array([1., 0.]) in p)
+        self.assertFalse(np.array([3., 0.]) in p)
+
+    def test_firmly_nonexpansive(self):
+        nonexp = Intersection([Box(0)])
+        self.assertIsInstance(Relaxation(nonexp, 0.5), FirmlyNonexpansiveMap)
+        self.assertNotIsInstance(Relaxation(nonexp, 0.8), FirmlyNonexpansiveMap)
+        self.assertIsInstance(Relaxation(Box(0), 1.), FirmlyNonexpansiveMap)
+        self.assertNotIsInstance(Relaxation(Box(0), 1.5), FirmlyNonexpansiveMap)
+
+    def test_collapse(self):
+        p = Relaxation(Relaxation(Box(-1, 1), 0.5), 0.5)
+        self.assertIsInstance(p._T, Box)
+        self.assertEqual(p._lam, 0.25)
+        self.assertEqual(p.averagedness, 0.125)
+        np.testing.assert_almost_equal(p(np.array([5.])), np.array([4.]))
+
+    def test_invalid_parameter(self):
+        with self.assertRaises(ValueError):
+            Relaxation(Intersection([Box(0)]), 1.5)
+        with self.assertRaises(ValueError):
+            Relaxation(Box(0), 0)
+
+    def test_reallocation(self):
+        p = Relaxation(Box(-1, 1), 0.5)
+        x = np.array([0., 0.])
+        self.assertIsNot(p(x), x)
+        np.testing.assert_equal(x, np.array([0., 0.]))
+
+    def test_integer(self):
+        p = Relaxation(Box(-1, 1), 0.5)
+        np.testing.assert_almost_equal(p(np.array([3, 0])), np.array([2., 0.]))
+
+    def test_composition(self):
+        nonexp = Intersection([HalfSpace(np.array([1]), 1), HalfSpace(np.array([-1]), 1)])
+        p = Composition([Relaxation(nonexp, 0.5), Box(-2, 2)])
+        self.assertEqual(p.ndim, 1)
+        self.assertTrue(np.array([0.]) in p)
+        np.testing.assert_almost_equal(p(np.array([3.])), np.array([1.75]))
+
+    def test_pickle(self):
+        for p in [Relaxation(Box(-1, 1), 0.5), Relaxation(Intersection([Box(0)]), 0.8), Reflection(Box(-1, 1))]:
+            q = pickle.loads(pickle.dumps(p))
+            self.assertIs(type(q), type(p))
+            self.assertEqual(q._lam, p._lam)
+            np.testing.assert_equal(q(np.array([3., 0.])), p(np.array([3., 0.])))
+
+
+class TestReflection(unittest.TestCase):
+    def test_behavior(self):
+        p = Reflection(Box(-1, 1))
+        np.testing.assert_almost_equal(p(np.array([3., 0.])), np.array([-1., 0.]))
+        self.assertNotIsInstance(p, FirmlyNonexpansiveMap)
+
+    def test_nonexpansive_error(self):
+        with self.assertRaises(ValueError):
+            Reflection(Intersection([Box(0)]))
+
+
+class TestProductSpace(unittest.TestCase):
+    def setUp(self):
+        A, b = np.array([[1., 2.], [3., -1.], [-1., -1.]]), np.array([1., .5, 1.])
+        self.A, self.b = A, b
+        self.maps = [HalfSpace(a, d) for a, d in zip(A, b)]
+
+    def test_behavior(self):
+        T = ProductSpace(self.maps)
+        self.assertEqual((T.ndim, T.shape), (6, (3, 2)))
+        x = np.arange(6.)
+        X = np.array([m(v) for m, v in zip(self.maps, x.reshape(3, 2))])
+        np.testing.assert_almost_equal(T(x), np.tile(X.mean(axis=0), 3))
+        np.testing.assert_equal(T.embed(np.array([1., 2.])), np.array([1., 2., 1., 2., 1., 2.]))
+        np.testing.assert_equal(T.component(x), np.array([2., 3.]))
+        self.assertTrue(T.embed(np.zeros(2)) in T)
+        self.assertFalse(T.embed(np.ones(2)) in T)
+        self.assertFalse(np.array([0., 0., 0., 0., 0., .1]) in T)
+        self.assertFalse(np.zeros(2) in T)
+
+    def test_threads(self):
+        rng = np.random.RandomState(0)
+        maps = [HalfSpace(w, 1.) for w in rng.randn(10, 50)] + [Box(-np.ones(50), np.ones(50))]
+        T, S = ProductSpace(maps), ProductSpace(maps, threads=4)
+        for x in rng.randn(5, 550) * 3:
+            np.testing.assert_equal(S(x), T(x))
+
+    def test_find(self):
+        from fpmlib.algorithms import find
+        from fpmlib.projections import Polyhedron
+        T = ProductSpace(self.maps)
+        u = np.array([3., 1.])
+        exact = Polyhedron(self.A, self.b)(u)
+        for method in ('Krasnoselskii-Mann', 'Hishinuma2015', 'Mainge2008', 'SuperMann'):
+            x = find(T, T.embed(u), method=method, tol=1e-9)
+            self.assertTrue(np.allclose(x.reshape(3, 2), x[:2]))
+            self.assertTrue(np.all(self.A.dot(T.component(x)) <= self.b + 1e-6))
+        # The anchor of Halpern is embed(u), and so the limit is the projection of u onto the intersection,
+        # which the iterates approach at the rate O(1/k).
+        errors = []
+        for maxiter in (2000, 20000):
+            x = find(T, T.embed(u), method='Halpern', tol=1e-12, options={'maxiter': maxiter, 'steps': 'optimal'})
+            errors.append(np.linalg.norm(T.component(x) - exact))
+        self.assertLess(errors[1], 1e-3)
+        self.assertLess(errors[1] * 8, errors[0])
+
+    def test_close(self):
+        rng = np.random.RandomState(0)
+        x = rng.randn(6)
+        with ProductSpace(self.maps, threads=2) as T:
+            y = T(x)
+            executor = T._executor
+            self.assertIsNotNone(executor)
+            # The pool of threads is dropped from the pickle, and created again by the first call.
+            S = pickle.loads(pickle.dumps(T))
+            self.assertIsNone(S._executor)
+            np.testing.assert_equal(S(x), y)
+            S.close()
+        self.assertIsNone(T._executor)
+        with self.assertRaises(RuntimeError):
+            executor.submit(int)
+        np.testing.assert_equal(T(x), y)
+        T.close()
+
+    def test_averagedness(self):
+        T = ProductSpace(self.maps)
+        self.assertAlmostEqual(Relaxation(T, 1.5).averagedness, 1.)
+        with self.assertRaises(ValueError):
+            Relaxation(T, 1.6)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            ProductSpace([])
+        with self.assertRaises(ValueError):
+            ProductSpace([Box(0.)])
+        with self.assertRaises(ValueError):
+            ProductSpace([Reflection(Box(0.))], ndim=2)
+        with self.assertRaises(ValueError):
+            ProductSpace([Box(0.), Box(np.zeros(3))], ndim=2)
+        with self.assertRaises(ValueError):
+            ProductSpace([Box(0.)], ndim=2, threads=0)
+        self.assertEqual(ProductSpace([Box(0.), Ball(np.zeros(3), 1.)]).ndim, 6)
+
+
+class _CountingBall(Ball):
+    def __init__(self, c, r):
+        super().__init__(c, r)
+        self.count = 0
+
+    def __call__(self, x):
+        self.count += 1
+        return super().__call__(x)
+
+
+class TestEvaluate(unittest.TestCase):
+    def test_default(self):
+        p = Box(np.zeros(2), np.ones(2))
+        np.testing.assert_equal(p.evaluate(np.array([2., -1.]), 0.1), np.array([1., 0.]))
+
+    def test_intersection(self):
+        a, b = InexactBall(np.zeros(2), 1.), InexactBall(np.ones(2), 1.)
+        y = Intersection([a, b]).evaluate(np.zeros(2), 0.1)
+        self.assertEqual(a.accuracies + b.accuracies, [0.1, 0.1])
+        self.assertLessEqual(np.linalg.norm(y - Intersection([a, b])(np.zeros(2))), 0.1)
+        Intersection([a, b]).evaluate(np.zeros(2))
+        self.assertEqual(a.accuracies[-1], None)
+
+    def test_composition(self):
+        a, b = InexactBall(np.zeros(2), 1.), InexactBall(np.ones(2), 1.)
+        p = Composition([a, b])
+        y = p.evaluate(np.array([3., 3.]), 0.1)
+        self.assertEqual(a.accuracies + b.accuracies, [0.05, 0.05])
+        self.assertLessEqual(np.linalg.norm(y - p(np.array([3., 3.]))), 0.1)
+
+    def test_relaxation(self):
+        a = InexactBall(np.zeros(2), 1.)
+        p = Relaxation(a, 0.5)
+        y = p.evaluate(np.array([3., 0.]), 0.1)
+        self.assertEqual(a.accuracies, [0.2])
+        np.testing.assert_almost_equal(y, p(np.array([3., 0.])) + np.array([0.1, 0.]))
+
+    def test_map_cache(self):
+        cache = MapCache()
+        a = InexactBall(np.zeros(2), 1.)
+        shared = cache.share(a)
+        p = cache.root(Intersection([shared, Composition([Box(-np.ones(2), np.ones(2)), shared])]))
+        p.evaluate(np.array([3., 3.]), 0.1)
+        # The second branch requires the accuracy 0.05, which the first evaluation does not satisfy.
+        self.assertEqual(a.accuracies, [0.1, 0.05])
+        cache = MapCache()
+        a = InexactBall(np.zeros(2), 1.)
+        shared = cache.share(a)
+        p = cache.root(Intersection([Composition([Box(-np.ones(2), np.ones(2)), shared]), shared]))
+        p.evaluate(np.array([3., 3.]), 0.1)
+        self.assertEqual(a.accuracies, [0.05])
+        self.assertEqual(cache.hits, 1)
+
+
+class TestMapCache(unittest.TestCase):
+    def test_shared(self):
+        ball = _CountingBall(np.zeros(2), 1)
+        cache = MapCache()
+        shared = cache.share(ball)
+        self.assertIsInstance(shared, MetricProjection)
+        p = cache.root(Intersection([shared, Composition([HalfSpace(np.array([1, 0]), 0), shared])]))
+        self.assertIsInstance(p, NonexpansiveMap)
+        q = Intersection([ball, Composition([HalfSpace(np.array([1, 0]), 0), ball])])
+        x = np.array([2., 2.])
+        np.testing.assert_almost_equal(p(x), q(x))
+        self.assertEqual(ball.count, 3)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_inplace_update(self):
+        ball = _CountingBall(np.zeros(2), 1)
+        cache = MapCache()
+        p = cache.root(Intersection([cache.share(ball), cache.share(ball)]))
+        x = np.array([2., 0.])
+        np.testing.assert_almost_equal(p(x), np.array([1., 0.]))
+        x *= 0.25
+        np.testing.assert_almost_equal(p(x), np.array([0.5, 0.]))
+        self.assertEqual(ball.count, 2)
+
+    def test_stale_entries(self):
+        cache = MapCache()
+        shared = [cache.share(Ball(np.zeros(2), r)) for r in [1, 2, 3]]
+        p = cache.root(Intersection(shared))
+        for _ in range(5):
+            p(np.array([5., 0.]))
+            self.assertEqual(len(cache), 3)
+
+    def test_same_input(self):
+        ball = _CountingBall(np.zeros(2), 1)
+        cache = MapCache()
+        shared = cache.share(ball)
+        p = cache.root(Intersection([shared, shared, shared]))
+        x = np.array([2., 0.])
+        np.testing.assert_almost_equal(p(x), np.array([1., 0.]))
+        np.testing.assert_equal(x, np.array([2., 0.]))
+        self.assertEqual(ball.count, 1)
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_without_root(self):
+        ball = _CountingBall(np.zeros(2), 1)
+        cache = MapCache()
+        shared = cache.share(ball)
+        p = Intersection([shared, shared])
+        p(np.array([2., 0.]))
+        self.assertEqual(ball.count, 2)
+        self.assertEqual(len(cache), 0)
+
+    def test_eviction(self):
+        cache = MapCache(maxsize=2)
+        shared = [cache.share(Ball(np.zeros(2), r)) for r in [1, 2, 3]]
+        p = cache.root(Intersection(shared))
+        p(np.array([5., 0.]))
+        self.assertEqual(len(cache), 2)
+        cache.clear()
+        self.assertEqual((len(cache), cache.hits, cache.misses), (0, 0, 0))
+
+    def test_contains(self):
+        cache = MapCache()
+        p = cache.root(cache.share(Ball(np.zeros(2), 1)))
+        self.assertTrue(np.zeros(2) in p)
+        self.assertFalse(np.full(2, 2.) in p)
+        self.assertEqual(p.ndim, 2)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+import os
+import numpy as np
+import unittest
+from fpmlib.projections import Box, HalfSpace, Ball
+from fpmlib.nonexpansive import Intersection, Composition, Relaxation
+from fpmlib.algorithms import find
+from fpmlib.parallel import *
+from fpmlib.parallel import _Average
+
+
+class _LocalCommunicator(Communicator):
+    @property
+    def rank(self):
+        return 0
+
+    @property
+    def size(self):
+        return 1
+
+    def allreduce(self, x):
+        return x.copy()
+
+
+class _ExitingBox(Box):
+    # The first worker exits without posting its result, as if it were killed.
+    def block_apply(self, x, index, total):
+        if index.start == 0:
+            os._exit(1)
+        return super().block_apply(x, index, total)
+
+
+class TestBlockwise(unittest.TestCase):
+    def test_block_call(self):
+        rng = np.random.RandomState(0)
+        x = 3 * rng.randn(20)
+        maps = [
+            Box(-1, 1),
+            Box(rng.randn(20), rng.randn(20) + 5),
+            Box((np.array([2, 7, 15]), np.array([0., 1., 2.])), (np.array([3, 19]), np.array([-1., 0.]))),
+            HalfSpace(rng.randn(20), 0.5),
+            HalfSpace((np.array([1, 5, 12, 18]), rng.randn(4)), -1., ndim=20),
+            Ball(rng.randn(20), 2),
+        ]
+        for m in maps:
+            y = np.concatenate([m.block_call(x, slice(a, b)) for a, b in [(0, 3), (3, 11), (11, 20)]])
+            np.testing.assert_almost_equal(y, m(x))
+
+    def test_average(self):
+        maps = [Box(-1, 1), HalfSpace(np.ones(3), 1.), Ball(np.zeros(3), 2)]
+        T, S = Intersection(maps), _Average(maps)
+        for x in [np.array([3., -2., 1.]), np.zeros(3)]:
+            np.testing.assert_almost_equal(S(x), T(x))
+            np.testing.assert_almost_equal(S.block_call(x, slice(0, 3)), T(x))
+            self.assertEqual(x in S, x in T)
+
+
+class TestKrasnoselskiiMannBlock(unittest.TestCase):
+    def test_single_worker(self):
+        T = Composition([Box(-1, 1), HalfSpace(np.ones(4), 1)])
+        x0 = np.array([3., -2., 1., 4.])
+        x = x0.copy()
+        nit, residuals = krasnoselskii_mann_block(_LocalCommunicator(), T, x, slice(0, 4), 1e-8)
+        np.testing.assert_almost_equal(x, find(T, x0, tol=1e-8))
+        self.assertEqual(residuals.shape, (nit + 1,))
+
+    def test_invalid_map(self):
+        T = Relaxation(Box(-1, 1), 0.5)
+        with self.assertRaisesRegex(ValueError, 'cannot be evaluated blockwise'):
+            krasnoselskii_mann_block(_LocalCommunicator(), T, np.zeros(2), slice(0, 2), 1e-8)
+
+
+class TestFindPartitioned(unittest.TestCase):
+    def test_processes(self):
+        rng = np.random.RandomState(0)
+        T = Composition([Box(-1, 1), Intersection([HalfSpace(rng.randn(100), 1.), Ball(np.zeros(100), 5.)])])
+        x0 = 2 * rng.randn(100)
+        serial = find(T, x0, tol=1e-8, full_output=True)
+        for processes in [1, 3]:
+            res = find(T, x0, tol=1e-8, options={'processes': processes}, full_output=True)
+            self.assertIsNot(res.x, x0)
+            self.assertTrue(res.success)
+            self.assertEqual(res.nit, serial.nit)
+            np.testing.assert_almost_equal(res.x, serial.x)
+
+    def test_maxiter(self):
+        T = Intersection([Box(-1, 1), HalfSpace(np.ones(10), 1.)])
+        res = find(T, np.full(10, 3.), tol=1e-12, options={'processes': 2, 'maxiter': 5}, full_output=True)
+        self.assertEqual(res.status, 'maxiter')
+        self.assertEqual(res.nit, 5)
+
+    def test_worker_error(self):
+        T = Intersection([Box(-1, 1), HalfSpace(np.ones(10), 1.)])
+        with self.assertRaisesRegex(RuntimeError, 'A worker failed'):
+            find(T, np.full(10, 3.), options={'processes': 2, 'steps': [0.5, 'a']})
+
+    def test_worker_killed(self):
+        T = Intersection([_ExitingBox(-1, 1), HalfSpace(np.ones(10), 1.)])
+        with self.assertRaisesRegex(RuntimeError, 'A worker died'):
+            find(T, np.full(10, 3.), options={'processes': 2})
+
+    def test_invalid_options(self):
+        with self.assertRaises(ValueError):
+            find(Box(-1, 1), np.zeros(2), options={'processes': 2, 'steps': 'adaptive'})
@@ -1,5 +1,8 @@
 import numpy as np
+import pickle
 import unittest
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
 from fpmlib.projections import *
 
 
@@ -267,3 +270,313 @@ class TestBall(unittest.TestCase):
         p = Ball(np.array([1, -2]), 1)
         self.assertFalse("" in p)
         self.assertFalse(np.array([1, 2, 3]) in p)
+
+
+class TestSparseHalfSpace(unittest.TestCase):
+    def test_behavior(self):
+        p = HalfSpace((np.array([0, 1]), np.array([1., 2.])), 3., ndim=4)
+        q = HalfSpace(np.array([1., 2., 0., 0.]), 3.)
+        self.assertEqual(p.ndim, 4)
+        for x in [np.zeros(4), np.array([4., 2., 5., -1.]), np.array([0., 1.5, 1., 1.])]:
+            np.testing.assert_array_almost_equal(p(x), q(x))
+            self.assertEqual(x in p, x in q)
+
+    def test_duplicated_indices(self):
+        p = HalfSpace((np.array([1, 1]), np.array([1., 1.])), 2.)
+        self.assertIsNone(p.ndim)
+        np.testing.assert_array_almost_equal(p(np.array([0., 3., 0.])), np.array([0., 1., 0.]))
+
+    def test_inplace(self):
+        p = HalfSpace((np.array([2]), np.array([1.])), 1.)
+        x = np.array([5., 5., 5.])
+        self.assertIs(p(x, out=x), x)
+        np.testing.assert_array_almost_equal(x, np.array([5., 5., 1.]))
+
+    def test_reallocation(self):
+        p = HalfSpace((np.array([0]), np.array([1.])), 3.)
+        x = np.array([1., 1.])
+        self.assertIsNot(p(x), x)
+        x = np.array([5., 5.])
+        self.assertIsNot(p(x), x)
+        np.testing.assert_equal(x, np.array([5., 5.]))
+
+    def test_integer(self):
+        p = HalfSpace((np.array([0]), np.array([2.])), 1.)
+        np.testing.assert_array_almost_equal(p(np.array([2, 2])), np.array([0.5, 2.]))
+
+    def test_invalid(self):
+        with self.assertRaisesRegex(ValueError, 'must be a nonzero vector'):
+            HalfSpace((np.array([0]), np.array([0.])), 1.)
+        with self.assertRaisesRegex(ValueError, 'must be less than ndim'):
+            HalfSpace((np.array([5]), np.array([1.])), 1., ndim=3)
+        with self.assertRaisesRegex(ValueError, 'same length'):
+            HalfSpace((np.array([0, 1]), np.array([1.])), 1.)
+
+    def test_contains_invalid(self):
+        p = HalfSpace((np.array([2]), np.array([1.])), 1., ndim=3)
+        self.assertFalse("" in p)
+        self.assertFalse(np.array([0., 0.]) in p)
+        self.assertTrue(np.array([0., 0., 0.]) in p)
+
+    def test_scipy(self):
+        try:
+            from scipy.sparse import csr_matrix
+        except ImportError:
+            self.skipTest('SciPy is not installed.')
+        p = HalfSpace(csr_matrix(np.array([[0., 3., 0., 4.]])), 5.)
+        self.assertEqual(p.ndim, 4)
+        np.testing.assert_array_almost_equal(p(np.array([0., 3., 0., 4.])), np.array([0., 0.6, 0., 0.8]))
+
+
+class TestSparseBox(unittest.TestCase):
+    def test_behavior(self):
+        p = Box((np.array([1]), np.array([0.])), (np.array([0, 2]), np.array([1., 2.])))
+        self.assertIsNone(p.ndim)
+        np.testing.assert_equal(p(np.array([5., -5., 5.])), np.array([1., 0., 2.]))
+        np.testing.assert_equal(p(np.array([-5., 5., -5.])), np.array([-5., 5., -5.]))
+        self.assertTrue(np.array([-5., 5., -5.]) in p)
+        self.assertFalse(np.array([5., 5., -5.]) in p)
+        self.assertFalse(np.array([0., -1., 0.]) in p)
+
+    def test_mixed(self):
+        p = Box(np.zeros(3), (np.array([1]), np.array([1.])))
+        self.assertEqual(p.ndim, 3)
+        np.testing.assert_equal(p(np.array([-1., 2., 3.])), np.array([0., 1., 3.]))
+
+    def test_inplace(self):
+        p = Box(ub=(np.array([0]), np.array([1.])))
+        x = np.array([3., 3.])
+        self.assertIs(p(x, out=x), x)
+        np.testing.assert_equal(x, np.array([1., 3.]))
+
+    def test_reallocation(self):
+        p = Box(ub=(np.array([0]), np.array([1.])))
+        x = np.array([3., 3.])
+        self.assertIsNot(p(x), x)
+        np.testing.assert_equal(x, np.array([3., 3.]))
+
+    def test_integer(self):
+        p = Box(ub=(np.array([0]), np.array([1.5])))
+        np.testing.assert_equal(p(np.array([3, 3])), np.array([1.5, 3.]))
+
+    def test_contains_invalid(self):
+        p = Box((np.array([3]), np.array([0.])))
+        self.assertFalse("" in p)
+        self.assertFalse(np.array([1., 2.]) in p)
+
+
+class TestEllipsoid(unittest.TestCase):
+    def test_ball(self):
+        p, q = Ellipsoid(np.eye(3) / 4, np.ones(3)), Ball(np.ones(3), 2.)
+        self.assertEqual(p.ndim, 3)
+        rng = np.random.RandomState(0)
+        for x in rng.randn(10, 3) * 3:
+            np.testing.assert_almost_equal(p(x), q(x))
+
+    def test_axis_aligned(self):
+        p = Ellipsoid(np.array([1., 4.]))
+        np.testing.assert_almost_equal(p(np.array([3., 0.])), np.array([1., 0.]))
+        np.testing.assert_almost_equal(p(np.array([0., -3.])), np.array([0., -0.5]))
+        self.assertTrue(np.array([0.6, 0.4]) in p)
+        self.assertFalse(np.array([0.6, 0.5]) in p)
+
+    def test_optimality(self):
+        rng = np.random.RandomState(1)
+        B = rng.randn(20, 20)
+        A, c = B.dot(B.T) / 20 + 0.01 * np.eye(20), rng.randn(20)
+        p = Ellipsoid(A, c)
+        X = rng.randn(50, 20) * 10
+        Y = p(X)
+        for x, y in zip(X, Y):
+            # y is on the boundary, and x - y is parallel to the normal A (y - c).
+            self.assertAlmostEqual((y - c).dot(A).dot(y - c), 1.)
+            self.assertTrue(y in p)
+            n = A.dot(y - c)
+            mu = (x - y).dot(n) / n.dot(n)
+            self.assertGreater(mu, 0)
+            np.testing.assert_almost_equal(x - y, mu * n)
+            np.testing.assert_almost_equal(p(x), y)
+
+    def test_inside(self):
+        p = Ellipsoid(np.array([[2., 1.], [1., 2.]]), np.array([1., 1.]))
+        x = np.array([1.1, 0.9])
+        np.testing.assert_equal(p(x), x)
+        X = np.array([[1.1, 0.9], [5., 5.]])
+        Y = p(X)
+        np.testing.assert_equal(Y[0], X[0])
+        self.assertAlmostEqual((Y[1] - 1).dot(np.array([[2., 1.], [1., 2.]])).dot(Y[1] - 1), 1.)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            Ellipsoid(np.array([[1., 2.], [0., 1.]]))
+        with self.assertRaises(ValueError):
+            Ellipsoid(np.array([1., 0.]))
+        with self.assertRaises(ValueError):
+            Ellipsoid(np.eye(2), np.zeros(3))
+
+
+class TestPolyhedron(unittest.TestCase):
+    def test_box(self):
+        p = Polyhedron(np.vstack([np.eye(4), -2 * np.eye(4)]), np.r_[np.ones(4), 2 * np.ones(4)])
+        self.assertEqual(p.ndim, 4)
+        rng = np.random.RandomState(0)
+        for x in rng.randn(20, 4) * 3:
+            np.testing.assert_almost_equal(p(x), np.clip(x, -1, 1))
+
+    def test_optimality(self):
+        rng = np.random.RandomState(1)
+        # The case of 50 constraints in 5 dimensions has linearly dependent active constraints.
+        for M, N in [(20, 10), (50, 5), (5, 50)]:
+            A, b = rng.randn(M, N), rng.rand(M)
+            p = Polyhedron(A, b)
+            for x in rng.randn(20, N) * 5:
+                y = p(x)
+                self.assertTrue(y in p)
+                # x - y is in the normal cone at y, i.e., <x - y, z - y> <= 0 for any z in the polyhedron.
+                for z in p(rng.randn(20, N) * 5):
+                    self.assertLessEqual((x - y).dot(z - y), 1e-8)
+
+    def test_warm_start(self):
+        rng = np.random.RandomState(2)
+        A, b = rng.randn(200, 100), rng.rand(200)
+        p = Polyhedron(A, b)
+        x = rng.randn(100) * 5
+        y = p(x)
+        active, inverses = p._active.copy(), len(p._inverses)
+        self.assertGreater(active.size, 0)
+        for _ in range(5):
+            z = p(x + 1e-6 * rng.randn(100))
+            np.testing.assert_equal(p._active, active)
+            self.assertEqual(len(p._inverses), inverses)
+            np.testing.assert_almost_equal(z, y, decimal=4)
+        p._init_transient()
+        np.testing.assert_almost_equal(p(x), y)
+
+    def test_threads(self):
+        rng = np.random.RandomState(3)
+        p = Polyhedron(rng.randn(30, 10), rng.rand(30))
+        X = rng.randn(200, 10) * 5
+        Y = np.stack([p(x) for x in X])
+        with ThreadPoolExecutor(4) as executor:
+            np.testing.assert_almost_equal(np.stack(list(executor.map(p, X))), Y)
+
+    def test_pickle(self):
+        rng = np.random.RandomState(4)
+        p = Polyhedron(rng.randn(10, 3), rng.rand(10))
+        x = rng.randn(3) * 5
+        q = pickle.loads(pickle.dumps(p))
+        np.testing.assert_almost_equal(q(x), p(x))
+
+    def test_maxiter(self):
+        p = Polyhedron(np.eye(2), np.zeros(2))
+        with mock.patch('fpmlib.projections._ACTIVE_SET_MAXITER_FACTOR', 0):
+            with self.assertWarns(RuntimeWarning):
+                p(np.ones(2))
+
+    def test_half_spaces(self):
+        hs = [HalfSpace(np.array([1., 1.]), 1.), HalfSpace(np.array([-1., 2.]), 0.)]
+        p = Polyhedron(hs)
+        x = np.array([3., 3.])
+        y = p(x)
+        np.testing.assert_almost_equal(y, np.array([2 / 3, 1 / 3]))
+
+    def test_inside(self):
+        p = Polyhedron(np.array([[1., 0.], [0., 1.]]), np.array([1., 1.]))
+        X = np.array([[0.3, -5.], [2., 3.]])
+        Y = p(X)
+        np.testing.assert_equal(Y[0], X[0])
+        np.testing.assert_almost_equal(Y[1], np.array([1., 1.]))
+        self.assertFalse(np.array([1.1, 0.]) in p)
+        self.assertFalse(np.zeros(3) in p)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            Polyhedron(np.array([[1., 0.], [0., 0.]]), np.ones(2))
+        with self.assertRaises(ValueError):
+            Polyhedron(np.eye(2), np.ones(3))
+        with self.assertRaises(ValueError):
+            Polyhedron(np.eye(2))
+        with self.assertRaises(ValueError):
+            Polyhedron([HalfSpace((np.array([0]), np.array([1.])), 1.)])
+        p = Polyhedron(np.array([[1.], [-1.]]), np.array([-1., -1.]))
+        with self.assertRaises(ValueError):
+            p(np.array([3.]))
+
+
+class TestSecondOrderCone(unittest.TestCase):
+    def test_behavior(self):
+        p = SecondOrderCone()
+        np.testing.assert_equal(p(np.array([2., 1., 1.])), np.array([2., 1., 1.]))
+        np.testing.assert_equal(p(np.array([-2., 1., 1.])), np.zeros(3))
+        np.testing.assert_almost_equal(p(np.array([0., 3., 4.])), np.array([2.5, 1.5, 2.]))
+        np.testing.assert_almost_equal(p(np.array([1., 3., 4.])), np.array([3., 1.8, 2.4]))
+        np.testing.assert_equal(p(np.zeros(3)), np.zeros(3))
+
+    def test_batch(self):
+        p = SecondOrderCone(3)
+        np.testing.assert_almost_equal(
+            p(np.array([[0., 3., 4.], [2., 1., 1.]])), np.array([[2.5, 1.5, 2.], [2., 1., 1.]]))
+
+    def test_reallocation(self):
+        p = SecondOrderCone()
+        x = np.array([2., 1., 1.])
+        self.assertIsNot(p(x), x)
+
+    def test_ndim(self):
+        self.assertEqual(SecondOrderCone(4).ndim, 4)
+        self.assertIsNone(SecondOrderCone().ndim)
+
+    def test_contains(self):
+        p = SecondOrderCone(3)
+        self.assertTrue(np.array([5., 3., 4.]) in p)
+        self.assertTrue(np.zeros(3) in p)
+        self.assertFalse(np.array([4., 3., 4.]) in p)
+        self.assertFalse("" in p)
+        self.assertFalse(np.array([5., 3.]) in p)
+
+
+class TestPSDCone(unittest.TestCase):
+    @staticmethod
+    def svec(X):
+        rows, cols = np.tril_indices(X.shape[-1])
+        return X[..., rows, cols] * np.where(rows == cols, 1., 2 ** 0.5)
+
+    def test_behavior(self):
+        p = PSDCone(2)
+        self.assertEqual(p.ndim, 3)
+        np.testing.assert_almost_equal(
+            p(self.svec(np.array([[1., 2.], [2., 1.]]))), self.svec(np.array([[1.5, 1.5], [1.5, 1.5]])))
+        np.testing.assert_almost_equal(
+            p(self.svec(np.diag([-1., 2.]))), self.svec(np.diag([0., 2.])))
+
+    def test_blocks(self):
+        rng = np.random.RandomState(0)
+        X = rng.randn(3, 4, 4)
+        X += np.swapaxes(X, 1, 2)
+        w, V = np.linalg.eigh(X)
+        Y = np.matmul(V * np.maximum(w, 0)[:, np.newaxis, :], np.swapaxes(V, 1, 2))
+        p = PSDCone(4, blocks=3)
+        self.assertEqual(p.ndim, 30)
+        y = p(self.svec(X).ravel())
+        np.testing.assert_almost_equal(y, self.svec(Y).ravel())
+        self.assertTrue(y in p)
+        self.assertFalse(self.svec(X).ravel() in p)
+        np.testing.assert_almost_equal(p(np.stack([y, self.svec(X).ravel()])), np.stack([y, y]))
+
+    def test_check(self):
+        x = self.svec(np.array([[2., 1.], [1., 2.]]))
+        for p in [PSDCone(2), PSDCone(2, check=False)]:
+            y = p(x)
+            self.assertIsNot(y, x)
+            np.testing.assert_almost_equal(y, x)
+
+    def test_contains_invalid(self):
+        p = PSDCone(2)
+        self.assertFalse("" in p)
+        self.assertFalse(np.zeros(4) in p)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            PSDCone(0)
+        with self.assertRaises(ValueError):
+            PSDCone(2, blocks=0)
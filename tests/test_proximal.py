@@ -0,0 +1,107 @@
+import numpy as np
+import unittest
+from fpmlib.typing import FirmlyNonexpansiveMap
+from fpmlib.projections import Box
+from fpmlib.nonexpansive import Composition, Intersection
+from fpmlib.algorithms import find
+from fpmlib.proximal import *
+
+
+class TestSoftThreshold(unittest.TestCase):
+    def test_call(self):
+        p = SoftThreshold(1.)
+        self.assertIsInstance(p, FirmlyNonexpansiveMap)
+        self.assertIsNone(p.ndim)
+        np.testing.assert_equal(p(np.array([-3., -0.5, 0., 0.5, 2.])), np.array([-2., 0., 0., 0., 1.]))
+        np.testing.assert_equal(p(np.array([-3, 2])), np.array([-2., 1.]))
+
+    def test_vector(self):
+        p = SoftThreshold(np.array([1., 2.]))
+        self.assertEqual(p.ndim, 2)
+        np.testing.assert_equal(p(np.array([3., 3.])), np.array([2., 1.]))
+        np.testing.assert_equal(p(np.array([[3., 3.], [-1., -3.]])), np.array([[2., 1.], [0., -1.]]))
+
+    def test_out(self):
+        p = SoftThreshold(1.)
+        x = np.array([-3., 0.5, 2.])
+        y = p(x, out=x)
+        self.assertIs(y, x)
+        np.testing.assert_equal(x, np.array([-2., 0., 1.]))
+        out = np.empty(3)
+        self.assertIs(p(np.array([-3., 0.5, 2.]), out=out), out)
+        np.testing.assert_equal(out, np.array([-2., 0., 1.]))
+
+    def test_contains(self):
+        p = SoftThreshold(1.)
+        self.assertTrue(np.zeros(3) in p)
+        self.assertFalse(np.array([0., 1e-9]) in p)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            SoftThreshold(0.)
+        with self.assertRaises(ValueError):
+            SoftThreshold(np.array([1., -1.]))
+
+
+class TestSquaredNormProx(unittest.TestCase):
+    def test_call(self):
+        p = SquaredNormProx(3.)
+        np.testing.assert_equal(p(np.array([4., -8.])), np.array([1., -2.]))
+        x = np.array([[4., -8.]])
+        self.assertIs(p(x, out=x), x)
+        np.testing.assert_equal(x, np.array([[1., -2.]]))
+        self.assertTrue(np.zeros(2) in p)
+
+
+class TestHuberProx(unittest.TestCase):
+    def test_call(self):
+        p = HuberProx(1., 1.)
+        # The quadratic part for |x| <= 2, and the linear part otherwise.
+        np.testing.assert_almost_equal(p(np.array([-5., -2., 1., 3.])), np.array([-4., -1., 0.5, 2.]))
+
+    def test_minimizer(self):
+        p = HuberProx(0.5, 2.)
+        rng = np.random.RandomState(0)
+        ts = np.linspace(-10, 10, 200001)
+        h = np.where(np.abs(ts) <= 0.5, ts ** 2 / 2, 0.5 * (np.abs(ts) - 0.25))
+        for x in rng.randn(5) * 3:
+            y = ts[np.argmin(2. * h + (ts - x) ** 2 / 2)]
+            self.assertAlmostEqual(p(np.array([x]))[0], y, places=3)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            HuberProx(0.)
+
+
+class TestGroupSoftThreshold(unittest.TestCase):
+    def test_contiguous(self):
+        p = GroupSoftThreshold(np.array([0, 0, 1, 1, 1]), 5.)
+        self.assertEqual(p.ndim, 5)
+        x = np.array([6., 8., 1., 2., 2.])
+        np.testing.assert_almost_equal(p(x), np.array([3., 4., 0., 0., 0.]))
+        np.testing.assert_almost_equal(p(np.array([x, 2 * x])), np.array([[3., 4., 0., 0., 0.], [9., 12., 1 / 3, 2 / 3, 2 / 3]]))
+
+    def test_labels(self):
+        p = GroupSoftThreshold(np.array([7, 3, 7, 3]), np.array([5., 3.]))
+        x = np.array([1., 6., 2., 8.])
+        y = p(x, out=x)
+        self.assertIs(y, x)
+        np.testing.assert_almost_equal(x, np.array([0., 3., 0., 4.]))
+        self.assertTrue(np.zeros(4) in p)
+        self.assertFalse(np.zeros(3) in p)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            GroupSoftThreshold(np.array([0., 1.]))
+        with self.assertRaises(ValueError):
+            GroupSoftThreshold(np.array([0, 1]), np.ones(3))
+
+
+class TestFind(unittest.TestCase):
+    def test_composition(self):
+        # The minimizer of |x|_1 subject to 1 <= x_0 <= 2.
+        T = Composition([Box(np.array([1., -5.]), np.array([2., 5.])), SoftThreshold(0.1)])
+        x = find(T, np.array([5., 5.]), tol=1e-10)
+        np.testing.assert_almost_equal(x, np.array([1., 0.]), decimal=8)
+        T = Intersection([SoftThreshold(1.), HuberProx(), SquaredNormProx()])
+        np.testing.assert_almost_equal(find(T, np.array([5., 5.]), tol=1e-10), np.zeros(2))
@@ -0,0 +1,226 @@
+import os
+import json
+import struct
+import numpy as np
+import unittest
+import tempfile
+from fpmlib.projections import *
+from fpmlib.proximal import *
+from fpmlib.linear import *
+from fpmlib.nonexpansive import *
+from fpmlib.algorithms import find
+from fpmlib.serialization import *
+
+
+class TestSerialization(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'map.fpm')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def _roundtrip(self, T, **kwargs):
+        save(T, self.path)
+        return load(self.path, **kwargs)
+
+    def test_tree(self):
+        rng = np.random.RandomState(0)
+        B = rng.randn(4, 4)
+        T = Intersection([
+            Box(-np.ones(4), (np.array([1, 3]), np.array([0.5, 2.]))),
+            HalfSpace(np.array([1., 2., 0., -1.]), 1.),
+            Composition([Ball(np.zeros(4), 2.), Ellipsoid(B.dot(B.T) + np.eye(4), np.ones(4))]),
+            Relaxation(SoftThreshold(np.full(4, 0.1)), 1.5),
+            Reflection(GroupSoftThreshold(np.array([0, 1, 0, 1]))),
+            AffineMap(np.eye(4) * 0.5, np.ones(4)),
+            SecondOrderCone(),
+            HuberProx(0.5, 2.),
+            SquaredNormProx(),
+        ])
+        X = rng.randn(20, 4) * 3
+        for mmap in (True, False):
+            for trusted in (True, False):
+                S = self._roundtrip(T, mmap=mmap, trusted=trusted)
+                self.assertIsInstance(S, Intersection)
+                self.assertEqual(S.ndim, 4)
+                for x in X:
+                    np.testing.assert_equal(S(x), T(x))
+                np.testing.assert_equal(find(S, X[0], tol=1e-6), find(T, X[0], tol=1e-6))
+
+    def test_mmap(self):
+        T = Ball(np.arange(1000.), 3.)
+        S = self._roundtrip(T)
+        self.assertIsInstance(S._c.base, np.memmap)
+        self.assertFalse(S._c.flags.writeable)
+        np.testing.assert_equal(S._c, np.arange(1000.))
+        S = self._roundtrip(T, mmap=False)
+        self.assertNotIsInstance(S._c.base, np.memmap)
+        with open(self.path, 'rb') as f:
+            length, = struct.unpack('<Q', f.read(8))
+        self.assertEqual((8 + length) % 64, 0)
+
+    def test_intersection(self):
+        a, b = Box(0.), HalfSpace(np.array([1., 1.]), 1.)
+        S = self._roundtrip(Intersection([a, Box(1.), b]))
+        S.remove(S._maps[0])
+        S.add(PSDCone(1, 2))
+        self.assertEqual(len(S), 3)
+        np.testing.assert_almost_equal(S(np.array([2., 2.])), np.array([1.5, 1.5]))
+
+    def test_polyhedron(self):
+        rng = np.random.RandomState(1)
+        T = Polyhedron(rng.randn(10, 3), rng.rand(10))
+        x = rng.randn(3) * 5
+        y = T(x)
+        S = self._roundtrip(T)
+        self.assertEqual(S._active.size, 0)
+        np.testing.assert_almost_equal(S(x), y)
+
+    def test_product_space(self):
+        T = ProductSpace([Box(-np.ones(3), np.ones(3)), Ball(np.zeros(3), 0.5)], threads=2)
+        x = np.arange(6.)
+        y = T(x)
+        S = self._roundtrip(T)
+        self.assertEqual(S.shape, (2, 3))
+        self.assertIsNone(S._executor)
+        np.testing.assert_equal(S(x), y)
+
+    def test_untrusted(self):
+        save(Composition([Box(0.), Reflection(Box(1.))]), self.path)
+        with open(self.path, 'rb') as f:
+            length, = struct.unpack('<Q', f.read(8))
+            header = json.loads(f.read(length).decode())
+            blob = f.read()
+        # Swap the elements, so that the first one is not firmly nonexpansive.
+        maps = header['root']['attributes']['_maps']['tuple']
+        maps.reverse()
+        data = json.dumps(header).encode()
+        data += b' ' * (-(8 + len(data)) % 64)
+        with open(self.path, 'wb') as f:
+            f.write(struct.pack('<Q', len(data)) + data + blob)
+        self.assertIsInstance(load(self.path, trusted=True), Composition)
+        with self.assertRaises(ValueError):
+            load(self.path)
+
+    def _edit(self, T, edit):
+        # Save T, and rewrite the header of the file by edit(root, arrays) without touching the blob.
+        # If edit returns a value other than None, it replaces the root.
+        save(T, self.path)
+        with open(self.path, 'rb') as f:
+            length, = struct.unpack('<Q', f.read(8))
+            header = json.loads(f.read(length).decode())
+            blob = f.read()
+        root = edit(header['root'], header['arrays'])
+        if root is not None:
+            header['root'] = root
+        data = json.dumps(header).encode()
+        data += b' ' * (-(8 + len(data)) % 64)
+        with open(self.path, 'wb') as f:
+            f.write(struct.pack('<Q', len(data)) + data + blob)
+
+    def test_untrusted_parameters(self):
+        def scale(key, factor):
+            def edit(root, arrays):
+                root['attributes'][key] *= factor
+            return edit
+
+        cases = [
+            (Ball(np.zeros(2), 1.), scale('_r', -1)),
+            (Box(1., 1.5), scale('_lb', 2)),
+            (SoftThreshold(0.5), scale('_gamma', -1)),
+            (HuberProx(0.5), scale('_delta', 0)),
+            (SecondOrderCone(3), scale('_ndim', 0)),
+            (PSDCone(2), scale('_n', 2)),
+        ]
+        for T, edit in cases:
+            self._edit(T, edit)
+            self.assertIsInstance(load(self.path, trusted=True), type(T))
+            with self.assertRaises(ValueError):
+                load(self.path)
+        # Sparse bounds whose values are swapped, and a normal vector which is not of unit length, given by swapping the arrays.
+        def swap(root, arrays):
+            lb, ub = root['attributes']['_lb']['tuple'], root['attributes']['_ub']['tuple']
+            lb[1], ub[1] = ub[1], lb[1]
+        self._edit(Box((np.array([0, 1]), np.array([0., .5])), (np.array([1, 2]), np.array([2., 3.]))), swap)
+        with self.assertRaisesRegex(ValueError, 'lower bound greater'):
+            load(self.path)
+        self._edit(Intersection([HalfSpace(np.array([3., 4.]), 1.), Ball(np.array([3., 4.]), 1.)]), lambda root, arrays: arrays.reverse())
+        with self.assertRaisesRegex(ValueError, 'unit normal'):
+            load(self.path)
+        self._edit(Ball(np.zeros(2), 1.), lambda root, arrays: root['attributes']['_c'].update(array=5))
+        with self.assertRaisesRegex(ValueError, 'out of range'):
+            load(self.path)
+
+    def test_infinite_bounds(self):
+        T = Box(np.full(3, -np.inf), np.array([1., np.inf, 2.]))
+        x = np.array([-5., 5., 5.])
+        for trusted in (True, False):
+            np.testing.assert_equal(self._roundtrip(T, trusted=trusted)(x), np.array([-5., 5., 2.]))
+        # The first array of the blob is overwritten by NaN, which is not a valid bound.
+        self.assertIsInstance(self._roundtrip(Box(np.zeros(2), (np.array([1]), np.array([np.inf])))), Box)
+        with open(self.path, 'r+b') as f:
+            length, = struct.unpack('<Q', f.read(8))
+            f.seek(8 + length)
+            f.write(np.array([np.nan]).tobytes())
+        with self.assertRaises(ValueError):
+            load(self.path)
+        save(Ball(np.zeros(2), 1.), self.path)
+        with open(self.path, 'r+b') as f:
+            length, = struct.unpack('<Q', f.read(8))
+            f.seek(8 + length)
+            f.write(np.array([np.inf]).tobytes())
+        with self.assertRaisesRegex(ValueError, 'non-finite'):
+            load(self.path)
+
+    def test_malformed_header(self):
+        def set_attribute(key, value):
+            return lambda root, arrays: root['attributes'].__setitem__(key, value)
+
+        cases = [
+            (Ball(np.zeros(2), 1.), lambda root, arrays: arrays[0].update(dtype='|O')),
+            (Ball(np.zeros(2), 1.), lambda root, arrays: arrays[0].update(dtype=[['a', '<f8']])),
+            (Ball(np.zeros(2), 1.), set_attribute('ndim', 3)),
+            (Ball(np.zeros(2), 1.), set_attribute('_unknown', 3)),
+            (Ball(np.zeros(2), 1.), lambda root, arrays: root.__setitem__('attributes', [1, 2])),
+            (Intersection([Box(0.)]), set_attribute('_maps', 3)),
+            (Ball(np.zeros(2), 1.), lambda root, arrays: root.clear()),
+            (Ball(np.zeros(2), 1.), lambda root, arrays: root['attributes'].__setitem__('_c', {'tuple': 3})),
+        ]
+        for T, edit in cases:
+            self._edit(T, edit)
+            for trusted in (True, False):
+                with self.assertRaises(ValueError):
+                    load(self.path, trusted=trusted)
+
+        # Roots which are not mappings, which replace the root returned by the edit.
+        for root in (3, {'array': 0}, {'list': []}):
+            self._edit(Ball(np.zeros(2), 1.), lambda header_root, arrays: root)
+            with self.assertRaisesRegex(ValueError, 'does not contain a mapping'):
+                load(self.path)
+
+    def test_ellipsoid_weights(self):
+        def edit(root, arrays):
+            root['attributes']['_w'], root['attributes']['_c'] = root['attributes']['_c'], root['attributes']['_w']
+        self._edit(Ellipsoid(np.array([1., 2.]), np.array([-1., 0.])), edit)
+        with self.assertRaisesRegex(ValueError, 'positive weights'):
+            load(self.path)
+
+    def test_linear_norm(self):
+        save(LinearMap(np.eye(2) * 0.5), self.path)
+        with open(self.path, 'r+b') as f:
+            length, = struct.unpack('<Q', f.read(8))
+            f.seek(8 + length)
+            f.write(np.eye(2).ravel().__mul__(3.).tobytes())
+        self.assertEqual(load(self.path, trusted=True).norm, 0.5)
+        with self.assertRaises(ValueError):
+            load(self.path)
+
+    def test_unsupported(self):
+        cache = MapCache()
+        with self.assertRaises(ValueError):
+            save(cache.share(Box(0.)), self.path)
+        with open(self.path, 'wb') as f:
+            f.write(b'not a map file')
+        with self.assertRaises(ValueError):
+            load(self.path)
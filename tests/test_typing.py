@@ -1,3 +1,21 @@
 #!/usr/bin/env python3
+import numpy as np
 import unittest
 from fpmlib.typing import *
+from fpmlib.projections import Box
+from fpmlib.nonexpansive import Intersection
+
+
+class TestFirmlyNonexpansiveMap(unittest.TestCase):
+    def test_from_nonexpansive(self):
+        p = FirmlyNonexpansiveMap.from_nonexpansive(Intersection([Box(-1, 1)]))
+        self.assertIsInstance(p, FirmlyNonexpansiveMap)
+        np.testing.assert_almost_equal(p(np.array([3.])), np.array([2.]))
+
+    def test_from_nonexpansive_alpha(self):
+        p = FirmlyNonexpansiveMap.from_nonexpansive(Intersection([Box(-1, 1)]), 0.25)
+        np.testing.assert_almost_equal(p(np.array([3.])), np.array([2.5]))
+
+    def test_from_nonexpansive_invalid(self):
+        with self.assertRaises(ValueError):
+            FirmlyNonexpansiveMap.from_nonexpansive(Intersection([Box(-1, 1)]), 0.75)